@@ -1,17 +1,44 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from fastapi import APIRouter, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
+from datetime import date
+from uuid import UUID
+import asyncio
+import signal
 import sys
+import time
 import os
 
 # 모델 import를 위한 경로 추가
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models.routine_recommendation import RoutineRecommendationModel
-from models.weight_prediction_model import WeightPredictionModel
+from services.ai_tasks import (
+    generate_routine_task, generate_routines_task, predict_weight_task, predict_weight_arrays_task,
+    predict_weight_batch_task, predict_account_weight_task, predict_weight_engine_task,
+    check_exercise_catalog_task, reload_exercise_catalog_task
+)
+from services.compute_pool import compute_pool, PoolOverloadedError
+from services.engine_budget import engine_budget
+from services.model_cache import weight_data_key, weight_model_cache
+from services.routine_cache import routine_cache, routine_profile_key
+from services.single_flight import SingleFlight, SingleFlightTimeoutError
+from services.weight_history import WeightHistoryError, account_model_key, weight_history
+from api.responses import compact_payload, dumps, is_compact
+from models.routine_recommendation import validate_profile
+from utils.metrics import SERIES_LENGTH
 
 router = APIRouter(prefix="/api", tags=["AI"])
 
+ROUTINE_BATCH_CHUNK_SIZE = 32  # 워커에 한 번에 넘기는 고유 프로필 수
+UPLOAD_READ_SIZE = 64 * 1024  # 업로드 파일을 읽는 조각 크기
+MAX_DAYS_AHEAD = 365  # 예측 기간 상한 (예측 구간 계산의 메모리 / 시간이 기간에 비례)
+
+# 같은 입력으로 동시에 들어온 요청은 한 번만 계산 (여러 기기 / 중복 요청)
+routine_flight = SingleFlight.from_env("generate_routine")
+weight_flight = SingleFlight.from_env("predict_weight")
+account_weight_flight = SingleFlight.from_env("account_predict_weight")
+
 # 요청 모델들
 class UserProfile(BaseModel):
     fitness_level: str = "beginner"  # beginner, intermediate, advanced
@@ -19,36 +46,130 @@ class UserProfile(BaseModel):
     available_days: int = 3
     time_per_session: int = 60
     preferred_days: List[str] = []  # 선호 요일
+    seed: Optional[int] = None  # 지정하면 같은 프로필은 항상 같은 루틴
+    available_equipment: Optional[List[str]] = None  # 가진 장비 (exercises.equipment 값, 없으면 제한 없음)
+
+class BatchRoutineRequest(BaseModel):
+    profiles: List[UserProfile]
 
 class WeightRecord(BaseModel):
     date: str  # YYYY-MM-DD 형식
     weight: float
+    body_fat_percentage: Optional[float] = None
+    muscle_mass: Optional[float] = None
+    measurement_condition: Optional[str] = None  # morning_empty, evening, after_workout, other
 
 class WeightPredictionRequest(BaseModel):
     weight_data: List[WeightRecord]
-    days_ahead: int = 14
+    days_ahead: int = Field(14, ge=1, le=MAX_DAYS_AHEAD)
+    # 예측 엔진 (linear, holt, huber) — 지정하면 예측 구간과 체성분 예측을 함께 반환
+    engine: Optional[str] = None
+    interval_level: float = 0.8
 
-# AI 모델 인스턴스
-routine_model = RoutineRecommendationModel()
+class UserWeightSeries(BaseModel):
+    user_id: str
+    weight_data: List[WeightRecord]
+
+class BatchWeightPredictionRequest(BaseModel):
+    users: List[UserWeightSeries]
+    days_ahead: int = Field(14, ge=1, le=MAX_DAYS_AHEAD)
+
+def _profile_to_dict(profile: UserProfile) -> Dict[str, Any]:
+    return {
+        "fitness_level": profile.fitness_level,
+        "goal": profile.goal,
+        "available_days": profile.available_days,
+        "time_per_session": profile.time_per_session,
+        "preferred_days": profile.preferred_days,
+        "seed": profile.seed,
+        "available_equipment": profile.available_equipment
+    }
 
 @router.post("/generate-routine")
 async def generate_workout_routine(profile: UserProfile):
     """사용자 프로필 기반 운동 루틴 생성"""
     try:
-        user_profile = {
-            "fitness_level": profile.fitness_level,
-            "goal": profile.goal,
-            "available_days": profile.available_days,
-            "time_per_session": profile.time_per_session,
-            "preferred_days": profile.preferred_days
-        }
+        user_profile = _profile_to_dict(profile)
+        validate_profile(user_profile)
         
-        routine = routine_model.generate_weekly_routine(user_profile)
+        if not routine_cache.is_cacheable(user_profile):
+            # fresh 모드의 seed 없는 요청은 매번 새 루틴이어야 하므로 동시 요청과 합치지 않음
+            return await compute_pool.run(generate_routine_task, user_profile)
+        routine = await routine_flight.run(
+            routine_profile_key(user_profile), lambda: compute_pool.run(generate_routine_task, user_profile)
+        )
         return routine
         
+    except SingleFlightTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except PoolOverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"루틴 생성 중 오류 발생: {str(e)}")
 
+@router.post("/generate-routine/batch")
+async def generate_workout_routine_batch(request: BatchRoutineRequest):
+    """여러 프로필의 루틴을 생성해 완료되는 순서대로 NDJSON 으로 전송
+    
+    각 줄은 {"index": 입력 순서, "routine": ...} 또는 {"index": ..., "error": ...} 입니다.
+    같은 프로필은 한 번만 계산하고(fresh 모드의 seed 없는 프로필 제외), 동시에 워커 수만큼의 묶음만
+    실행해 메모리를 일정하게 유지합니다.
+    """
+    groups = {}  # 프로필 키 -> (프로필, 입력 순서 목록)
+    for index, profile in enumerate(request.profiles):
+        user_profile = _profile_to_dict(profile)
+        # 같은 루틴을 돌려줘도 되는 프로필만 합침 (fresh 모드의 seed 없는 프로필은 각각 생성)
+        key = routine_profile_key(user_profile) if routine_cache.is_cacheable(user_profile) else index
+        group = groups.setdefault(key, (user_profile, []))
+        group[1].append(index)
+    
+    unique = list(groups.values())
+    chunks = [unique[i:i + ROUTINE_BATCH_CHUNK_SIZE] for i in range(0, len(unique), ROUTINE_BATCH_CHUNK_SIZE)]
+    
+    compact = is_compact()
+    
+    def encode(index, result):
+        line = {"index": index, **result}
+        return dumps(compact_payload(line) if compact else line) + b"\n"
+    
+    async def stream():
+        chunk_iter = iter(chunks)
+        running = {}
+        try:
+            while True:
+                while len(running) < compute_pool.max_workers:
+                    chunk = next(chunk_iter, None)
+                    if chunk is None:
+                        break
+                    task = asyncio.ensure_future(
+                        compute_pool.run(generate_routines_task, [user_profile for user_profile, _ in chunk])
+                    )
+                    running[task] = chunk
+                if not running:
+                    break
+                
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    chunk = running.pop(task)
+                    try:
+                        results = task.result()
+                    except PoolOverloadedError as e:
+                        results = [{"error": str(e)}] * len(chunk)
+                    except Exception as e:
+                        # 이미 200 으로 전송 중이므로 묶음의 프로필마다 오류 줄을 보내 응답이 잘리지 않게 함
+                        results = [{"error": f"루틴 생성 중 오류 발생: {str(e)}"}] * len(chunk)
+                    for (_, indices), result in zip(chunk, results):
+                        for index in indices:
+                            yield encode(index, result)
+        finally:
+            # 클라이언트 연결이 끊기면 남은 작업 취소
+            for task in running:
+                task.cancel()
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 @router.post("/predict-weight")
 async def predict_weight(request: WeightPredictionRequest):
     """체중 예측"""
@@ -59,16 +180,22 @@ async def predict_weight(request: WeightPredictionRequest):
             for record in request.weight_data
         ]
         
+        SERIES_LENGTH.observe(len(weight_data))
         if len(weight_data) < 5:
             raise HTTPException(
                 status_code=400, 
                 detail="체중 예측을 위해서는 최소 5개의 데이터가 필요합니다"
             )
         
-        # 모델 학습 및 예측
-        model = WeightPredictionModel()
-        model.train(weight_data)
-        predictions = model.predict_future_weight(weight_data, request.days_ahead)
+        if request.engine is not None:
+            return await _predict_with_engine(request)
+        
+        # 모델 학습 및 예측 (워커 풀에서 실행, 같은 기록 / 기간의 동시 요청은 한 번만 계산)
+        # 같은 날짜 기록의 순서도 예측을 바꾸므로 받은 순서 그대로 키를 만듦
+        key = (weight_data_key(weight_data), request.days_ahead)
+        predictions = await weight_flight.run(
+            key, lambda: compute_pool.run(predict_weight_task, weight_data, request.days_ahead)
+        )
         
         return {
             "predictions": predictions,
@@ -76,11 +203,229 @@ async def predict_weight(request: WeightPredictionRequest):
             "prediction_days": request.days_ahead
         }
         
+    except HTTPException:
+        raise
+    except SingleFlightTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except PoolOverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"체중 예측 중 오류 발생: {str(e)}")
+
+def _series_builder(content_type: str = "", filename: str = ""):
+    """업로드 형식에 맞는 WeightSeriesBuilder (numpy 를 쓰므로 첫 업로드 요청에서 import)"""
+    from services.weight_ingest import WeightSeriesBuilder, detect_format
+    return WeightSeriesBuilder(detect_format(content_type, filename))
+
+async def _predict_with_engine(request: WeightPredictionRequest):
+    """예측 엔진 경로 (체성분 / 측정 조건 포함, 지연 예산을 넘으면 빠른 엔진으로 대체)"""
+    weight_data = [record.model_dump() for record in request.weight_data]
+    
+    async def compute():
+        engine, degraded = engine_budget.choose(request.engine, compute_pool.queue_depth)
+        start = time.perf_counter()
+        result = await compute_pool.run(
+            predict_weight_engine_task, weight_data, request.days_ahead, engine, request.interval_level
+        )
+        engine_budget.record(engine, time.perf_counter() - start)
+        return result, engine, degraded
+    
+    # 체성분 / 측정 조건도 결과에 영향을 주므로 입력 순서 그대로 모든 필드를 키에 포함
+    key = (tuple(tuple(record.values()) for record in weight_data),
+           request.days_ahead, request.engine, request.interval_level)
+    result, engine, degraded = await weight_flight.run(key, compute)
+    
+    return {
+        **result,
+        "engine": engine,
+        "requested_engine": request.engine,
+        "degraded": degraded,
+        "interval_level": request.interval_level,
+        "input_data_count": len(weight_data),
+        "prediction_days": request.days_ahead
+    }
+
+async def _predict_from_builder(builder, days_ahead: int):
+    """스트리밍 파싱이 끝난 배열로 체중 예측 응답 생성"""
+    SERIES_LENGTH.observe(builder.count)
+    try:
+        predictions = await compute_pool.run(
+            predict_weight_arrays_task, builder.dates, builder.weights, days_ahead
+        )
+        return {
+            "predictions": predictions,
+            "input_data_count": builder.count,
+            "prediction_days": days_ahead
+        }
+    
+    except PoolOverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"체중 예측 중 오류 발생: {str(e)}")
+
+@router.post("/predict-weight/stream")
+async def predict_weight_stream(request: Request,
+                                days_ahead: int = Query(14, ge=1, le=MAX_DAYS_AHEAD)):
+    """NDJSON(기본) 또는 CSV(Content-Type: text/csv) 본문을 받는 대로 파싱해 체중 예측"""
+    try:
+        builder = _series_builder(request.headers.get("content-type", ""))
+        async for chunk in request.stream():
+            builder.feed(chunk)
+        builder.close()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return await _predict_from_builder(builder, days_ahead)
+
+@router.post("/predict-weight/upload")
+async def predict_weight_upload(file: UploadFile = File(...),
+                                days_ahead: int = Form(14, ge=1, le=MAX_DAYS_AHEAD)):
+    """multipart 로 업로드한 CSV / NDJSON 파일을 조각 단위로 파싱해 체중 예측"""
+    try:
+        builder = _series_builder(file.content_type, file.filename)
+        while True:
+            chunk = await file.read(UPLOAD_READ_SIZE)
+            if not chunk:
+                break
+            builder.feed(chunk)
+        builder.close()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return await _predict_from_builder(builder, days_ahead)
+
+@router.post("/predict-weight/batch")
+async def predict_weight_batch_route(request: BatchWeightPredictionRequest):
+    """여러 사용자 체중 예측 (사용자별 오류는 해당 항목에만 기록)"""
+    try:
+        weight_series = [
+            [{"date": record.date, "weight": record.weight} for record in user.weight_data]
+            for user in request.users
+        ]
+        for series in weight_series:
+            SERIES_LENGTH.observe(len(series))
+        
+        batch_results = await compute_pool.run(predict_weight_batch_task, weight_series, request.days_ahead)
+        
+        results = []
+        for user, result in zip(request.users, batch_results):
+            entry = {"user_id": user.user_id, "input_data_count": len(user.weight_data)}
+            entry.update(result)
+            results.append(entry)
+        
+        error_count = sum(1 for result in batch_results if "error" in result)
+        return {
+            "results": results,
+            "prediction_days": request.days_ahead,
+            "success_count": len(results) - error_count,
+            "error_count": error_count
+        }
+        
+    except PoolOverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"일괄 체중 예측 중 오류 발생: {str(e)}")
+
+@router.get("/users/{account_id}/predict-weight")
+async def predict_account_weight(account_id: UUID, days_ahead: int = Query(14, ge=1, le=MAX_DAYS_AHEAD),
+                                 start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """저장된 계정 체중 기록(record_date, weight)으로 예측
+
+    계정 모델이 캐시에 있으면 마지막 기록 이후의 새 기록만 조회해 반영합니다.
+    start_date / end_date 로 학습 구간을 제한할 수 있습니다.
+    """
+    if weight_history is None:
+        raise HTTPException(status_code=503, detail="체중 기록 저장소가 설정되지 않았습니다")
+    
+    start = start_date.isoformat() if start_date else None
+    end = end_date.isoformat() if end_date else None
+    key = account_model_key(str(account_id), start, end)
+    try:
+        # 같은 계정 / 구간의 동시 요청은 기록 조회와 예측을 한 번만 수행
+        return await account_weight_flight.run(
+            (key, days_ahead), lambda: _predict_account(account_id, key, start, end, days_ahead)
+        )
+    
+    except SingleFlightTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except WeightHistoryError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except PoolOverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"체중 예측 중 오류 발생: {str(e)}")
 
+async def _predict_account(account_id: UUID, key: str, start: Optional[str], end: Optional[str],
+                           days_ahead: int):
+    """캐시된 계정 모델에 새 기록만 반영해 예측"""
+    cached_model = weight_model_cache.get(key)
+    after = cached_model.last_date if cached_model is not None else None
+    if after is not None and end is not None and after >= end:
+        dates, weights = [], []  # 구간 안의 기록을 이미 모두 반영함
+    else:
+        builder = await weight_history.fetch(str(account_id), after=after, start_date=start, end_date=end)
+        dates, weights = builder.dates, builder.weights
+    
+    model, predictions = await compute_pool.run(
+        predict_account_weight_task, cached_model, dates, weights, days_ahead
+    )
+    if model is not cached_model:
+        weight_model_cache.set(key, model)
+    SERIES_LENGTH.observe(model.count)
+    
+    return {
+        "account_id": str(account_id),
+        "predictions": predictions,
+        "input_data_count": model.count,
+        "fetched_records": len(dates),
+        "prediction_days": days_ahead
+    }
+
+@router.get("/model-cache/stats")
+async def model_cache_stats():
+    """체중 모델 캐시 적중 / 미적중 / 제거 통계"""
+    return weight_model_cache.stats()
+
+@router.get("/forecast-engines/stats")
+async def forecast_engine_stats():
+    """엔진별 지연 예산과 최근 처리 시간"""
+    return engine_budget.stats()
+
+@router.get("/single-flight/stats")
+async def single_flight_stats():
+    """동시 동일 요청 합치기 통계 (coalesced: 절약한 계산 수)"""
+    return {flight.name: flight.stats() for flight in (routine_flight, weight_flight, account_weight_flight)}
+
+@router.get("/routine-cache/stats")
+async def routine_cache_stats():
+    """운동 루틴 캐시 적중 / 미적중 / 제거 통계"""
+    return routine_cache.stats()
+
+@router.post("/exercise-catalog/reload")
+async def reload_exercise_catalog():
+    """운동 카탈로그 스냅샷(EXERCISE_CATALOG_PATH)을 서버 재시작 없이 다시 로드"""
+    try:
+        supervisor_pid = os.getenv("WEB_SUPERVISOR_PID")
+        if supervisor_pid:
+            # 여러 워커 모드(serve.py): 파일을 검사한 뒤 마스터에 rolling reload 요청 (모든 워커 교체)
+            exercise_count = await asyncio.to_thread(check_exercise_catalog_task)
+            os.kill(int(supervisor_pid), signal.SIGHUP)
+            return {"status": "rolling_reload", "exercise_count": exercise_count}
+        # 파일 파싱과 인덱스 생성은 이벤트 루프 밖에서 수행
+        exercise_count = await asyncio.to_thread(reload_exercise_catalog_task)
+        # 프로세스 풀 워커는 각자 카탈로그 / 루틴 캐시를 가지므로 새 워커로 교체 (새 카탈로그로 시작)
+        pool_restarted = await asyncio.to_thread(compute_pool.restart)
+        return {"status": "reloaded", "exercise_count": exercise_count, "pool_restarted": pool_restarted}
+    
+    except (OSError, ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"운동 카탈로그 로드 실패: {str(e)}")
+
 @router.get("/test")
 async def test_ai_models():
     """AI 모델 테스트"""
@@ -93,7 +438,7 @@ async def test_ai_models():
             "time_per_session": 45
         }
         
-        routine = routine_model.generate_weekly_routine(test_profile)
+        routine = await compute_pool.run(generate_routine_task, test_profile)
         
         # 체중 예측 테스트 (샘플 데이터)
         sample_weight_data = [
@@ -106,9 +451,7 @@ async def test_ai_models():
             {"date": "2025-01-07", "weight": 68.9}
         ]
         
-        weight_model = WeightPredictionModel()
-        weight_model.train(sample_weight_data)
-        weight_predictions = weight_model.predict_future_weight(sample_weight_data, 7)
+        weight_predictions = await compute_pool.run(predict_weight_task, sample_weight_data, 7)
         
         return {
             "routine_test": {
@@ -121,5 +464,7 @@ async def test_ai_models():
             }
         }
         
+    except PoolOverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI 모델 테스트 중 오류 발생: {str(e)}")
\ No newline at end of file
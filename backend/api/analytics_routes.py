@@ -0,0 +1,154 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import date
+from uuid import UUID
+import asyncio
+
+from api.ai_routes import MAX_DAYS_AHEAD, WeightRecord
+from services.ai_tasks import analyze_training_records_task, predict_weight_regressors_task
+from services.analytics_store import analytics_store
+from services.compute_pool import compute_pool, PoolOverloadedError
+from utils.metrics import SERIES_LENGTH
+
+router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
+
+# 요청 모델들 (Supabase workouts / nutrition_records 열 이름과 같음)
+class WorkoutRecord(BaseModel):
+    workout_date: str  # YYYY-MM-DD 형식
+    total_duration: Optional[int] = None  # 분
+    total_calories_burned: Optional[float] = None
+    average_heart_rate: Optional[float] = None
+    perceived_exertion: Optional[int] = None  # 1-10
+    calories_per_kg_per_minute: Optional[float] = None  # exercises 의 값 (소모 칼로리 추정용)
+
+class NutritionRecord(BaseModel):
+    meal_date: str  # YYYY-MM-DD 형식
+    meal_type: Optional[str] = None
+    serving_size: Optional[float] = None  # g
+    quantity: Optional[float] = 1
+    calories_per_100g: Optional[float] = None
+    protein_per_100g: Optional[float] = None
+    carbs_per_100g: Optional[float] = None
+    fat_per_100g: Optional[float] = None
+    fiber_per_100g: Optional[float] = None
+    sugar_per_100g: Optional[float] = None
+    sodium_per_100g: Optional[float] = None
+    total_calories: Optional[float] = None
+    total_protein: Optional[float] = None
+    total_carbs: Optional[float] = None
+    total_fat: Optional[float] = None
+    total_fiber: Optional[float] = None
+    total_sugar: Optional[float] = None
+    total_sodium: Optional[float] = None
+
+class TrainingRecordsRequest(BaseModel):
+    workouts: List[WorkoutRecord] = []
+    nutrition: List[NutritionRecord] = []
+    body_weight: Optional[float] = None  # kg, total_calories_burned 가 없는 운동의 소모 칼로리 추정용
+    replace: bool = True  # True: 보낸 기록이 있는 날짜의 집계를 다시 계산, False: 기존 집계에 더함
+
+class TrainingSummaryRequest(BaseModel):
+    workouts: List[WorkoutRecord] = []
+    nutrition: List[NutritionRecord] = []
+    body_weight: Optional[float] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    period: str = "day"  # day, week
+    resting_calories: Optional[float] = None  # 기초 대사량 (에너지 수지에서 뺌)
+
+class RegressorWeightPredictionRequest(BaseModel):
+    weight_data: List[WeightRecord]
+    days_ahead: int = Field(14, ge=1, le=MAX_DAYS_AHEAD)
+    resting_calories: Optional[float] = None
+
+def _iso(value: Optional[date]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+@router.post("/{account_id}/records")
+async def materialize_training_records(account_id: UUID, request: TrainingRecordsRequest):
+    """운동 / 식단 기록을 계정의 일별 집계에 반영 (변경된 날의 기록만 보내면 됨)"""
+    try:
+        result = await asyncio.to_thread(
+            analytics_store.materialize, str(account_id),
+            [record.model_dump() for record in request.workouts],
+            [record.model_dump() for record in request.nutrition],
+            request.body_weight, request.replace
+        )
+        return {"account_id": str(account_id), **result}
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"기록 집계 중 오류 발생: {str(e)}")
+
+@router.get("/{account_id}/summary")
+async def training_summary(account_id: UUID, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                           period: str = "day", resting_calories: Optional[float] = None):
+    """계정의 일별 / 주별 에너지 수지, 급성:만성 부하 비율, 영양소 합계 (일별 집계만 읽음)"""
+    try:
+        summary = await asyncio.to_thread(
+            analytics_store.summary, str(account_id), _iso(start_date), _iso(end_date), period, resting_calories
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if summary is None:
+        raise HTTPException(status_code=404, detail="집계된 운동 / 식단 기록이 없습니다")
+    return {"account_id": str(account_id), **summary}
+
+@router.post("/summary")
+async def training_summary_from_records(request: TrainingSummaryRequest):
+    """보낸 운동 / 식단 기록을 저장하지 않고 바로 집계"""
+    try:
+        return await compute_pool.run(
+            analyze_training_records_task,
+            [record.model_dump() for record in request.workouts],
+            [record.model_dump() for record in request.nutrition],
+            request.body_weight, _iso(request.start_date), _iso(request.end_date),
+            request.period, request.resting_calories
+        )
+
+    except PoolOverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"기록 집계 중 오류 발생: {str(e)}")
+
+@router.post("/{account_id}/predict-weight")
+async def predict_weight_with_training(account_id: UUID, request: RegressorWeightPredictionRequest):
+    """계정의 에너지 수지(7일 평균) / 훈련 부하(7일 평균)를 추가 설명 변수로 쓴 체중 예측
+
+    예측 기간 동안에는 최근 7일 평균이 유지된다고 가정합니다.
+    """
+    weight_data = [{"date": record.date, "weight": record.weight} for record in request.weight_data]
+    SERIES_LENGTH.observe(len(weight_data))
+    if len(weight_data) < 5:
+        raise HTTPException(status_code=400, detail="체중 예측을 위해서는 최소 5개의 데이터가 필요합니다")
+
+    regressors = await asyncio.to_thread(analytics_store.regressors, str(account_id), request.resting_calories)
+    if regressors is None:
+        raise HTTPException(status_code=404, detail="집계된 운동 / 식단 기록이 없습니다")
+    try:
+        result = await compute_pool.run(
+            predict_weight_regressors_task, weight_data, request.days_ahead, regressors
+        )
+        return {
+            "account_id": str(account_id),
+            **result,
+            "input_data_count": len(weight_data),
+            "prediction_days": request.days_ahead
+        }
+
+    except PoolOverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"체중 예측 중 오류 발생: {str(e)}")
+
+@router.get("/stats")
+async def analytics_stats():
+    """일별 집계 저장소 통계"""
+    return analytics_store.stats()
@@ -0,0 +1,89 @@
+# /metrics 엔드포인트와 요청 계측 미들웨어
+import os
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from starlette.routing import Match
+
+from utils.metrics import (
+    ERRORS_TOTAL, IN_FLIGHT, REQUEST_DURATION, REQUESTS_TOTAL,
+    profiler, registry, request_timings, server_timing_header
+)
+
+# 이 요청 헤더가 있으면 응답에 Server-Timing 헤더를 추가
+SERVER_TIMING_REQUEST_HEADER = b"x-server-timing"
+
+router = APIRouter(tags=["Metrics"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus 텍스트 형식 메트릭"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def _route_label(scope) -> str:
+    """경로 템플릿 (예: /api/predict-weight) — 경로 값이 라벨 수를 늘리지 않도록 함"""
+    route = scope.get("route")
+    if route is not None and hasattr(route, "path"):
+        return route.path
+    app = scope.get("app")
+    for candidate in getattr(getattr(app, "router", None), "routes", []):
+        match, _ = candidate.matches(scope)
+        if match == Match.FULL:
+            return candidate.path
+    return "unmatched"
+
+class MetricsMiddleware:
+    """요청 수 / 지연 / 오류 / 진행 중 요청 수 기록, Server-Timing 헤더, 느린 요청 프로파일 저장"""
+
+    def __init__(self, app, slow_request_ms: float = 0, profile_dir: str = ".cache/profiles"):
+        self.app = app
+        self.slow_request_ms = slow_request_ms
+        self.profile_dir = profile_dir
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        want_timing = any(name == SERVER_TIMING_REQUEST_HEADER for name, _ in scope.get("headers", []))
+        timings = []
+        token = request_timings.set(timings)
+        status = 500
+        start = time.perf_counter()
+        IN_FLIGHT.inc()
+
+        async def send_with_metrics(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if want_timing:
+                    header = server_timing_header(timings, time.perf_counter() - start)
+                    message = {**message, "headers": list(message.get("headers", [])) + [
+                        (b"server-timing", header.encode("latin-1"))
+                    ]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            end = time.perf_counter()
+            IN_FLIGHT.dec()
+            request_timings.reset(token)
+
+            route = _route_label(scope)
+            method = scope["method"]
+            REQUEST_DURATION.observe(end - start, method=method, route=route)
+            REQUESTS_TOTAL.inc(method=method, route=route, status=status)
+            if status >= 400:
+                ERRORS_TOTAL.inc(route=route, status=status)
+
+            if profiler.running and self.slow_request_ms and (end - start) * 1000 >= self.slow_request_ms:
+                self._dump_profile(route, start, end)
+
+    def _dump_profile(self, route: str, start: float, end: float):
+        """느린 요청 구간의 접힌 스택을 파일로 저장"""
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = route.strip("/").replace("/", "_").replace("{", "").replace("}", "") or "root"
+        path = os.path.join(self.profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{int((end - start) * 1000)}ms-{name}.folded")
+        profiler.dump(path, start, end)
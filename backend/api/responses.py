@@ -0,0 +1,248 @@
+# 응답 직렬화 / compact 형식 / 압축
+# - FastJSONResponse: orjson 이 설치되어 있으면 orjson 으로, 없으면 표준 json 으로 직렬화
+# - compact 형식: Accept: application/vnd.workout.compact+json 또는 ?format=compact 로 선택하며,
+#   예측은 {start_date, step_days, values} 열 형식, 루틴은 문자열 표(labels)의 번호로 보냅니다.
+# - CompressionMiddleware: 응답이 일정 크기 이상이면 Accept-Encoding 에 따라 brotli 또는 gzip 으로 압축
+import gzip
+import json
+from contextvars import ContextVar
+from typing import Any, Dict, List
+from urllib.parse import parse_qs
+
+from fastapi.responses import JSONResponse
+
+from utils.metrics import timed
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # 선택 의존성
+    brotli = None
+
+COMPACT_MEDIA_TYPE = "application/vnd.workout.compact+json"
+FORECAST_VALUE_KEYS = ("predicted_weight", "predicted_value")
+
+# 현재 요청의 응답 형식 ("json" 또는 "compact")
+response_format: ContextVar[str] = ContextVar("response_format", default="json")
+
+def dumps(content: Any) -> bytes:
+    """JSON 직렬화 (공백 없음, 한글 그대로)"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def is_compact() -> bool:
+    return response_format.get() == "compact"
+
+def compact_forecast(entries: List[Dict]) -> Dict:
+    """[{date, predicted_weight, lower_bound?, upper_bound?}, ...] -> {start_date, step_days, values, lower?, upper?}
+
+    날짜 간격이 일정하지 않으면 step_days 대신 dates 를 보냅니다.
+    """
+    if not entries:
+        return {"start_date": None, "step_days": 1, "values": []}
+    value_key = next((key for key in FORECAST_VALUE_KEYS if key in entries[0]), FORECAST_VALUE_KEYS[0])
+    result = {"start_date": entries[0]["date"], "step_days": 1}
+    if len(entries) > 1:
+        import numpy as np  # 예측 응답이 있으면 이미 불러온 상태
+        steps = np.diff(np.array([entry["date"] for entry in entries], dtype="datetime64[D]")).astype(np.int64)
+        if (steps == steps[0]).all():
+            result["step_days"] = int(steps[0])
+        else:
+            del result["step_days"]
+            result["dates"] = [entry["date"] for entry in entries]
+    result["values"] = [entry[value_key] for entry in entries]
+    if "lower_bound" in entries[0]:
+        result["lower"] = [entry["lower_bound"] for entry in entries]
+        result["upper"] = [entry["upper_bound"] for entry in entries]
+    return result
+
+def _is_forecast(value) -> bool:
+    return (isinstance(value, list) and bool(value) and isinstance(value[0], dict)
+            and "date" in value[0] and any(key in value[0] for key in FORECAST_VALUE_KEYS))
+
+class _Labels:
+    """문자열 표 (같은 문자열은 한 번만 저장하고 번호로 참조)"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def __call__(self, value):
+        if not isinstance(value, str):
+            return value
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+def compact_routine(routine: Dict) -> Dict:
+    """주간 루틴을 문자열 표 번호로 압축 (요청 프로필 echo 는 생략)
+
+    days: [[요일, 종류, 총 시간 또는 null, [[exercise_fields 순서의 값]...]], ...]
+    """
+    labels = _Labels()
+    fields: List[str] = []
+    days = []
+    for day, plan in routine.get("weekly_routine", {}).items():
+        exercises = []
+        for exercise in plan.get("exercises", []):
+            for key in exercise:
+                if key not in fields:
+                    fields.append(key)
+            exercises.append([labels(exercise.get(key)) for key in fields])
+        days.append([labels(day), labels(plan.get("type")), labels(plan.get("total_time")), exercises])
+
+    # 나중에 추가된 필드만큼 앞쪽 운동 항목 길이를 맞춤
+    for day in days:
+        for exercise in day[3]:
+            exercise.extend([None] * (len(fields) - len(exercise)))
+
+    result = {key: value for key, value in routine.items()
+              if key not in ("user_profile", "weekly_routine", "recommendations")}
+    result.update(
+        exercise_fields=fields,
+        days=days,
+        recommendations=[labels(text) for text in routine.get("recommendations", [])],
+        labels=labels.values,
+    )
+    return result
+
+def compact_payload(content: Any) -> Any:
+    """응답 본문에서 예측 목록과 루틴을 compact 형식으로 바꿈 (나머지는 그대로)"""
+    if isinstance(content, dict):
+        if "weekly_routine" in content:
+            return compact_routine(content)
+        result = {}
+        for key, value in content.items():
+            if _is_forecast(value):
+                result[key] = compact_forecast(value)
+            else:
+                result[key] = compact_payload(value)
+        return result
+    if isinstance(content, list):
+        return [compact_payload(item) for item in content]
+    return content
+
+class FastJSONResponse(JSONResponse):
+    """빠른 JSON 직렬화 + compact 형식 + serialization 단계 시간 기록"""
+
+    def __init__(self, content: Any = None, *args, **kwargs):
+        self.compact = is_compact()
+        if self.compact:
+            self.media_type = COMPACT_MEDIA_TYPE
+        super().__init__(content, *args, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        with timed("serialization"):
+            if self.compact:
+                content = compact_payload(content)
+            return dumps(content)
+
+class ResponseFormatMiddleware:
+    """Accept 헤더 / format 쿼리로 요청별 응답 형식 선택"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers", []))
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        compact = (COMPACT_MEDIA_TYPE.encode() in headers.get(b"accept", b"")
+                   or query.get("format", [""])[-1] == "compact")
+
+        async def send_with_vary(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"vary", b"Accept")]}
+            await send(message)
+
+        token = response_format.set("compact" if compact else "json")
+        try:
+            await self.app(scope, receive, send_with_vary)
+        finally:
+            response_format.reset(token)
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    encodings = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            encodings[name.strip().lower()] = quality
+    return encodings
+
+class CompressionMiddleware:
+    """minimum_size 이상인 한 번에 보내는 응답을 brotli(설치된 경우) 또는 gzip 으로 압축
+
+    NDJSON 같은 스트리밍 응답은 줄 단위 전송 지연을 늘리지 않도록 압축하지 않습니다.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _choose_encoding(self, scope):
+        header = dict(scope.get("headers", [])).get(b"accept-encoding", b"").decode("latin-1")
+        accepted = _accepted_encodings(header)
+        if brotli is not None and accepted.get("br", 0) > 0:
+            return "br"
+        if accepted.get("gzip", 0) > 0:
+            return "gzip"
+        return None
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        encoding = self._choose_encoding(scope) if scope["type"] == "http" and self.minimum_size > 0 else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message  # 본문을 보고 압축 여부를 정함
+                return
+            if start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            headers = [(name, value) for name, value in start.get("headers", [])]
+            body = message.get("body", b"")
+            already_encoded = any(name.lower() == b"content-encoding" for name, _ in headers)
+            if message.get("more_body", False) or already_encoded or len(body) < self.minimum_size:
+                await send(start)
+                await send(message)
+                return
+
+            with timed("compression"):
+                body = self._compress(body, encoding)
+            headers = [(name, value) for name, value in headers if name.lower() != b"content-length"]
+            headers += [(b"content-encoding", encoding.encode()), (b"content-length", str(len(body)).encode()),
+                        (b"vary", b"Accept-Encoding")]
+            await send({**start, "headers": headers})
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1 @@
+# 벤치마크 패키지
\ No newline at end of file
@@ -0,0 +1,165 @@
+# 여러 워커 모드(serve.py) 처리량 부하 테스트
+#
+# 사용법 (backend 디렉터리에서):
+#   python -m benchmarks.load_test --workers 1,2,4 --duration 10
+#   python -m benchmarks.load_test --workers 4 --reload-during   # 부하 중 rolling reload, 실패 요청 수 확인
+#
+# 워커 수마다 serve.py 를 실제 TCP 포트로 띄우고, 여러 클라이언트 프로세스가 루틴 생성 / 체중 예측
+# 요청을 섞어 duration 초 동안 보낸 뒤 req/s, p50/p99 지연, 오류 수, 응답한 워커 수를 출력합니다.
+# speedup 은 첫 번째 워커 수 대비 처리량 비율이며, CPU 코어 수보다 워커가 많으면 늘지 않습니다.
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import profile_mix, weight_series
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def request_mix(count: int = 512) -> List[tuple]:
+    """(경로, JSON 본문) 목록 — 루틴 생성과 서로 다른 체중 기록의 예측을 반씩"""
+    requests = [("/api/generate-routine", json.dumps(profile)) for profile in profile_mix(count // 2, seed=7)]
+    requests += [("/api/predict-weight", json.dumps({"weight_data": weight_series(200, seed=i), "days_ahead": 14}))
+                 for i in range(count // 2)]
+    return requests
+
+
+def _client(base_url: str, duration: float, concurrency: int, seed: int, results):
+    """클라이언트 프로세스: concurrency 개의 연결로 duration 초 동안 요청"""
+    import httpx
+    requests = request_mix()
+    latencies, errors, pids = [], 0, set()
+
+    async def run():
+        nonlocal errors
+        deadline = time.monotonic() + duration
+        async with httpx.AsyncClient(base_url=base_url, timeout=30,
+                                     limits=httpx.Limits(max_connections=concurrency)) as client:
+            async def loop(offset: int):
+                nonlocal errors
+                index = offset
+                while time.monotonic() < deadline:
+                    path, body = requests[index % len(requests)]
+                    index += concurrency
+                    t0 = time.perf_counter()
+                    try:
+                        response = await client.post(path, content=body,
+                                                     headers={"Content-Type": "application/json"})
+                        if response.status_code != 200:
+                            errors += 1
+                            continue
+                    except httpx.HTTPError:
+                        errors += 1
+                        continue
+                    latencies.append(time.perf_counter() - t0)
+
+            await asyncio.gather(*(loop(seed * concurrency + i) for i in range(concurrency)))
+        for _ in range(32):  # 새 연결마다 어느 워커가 받는지 확인
+            async with httpx.AsyncClient(base_url=base_url, timeout=5) as probe:
+                pids.add((await probe.get("/api/health")).json()["worker_pid"])
+
+    asyncio.run(run())
+    results.put((latencies, errors, sorted(pids)))
+
+
+def _wait_ready(base_url: str, workers: int, timeout: float = 60) -> bool:
+    import httpx
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(base_url + "/health", timeout=1).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def run_scenario(workers: int, port: int, duration: float, clients: int, concurrency: int,
+                 reload_during: bool) -> Dict:
+    env = dict(os.environ, MODEL_CACHE_BACKEND="shared", WEB_ACCESS_LOG="0",
+               MODEL_CACHE_SHARED_PATH=os.path.join(".cache", f"load_test_models_{port}.npy"))
+    server = subprocess.Popen([sys.executable, "serve.py", "--workers", str(workers), "--port", str(port),
+                               "--host", "127.0.0.1"], cwd=BACKEND_DIR, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        if not _wait_ready(base_url, workers):
+            raise RuntimeError(f"서버가 시작되지 않았습니다 (workers={workers})")
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=_client, args=(base_url, duration, concurrency, i, results))
+                     for i in range(clients)]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        if reload_during:
+            time.sleep(duration / 3)
+            server.send_signal(signal.SIGHUP)
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    latencies = sorted(latency for result in collected for latency in result[0])
+    errors = sum(result[1] for result in collected)
+    pids = {pid for result in collected for pid in result[2]}
+
+    def percentile(q: float) -> Optional[float]:
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2)
+
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99),
+        "responding_workers": len(pids),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="여러 워커 모드 처리량 부하 테스트")
+    parser.add_argument("--workers", default="1,2,4", help="쉼표로 구분한 워커 수 목록")
+    parser.add_argument("--duration", type=float, default=10, help="워커 수별 부하 시간(초)")
+    parser.add_argument("--clients", type=int, default=min(4, os.cpu_count() or 1), help="클라이언트 프로세스 수")
+    parser.add_argument("--concurrency", type=int, default=16, help="클라이언트 프로세스당 동시 요청 수")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--reload-during", action="store_true", help="부하 도중 SIGHUP 으로 rolling reload")
+    parser.add_argument("--output", help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    results = {"cpu_count": os.cpu_count(), "scenarios": []}
+    baseline = None
+    for workers in [int(value) for value in args.workers.split(",")]:
+        result = run_scenario(workers, args.port, args.duration, args.clients, args.concurrency,
+                              args.reload_during)
+        baseline = baseline or result["rps"]
+        result["speedup"] = round(result["rps"] / baseline, 2) if baseline else None
+        results["scenarios"].append(result)
+        print(result, flush=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.output}")
+    if (os.cpu_count() or 1) < max(result["workers"] for result in results["scenarios"]):
+        print(f"참고: CPU 코어 {os.cpu_count()}개 — 코어 수보다 많은 워커는 처리량을 늘리지 못합니다")
+    return 1 if args.reload_during and any(result["errors"] for result in results["scenarios"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
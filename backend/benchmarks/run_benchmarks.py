@@ -0,0 +1,426 @@
+# AI 엔드포인트 / 모델 내부 벤치마크
+#
+# 사용법 (backend 디렉터리에서):
+#   python -m benchmarks.run_benchmarks --output bench.json
+#   python -m benchmarks.run_benchmarks --quick --compare benchmarks/baseline_quick.json --threshold 0.2
+#
+# 결과는 JSON 으로 저장되며, --compare 를 주면 기준 결과보다 threshold 이상 나빠진 항목을
+# 출력하고 종료 코드 1 을 반환합니다. 기준 파일이 없거나 비교할 항목이 하나도 없으면(--quick 여부가
+# 다른 기준 등) 회귀 검사를 건너뛰지 않고 실패합니다. imports 항목은 새 인터프리터에서 -X importtime 으로 잰
+# 앱 시작(import main)과 지연 로딩되는 체중 예측 엔진의 import 시간입니다.
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from api.responses import compact_payload, dumps
+from benchmarks.synthetic import DAYS, FITNESS_LEVELS, GOALS, profile_mix, training_records, weight_series
+from models.routine_recommendation import RoutineRecommendationModel
+from models.training_analytics import DailyRollup, analyze_records
+from models.weight_prediction_model import WeightPredictionModel, predict_weight_with_engine
+from models import forecast_engines
+
+SERIES_SIZES = [5, 50, 500, 10000]
+QUICK_SERIES_SIZES = [5, 500]
+HORIZONS = [14, 365]
+ROUTINE_BUDGET_MS = 5.0  # 루틴 생성(요일 / 분할 / 종목 최적화) 요청당 지연 예산
+ROUTINE_SESSION_TIMES = [10, 20, 30, 45, 60, 90, 120]
+QUICK_ROUTINE_SESSION_TIMES = [20, 60]
+
+# 지표별로 값이 작을수록 좋은지 여부 (비교 모드에서 사용)
+LOWER_IS_BETTER = {"p50_us": True, "p95_ms": True, "p99_ms": True, "peak_kb": True, "rps": False,
+                   "import_ms": True}
+COMPARED_METRICS = {"micro": ["p50_us"], "load": ["p95_ms", "rps"], "memory": ["peak_kb"],
+                    "imports": ["import_ms"], "routine_budget": ["p99_ms"]}
+
+# 새 인터프리터에서 측정하는 import 시나리오 (앱 시작 / 첫 예측 시 지연 로딩되는 모듈)
+IMPORT_SCENARIOS = {
+    "main": "import main",
+    "weight_engine[numpy]": "import models.weight_prediction_model",
+    "weight_engine[sklearn]": "import models.weight_prediction_model, pandas, sklearn.linear_model, sklearn.preprocessing",
+}
+HEAVY_MODULES = ("numpy", "pandas", "sklearn", "joblib")
+
+
+def measure(fn: Callable[[], object], min_time: float = 0.2, max_iterations: int = 10000) -> Dict:
+    """fn 을 반복 실행해 호출당 시간 분포(µs)를 측정"""
+    fn()  # 워밍업
+    durations = []
+    start = time.perf_counter()
+    while len(durations) < max_iterations and (time.perf_counter() - start) < min_time:
+        t0 = time.perf_counter_ns()
+        fn()
+        durations.append((time.perf_counter_ns() - t0) / 1000)
+    values = np.array(durations)
+    return {
+        "iterations": len(values),
+        "mean_us": round(float(values.mean()), 2),
+        "p50_us": round(float(np.percentile(values, 50)), 2),
+        "p95_us": round(float(np.percentile(values, 95)), 2),
+        "min_us": round(float(values.min()), 2),
+    }
+
+
+def memory_peak(fn: Callable[[], object]) -> Dict:
+    """fn 한 번 실행 중 Python 할당 최대량(KB)"""
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"peak_kb": round(peak / 1024, 1)}
+
+
+def run_micro(sizes: List[int], min_time: float) -> Dict:
+    """함수 단위 벤치마크"""
+    results = {}
+    for n in sizes:
+        data = weight_series(n, seed=n)
+        results[f"weight.prepare_features[pandas,n={n}]"] = measure(
+            lambda: WeightPredictionModel().prepare_features(data), min_time)
+        for backend in ("numpy", "sklearn"):
+            results[f"weight.train[{backend},n={n}]"] = measure(
+                lambda: WeightPredictionModel(backend=backend).train(data), min_time)
+            model = WeightPredictionModel(backend=backend).train(data)
+            for horizon in HORIZONS:
+                results[f"weight.predict_future_weight[{backend},n={n},h={horizon}]"] = measure(
+                    lambda: model.predict_future_weight(data, horizon), min_time)
+        for engine in forecast_engines.ENGINES:
+            for horizon in HORIZONS:
+                results[f"weight.predict_weight_with_engine[{engine},n={n},h={horizon}]"] = measure(
+                    lambda: predict_weight_with_engine(data, horizon, engine), min_time)
+
+    routine_model = RoutineRecommendationModel()
+    profiles = profile_mix(256, seed=1)
+    index = iter(range(10 ** 9))
+    results["routine.generate_weekly_routine[mix]"] = measure(
+        lambda: routine_model.generate_weekly_routine(profiles[next(index) % len(profiles)]), min_time)
+
+    # 응답 직렬화 (기본 JSON / compact 형식)
+    routine = routine_model.generate_weekly_routine(profiles[0])
+    forecast = {"predictions": WeightPredictionModel().train(weight_series(50, seed=50)).predict_future_weight(
+        weight_series(50, seed=50), 365)}
+    for name, payload in (("routine", routine), ("forecast[h=365]", forecast)):
+        results[f"serialize.{name}[json]"] = measure(lambda: dumps(payload), min_time)
+        results[f"serialize.{name}[compact]"] = measure(lambda: dumps(compact_payload(payload)), min_time)
+
+    # 칼로리 / 훈련 부하 집계 (원본 기록 재집계 vs 일별 집계 조회)
+    workouts, nutrition = training_records(365, seed=365)
+    rollup = DailyRollup().materialize(workouts, nutrition, body_weight=70)
+    results["analytics.analyze_records[days=365]"] = measure(
+        lambda: analyze_records(workouts, nutrition, body_weight=70), min_time)
+    results["analytics.rollup_summary[days=365]"] = measure(lambda: rollup.summary(), min_time)
+    results["analytics.rollup_summary[days=365,week]"] = measure(lambda: rollup.summary(period="week"), min_time)
+    results["analytics.materialize[1 day]"] = measure(
+        lambda: rollup.materialize(workouts[-1:], nutrition[-4:], body_weight=70), min_time)
+    return results
+
+
+def run_routine_budget(session_times: List[int], repeat: int = 3) -> Dict:
+    """모든 프로필 조합(수준 x 목표 x 운동 요일 수 0~7 x 선호 요일 128가지 x 세션 시간)의 루틴 생성 지연
+
+    조합마다 repeat 회 실행한 중앙값을 쓰며, ROUTINE_BUDGET_MS 를 넘은 조합 수를 함께 기록합니다.
+    """
+    routine_model = RoutineRecommendationModel()
+    durations = []
+    for level, goal, available_days, preferred_mask, minutes in itertools.product(
+            FITNESS_LEVELS, GOALS, range(8), range(128), session_times):
+        profile = {
+            "fitness_level": level,
+            "goal": goal,
+            "available_days": available_days,
+            "time_per_session": minutes,
+            "preferred_days": [day for i, day in enumerate(DAYS) if preferred_mask >> i & 1],
+        }
+        samples = []
+        for _ in range(repeat):
+            t0 = time.perf_counter_ns()
+            routine_model.generate_weekly_routine(profile)
+            samples.append((time.perf_counter_ns() - t0) / 1e6)
+        durations.append(sorted(samples)[repeat // 2])
+    values = np.array(durations)
+    return {"routine.generate_weekly_routine[all profiles]": {
+        "profiles": len(values),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3),
+        "budget_ms": ROUTINE_BUDGET_MS,
+        "over_budget": int((values > ROUTINE_BUDGET_MS).sum()),
+    }}
+
+
+def run_memory(sizes: List[int]) -> Dict:
+    """요청 한 번 처리에 해당하는 작업의 메모리 최대량"""
+    results = {}
+    for n in sizes:
+        data = weight_series(n, seed=n)
+        for backend in ("numpy", "sklearn"):
+            def train_and_predict():
+                model = WeightPredictionModel(backend=backend).train(data)
+                model.predict_future_weight(data, 14)
+            results[f"weight.train_predict[{backend},n={n}]"] = memory_peak(train_and_predict)
+
+    routine_model = RoutineRecommendationModel()
+    profiles = profile_mix(1000, seed=2)
+    results["routine.generate_weekly_routine[x1000]"] = memory_peak(
+        lambda: [routine_model.generate_weekly_routine(profile) for profile in profiles])
+    return results
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """-X importtime 출력에서 모듈별 누적 import 시간(µs)"""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        cumulative[fields[2].strip()] = float(fields[1])
+    return cumulative
+
+
+def run_imports(repeat: int) -> Dict:
+    """새 인터프리터에서 -X importtime 으로 시나리오별 import 시간 측정 (repeat 회 중 최솟값)"""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = {}
+    for name, statement in IMPORT_SCENARIOS.items():
+        best = None
+        for _ in range(repeat):
+            process = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", statement],
+                cwd=backend_dir, capture_output=True, text=True, check=True,
+            )
+            cumulative = parse_importtime(process.stderr)
+            targets = [module.strip() for module in statement.replace("import ", "").split(",")]
+            total_us = sum(cumulative.get(module, 0.0) for module in targets)
+            if best is None or total_us < best[0]:
+                best = (total_us, cumulative)
+        total_us, cumulative = best
+        results[name] = {
+            "import_ms": round(total_us / 1000, 2),
+            "heavy_modules": {module: round(cumulative[module] / 1000, 2)
+                              for module in HEAVY_MODULES if module in cumulative},
+        }
+    return results
+
+
+async def asgi_request(app, method: str, path: str, body: bytes = b"",
+                       content_type: str = "application/json") -> Dict:
+    """네트워크 없이 ASGI 앱을 직접 호출"""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"content-type", content_type.encode()),
+                    (b"content-length", str(len(body)).encode())],
+        "client": ("benchmark", 0),
+        "server": ("benchmark", 80),
+    }
+    request_sent = False
+    response = {"status": None, "body": b""}
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response
+
+
+async def load_test(app, method: str, path: str, bodies: List[bytes],
+                    concurrency: int, total_requests: int) -> Dict:
+    """동시 요청 concurrency 개로 total_requests 번 호출해 지연 분포와 처리량 측정"""
+    latencies = []
+    errors = 0
+    counter = iter(range(total_requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            t0 = time.perf_counter()
+            response = await asgi_request(app, method, path, bodies[i % len(bodies)])
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if response["status"] != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    values = np.array(latencies)
+    return {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "rps": round(total_requests / elapsed, 1),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+    }
+
+
+def run_load(total_requests: int, concurrency: int) -> Dict:
+    """프로세스 내 ASGI 부하 테스트"""
+    from main import app
+    from services.compute_pool import compute_pool
+    from services.model_cache import weight_model_cache
+
+    def weight_bodies(n: int, distinct: int) -> List[bytes]:
+        return [json.dumps({"weight_data": weight_series(n, seed=seed), "days_ahead": 14}).encode()
+                for seed in range(distinct)]
+
+    routine_bodies = [json.dumps(profile).encode() for profile in profile_mix(256, seed=3)]
+    scenarios = {
+        "POST /api/predict-weight[n=30,cold]": ("/api/predict-weight", weight_bodies(30, total_requests)),
+        "POST /api/predict-weight[n=365,cold]": ("/api/predict-weight", weight_bodies(365, total_requests)),
+        "POST /api/predict-weight[n=365,warm]": ("/api/predict-weight", weight_bodies(365, 1)),
+        "POST /api/generate-routine[mix]": ("/api/generate-routine", routine_bodies),
+    }
+
+    async def run_all():
+        results = {}
+        for name, (path, bodies) in scenarios.items():
+            results[name] = await load_test(app, "POST", path, bodies, concurrency, total_requests)
+        return results
+
+    compute_pool.start()
+    try:
+        if weight_model_cache.store is not None:
+            weight_model_cache.store.clear()
+        return asyncio.run(run_all())
+    finally:
+        compute_pool.shutdown()
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> Tuple[List[str], int]:
+    """기준 결과 대비 threshold(비율) 이상 나빠진 항목 목록과 비교한 지표 수"""
+    regressions = []
+    compared = 0
+    for section, metrics in COMPARED_METRICS.items():
+        for name, values in current.get(section, {}).items():
+            base_values = baseline.get(section, {}).get(name)
+            if not base_values:
+                continue
+            for metric in metrics:
+                new, old = values.get(metric), base_values.get(metric)
+                if not new or not old:
+                    continue
+                compared += 1
+                change = (new - old) / old if LOWER_IS_BETTER[metric] else (old - new) / old
+                if change > threshold:
+                    regressions.append(f"{section} {name} {metric}: {old} -> {new} ({change:+.0%})")
+    return regressions, compared
+
+
+def load_baseline(path: str, quick: bool) -> Dict:
+    """기준 결과 JSON (없거나 측정 모드가 다르면 ValueError)"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            baseline = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"기준 결과를 읽을 수 없습니다: {path} ({e})")
+    if baseline.get("meta", {}).get("quick") != quick:
+        mode = "--quick" if baseline.get("meta", {}).get("quick") else "전체"
+        raise ValueError(f"기준 결과({path})는 {mode} 측정 결과입니다. 같은 모드로 실행하세요.")
+    return baseline
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="AI 엔드포인트 / 모델 벤치마크")
+    parser.add_argument("--quick", action="store_true", help="작은 데이터 크기와 짧은 측정 시간")
+    parser.add_argument("--output", default="bench_results.json", help="결과 JSON 경로")
+    parser.add_argument("--compare", help="비교할 기준 결과 JSON 경로")
+    parser.add_argument("--threshold", type=float, default=0.2, help="회귀로 판단할 악화 비율")
+    parser.add_argument("--skip-load", action="store_true", help="ASGI 부하 테스트 생략")
+    parser.add_argument("--requests", type=int, default=None, help="부하 테스트 시나리오별 요청 수")
+    parser.add_argument("--concurrency", type=int, default=16, help="부하 테스트 동시 요청 수")
+    args = parser.parse_args(argv)
+
+    sizes = QUICK_SERIES_SIZES if args.quick else SERIES_SIZES
+    min_time = 0.05 if args.quick else 0.3
+    total_requests = args.requests or (100 if args.quick else 1000)
+
+    baseline = None
+    if args.compare:
+        # 측정 전에 확인 (기준이 없으면 회귀 검사 없이 통과하지 않도록)
+        try:
+            baseline = load_baseline(args.compare, args.quick)
+        except ValueError as e:
+            parser.error(str(e))
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": args.quick,
+        },
+        "micro": run_micro(sizes, min_time),
+        "memory": run_memory(sizes),
+        "routine_budget": run_routine_budget(QUICK_ROUTINE_SESSION_TIMES if args.quick else ROUTINE_SESSION_TIMES),
+        "imports": run_imports(repeat=3 if args.quick else 7),
+    }
+    if not args.skip_load:
+        results["load"] = run_load(total_requests, args.concurrency)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {args.output}")
+
+    for section in ("micro", "memory", "routine_budget", "imports", "load"):
+        for name, values in results.get(section, {}).items():
+            print(f"[{section}] {name}: {values}")
+
+    over_budget = sum(values["over_budget"] for values in results["routine_budget"].values())
+    if over_budget:
+        print(f"\n루틴 생성 지연 예산({ROUTINE_BUDGET_MS}ms) 초과 조합 {over_budget}개")
+        return 1
+
+    if baseline is not None:
+        regressions, compared = compare(results, baseline, args.threshold)
+        if not compared:
+            print(f"\n기준 결과({args.compare})와 같은 항목이 없어 비교하지 못했습니다")
+            return 1
+        if regressions:
+            print(f"\n성능 회귀 {len(regressions)}건 (기준: {args.compare}, 허용 {args.threshold:.0%})")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\n성능 회귀 없음 (기준: {args.compare}, 지표 {compared}개)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
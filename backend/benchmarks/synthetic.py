@@ -0,0 +1,71 @@
+# 벤치마크용 합성 데이터 생성
+import random
+from datetime import date, timedelta
+from typing import Dict, List
+
+FITNESS_LEVELS = ["beginner", "intermediate", "advanced"]
+GOALS = ["weight_loss", "muscle_gain", "maintenance", "endurance"]
+DAYS = ['월요일', '화요일', '수요일', '목요일', '금요일', '토요일', '일요일']
+
+def weight_series(n: int, seed: int = 0, gap_prob: float = 0.15,
+                  duplicate_prob: float = 0.05, start: date = date(2022, 1, 1)) -> List[Dict]:
+    """추세 + 잡음이 있는 체중 기록 n 개 (날짜 건너뜀 / 같은 날짜 중복 포함, 순서는 섞음)"""
+    rng = random.Random(seed)
+    trend = rng.uniform(-0.05, 0.03)
+    weight = rng.uniform(55, 95)
+    day = 0
+    records = []
+    for i in range(n):
+        if i and rng.random() >= duplicate_prob:
+            day += 1
+            while rng.random() < gap_prob:
+                day += 1
+        weight += trend + rng.gauss(0, 0.3)
+        records.append({
+            "date": (start + timedelta(days=day)).isoformat(),
+            "weight": round(weight, 1)
+        })
+    rng.shuffle(records)
+    return records
+
+def profile_mix(count: int, seed: int = 0) -> List[Dict]:
+    """목표 / 수준 / 요일 수 / 선호 요일이 섞인 사용자 프로필"""
+    rng = random.Random(seed)
+    profiles = []
+    for _ in range(count):
+        available_days = rng.randint(1, 7)
+        preferred_count = rng.randint(0, available_days)
+        profiles.append({
+            "fitness_level": rng.choice(FITNESS_LEVELS),
+            "goal": rng.choice(GOALS),
+            "available_days": available_days,
+            "time_per_session": rng.choice([20, 30, 45, 60, 90]),
+            "preferred_days": rng.sample(DAYS, preferred_count),
+        })
+    return profiles
+
+def training_records(days: int, seed: int = 0, start: date = date(2022, 1, 1)):
+    """days 일 동안의 운동 기록(주 3~5회)과 식단 기록(하루 3~5끼)"""
+    rng = random.Random(seed)
+    workouts, nutrition = [], []
+    for day in range(days):
+        current = (start + timedelta(days=day)).isoformat()
+        if rng.random() < 0.6:
+            workouts.append({
+                "workout_date": current,
+                "total_duration": rng.choice([30, 45, 60, 90]),
+                "total_calories_burned": rng.randint(150, 700) if rng.random() < 0.7 else None,
+                "average_heart_rate": rng.randint(110, 165),
+                "perceived_exertion": rng.randint(3, 9),
+            })
+        for _ in range(rng.randint(3, 5)):
+            nutrition.append({
+                "meal_date": current,
+                "serving_size": rng.choice([100, 150, 200, 300]),
+                "quantity": 1,
+                "calories_per_100g": rng.uniform(80, 350),
+                "protein_per_100g": rng.uniform(2, 25),
+                "carbs_per_100g": rng.uniform(5, 60),
+                "fat_per_100g": rng.uniform(1, 20),
+            })
+    return workouts, nutrition
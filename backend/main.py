@@ -1,9 +1,43 @@
 # FastAPI 백엔드 진입점
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api.ai_routes import router as ai_router
+from api.analytics_routes import router as analytics_router
+from api.metrics import router as metrics_router, MetricsMiddleware
+from api.responses import CompressionMiddleware, FastJSONResponse, ResponseFormatMiddleware
+from services.compute_pool import compute_pool
+from services.weight_history import weight_history
+from services.model_warmup import MODEL_WARMUP, start_warm_up, warmup_errors, warmup_status, warmup_workers
+from utils.metrics import profiler
 
-app = FastAPI(title="Workout Tracker API", version="1.0.0")
+# 느린 요청 프로파일링 (0 이면 사용 안 함)
+PROFILE_SLOW_REQUEST_MS = float(os.getenv("PROFILE_SLOW_REQUEST_MS", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(".cache", "profiles"))
+
+# 이 크기(바이트) 이상인 응답은 brotli / gzip 으로 압축 (0 이면 압축 안 함)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # CPU 연산용 워커 풀은 앱 시작 시 한 번 생성하고 종료 시 정리
+    # MODEL_WARMUP 에 지정한 엔진은 백그라운드에서 미리 import / 실행 (첫 예측 지연 감소)
+    start_warm_up(compute_pool, MODEL_WARMUP)
+    compute_pool.start()
+    # 체중 기록 저장소 연결 풀도 시작 시 한 번 만들어 요청 간 재사용 (keep-alive)
+    if weight_history is not None:
+        weight_history.start()
+    if PROFILE_SLOW_REQUEST_MS > 0:
+        profiler.start()
+    yield
+    profiler.stop()
+    if weight_history is not None:
+        await weight_history.close()
+    compute_pool.shutdown()
+
+app = FastAPI(title="Workout Tracker API", version="1.0.0", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
 
 # CORS 설정
 app.add_middleware(
@@ -14,8 +48,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 응답 형식(compact) 선택과 압축
+app.add_middleware(ResponseFormatMiddleware)
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+# 요청 계측 (가장 바깥쪽에서 전체 처리 시간을 측정하도록 마지막에 추가)
+app.add_middleware(MetricsMiddleware, slow_request_ms=PROFILE_SLOW_REQUEST_MS, profile_dir=PROFILE_DIR)
+
 # 라우터 등록
 app.include_router(ai_router)
+app.include_router(analytics_router)
+app.include_router(metrics_router)
 
 @app.get("/")
 async def root():
@@ -27,7 +70,13 @@ async def health_check():
 
 @app.get("/api/health")
 async def api_health_check():
-    return {"status": "healthy", "message": "API is running"}
+    return {
+        "status": "healthy",
+        "message": "API is running",
+        "worker_pid": os.getpid(),
+        "warmup": {"engines": list(MODEL_WARMUP), "seconds": warmup_status, "errors": warmup_errors,
+                   "workers": len(warmup_workers)},
+    }
 
 if __name__ == "__main__":
     import uvicorn
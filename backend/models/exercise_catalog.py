@@ -0,0 +1,199 @@
+# 운동 종목 카탈로그
+# public.exercises 테이블 스냅샷(JSON/CSV)을 한 번 읽어 정수 ID 와 인덱스를 미리 만들어 두고,
+# 루틴 생성 시에는 딕셔너리 조회만으로 후보 운동을 찾습니다. 생성 후에는 변경하지 않습니다.
+import csv
+import json
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+CATEGORIES = ('cardio', 'strength', 'flexibility', 'sports', 'other')
+DIFFICULTY_LEVELS = ('beginner', 'intermediate', 'advanced')
+
+# 스냅샷이 없을 때 사용하는 기본 종목 (기존 루틴 추천 모델의 운동 목록)
+DEFAULT_EXERCISES = (
+    [{"name": name, "category": "cardio", "difficulty_level": "beginner"}
+     for name in ["걷기", "실내자전거", "수영", "요가"]]
+    + [{"name": name, "category": "cardio", "difficulty_level": "intermediate"}
+       for name in ["조깅", "사이클링", "댄스", "계단오르기"]]
+    + [{"name": name, "category": "cardio", "difficulty_level": "advanced"}
+       for name in ["러닝", "HIIT", "크로스핏", "복싱"]]
+    + [{"name": name, "category": "strength", "difficulty_level": "beginner"}
+       for name in ["팔굽혀펴기", "스쿼트", "플랭크", "런지"]]
+    + [{"name": name, "category": "strength", "difficulty_level": "intermediate"}
+       for name in ["덤벨운동", "바벨운동", "풀업", "딥스"]]
+    + [{"name": name, "category": "strength", "difficulty_level": "advanced"}
+       for name in ["데드리프트", "벤치프레스", "스쿼트(바벨)", "오버헤드프레스"]]
+    + [{"name": name, "category": "flexibility", "difficulty_level": "beginner"}
+       for name in ["스트레칭", "요가", "필라테스", "폼롤링"]]
+)
+
+# 부위별 근육 묶음 (exercises.muscle_groups 의 영문 / 한글 값, 근육 증가 분할 루틴에 사용)
+UPPER_MUSCLE_GROUPS = ("chest", "shoulders", "triceps", "back", "biceps", "arms",
+                       "상체", "가슴", "어깨", "삼두근", "이두근", "등근육")
+LOWER_MUSCLE_GROUPS = ("quadriceps", "glutes", "hamstrings", "calves", "legs",
+                       "하체", "대퇴사두근", "둔근", "햄스트링", "종아리")
+MUSCLE_GROUP_SETS = {
+    "upper": UPPER_MUSCLE_GROUPS,
+    "lower": LOWER_MUSCLE_GROUPS,
+    "full": UPPER_MUSCLE_GROUPS + LOWER_MUSCLE_GROUPS + ("core", "abs", "전신", "코어", "복근"),
+}
+
+
+class Exercise(NamedTuple):
+    id: int
+    name: str
+    category: str
+    subcategory: Optional[str]
+    difficulty_level: str
+    equipment: Tuple[str, ...]
+    muscle_groups: Tuple[str, ...]
+    calories_per_kg_per_minute: float
+
+
+def _parse_array(value) -> Tuple[str, ...]:
+    """JSON 배열 또는 Postgres 배열 문자열({a,"b c"})을 튜플로 변환"""
+    if value is None or value == "":
+        return ()
+    if isinstance(value, (list, tuple)):
+        return tuple(str(item) for item in value)
+    text = str(value).strip()
+    if text.startswith('['):
+        return tuple(str(item) for item in json.loads(text))
+    text = text.strip('{}')
+    if not text:
+        return ()
+    return tuple(next(csv.reader([text], skipinitialspace=True)))
+
+
+def _is_active(value) -> bool:
+    if value is None or value == "":
+        return True
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', 't', '1', 'yes')
+    return bool(value)
+
+
+class ExerciseCatalog:
+    """정수 ID 와 (분류, 난이도) / 근육 부위 / 장비 인덱스를 가진 불변 운동 카탈로그"""
+
+    def __init__(self, records: Iterable[Dict]):
+        exercises = []
+        for record in records:
+            if not _is_active(record.get('is_active')):
+                continue
+            category = record['category']
+            difficulty = record.get('difficulty_level') or 'beginner'
+            if category not in CATEGORIES:
+                raise ValueError(f"알 수 없는 운동 분류입니다: {category}")
+            if difficulty not in DIFFICULTY_LEVELS:
+                raise ValueError(f"알 수 없는 난이도입니다: {difficulty}")
+            calories = record.get('calories_per_kg_per_minute')
+            exercises.append(Exercise(
+                id=len(exercises),
+                name=record['name'],
+                category=category,
+                subcategory=record.get('subcategory') or None,
+                difficulty_level=difficulty,
+                equipment=_parse_array(record.get('equipment')),
+                muscle_groups=_parse_array(record.get('muscle_groups')),
+                calories_per_kg_per_minute=float(calories) if calories not in (None, "") else 0.05,
+            ))
+        self.exercises: Tuple[Exercise, ...] = tuple(exercises)
+
+        by_category_difficulty: Dict[Tuple[str, Optional[str]], List[int]] = {}
+        by_muscle_group: Dict[str, List[int]] = {}
+        by_category_muscle_difficulty: Dict[Tuple[str, str, str], List[int]] = {}
+        by_equipment: Dict[Optional[str], List[int]] = {}
+        for exercise in self.exercises:
+            by_category_difficulty.setdefault((exercise.category, exercise.difficulty_level), []).append(exercise.id)
+            by_category_difficulty.setdefault((exercise.category, None), []).append(exercise.id)
+            for muscle in exercise.muscle_groups:
+                by_muscle_group.setdefault(muscle, []).append(exercise.id)
+                key = (exercise.category, muscle, exercise.difficulty_level)
+                by_category_muscle_difficulty.setdefault(key, []).append(exercise.id)
+            # 장비가 필요 없는 운동은 None 에
+            for equipment in exercise.equipment or (None,):
+                by_equipment.setdefault(equipment, []).append(exercise.id)
+
+        self._by_category_difficulty = {key: tuple(ids) for key, ids in by_category_difficulty.items()}
+        self._by_muscle_group = {key: tuple(ids) for key, ids in by_muscle_group.items()}
+        self._by_category_muscle_difficulty = {key: tuple(ids) for key, ids in by_category_muscle_difficulty.items()}
+        self._by_equipment = {key: tuple(ids) for key, ids in by_equipment.items()}
+        # 이름 목록도 미리 만들어 루틴 생성 시 ID -> 이름 변환을 하지 않음
+        self._names_by_category_difficulty = {
+            key: tuple(self.exercises[i].name for i in ids)
+            for key, ids in self._by_category_difficulty.items()
+        }
+        # (분류, 근육 묶음 이름, 최고 난이도) -> 운동 이름
+        self._names_by_muscle_set = {
+            (category, set_name, level): self.names_by_muscle_groups(category, muscle_groups, level)
+            for category in CATEGORIES
+            for set_name, muscle_groups in MUSCLE_GROUP_SETS.items()
+            for level in DIFFICULTY_LEVELS
+        }
+
+    def __len__(self):
+        return len(self.exercises)
+
+    @classmethod
+    def default(cls) -> "ExerciseCatalog":
+        return cls(DEFAULT_EXERCISES)
+
+    @classmethod
+    def from_json(cls, path: str) -> "ExerciseCatalog":
+        """exercises 테이블 행 배열(JSON) 스냅샷으로 생성"""
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_csv(cls, path: str) -> "ExerciseCatalog":
+        """exercises 테이블 CSV 내보내기 스냅샷으로 생성"""
+        with open(path, encoding='utf-8', newline='') as f:
+            return cls(csv.DictReader(f))
+
+    @classmethod
+    def from_file(cls, path: str) -> "ExerciseCatalog":
+        """확장자(.json / .csv)에 따라 스냅샷 로드"""
+        if path.lower().endswith('.csv'):
+            return cls.from_csv(path)
+        return cls.from_json(path)
+
+    def get(self, exercise_id: int) -> Exercise:
+        return self.exercises[exercise_id]
+
+    def candidates(self, category: str, difficulty: Optional[str] = None) -> Tuple[int, ...]:
+        """분류 / 난이도별 운동 ID (difficulty=None 이면 분류 전체)"""
+        return self._by_category_difficulty.get((category, difficulty), ())
+
+    def candidate_names(self, category: str, difficulty: Optional[str] = None) -> Tuple[str, ...]:
+        """분류 / 난이도별 운동 이름 (해당 난이도가 없으면 분류 전체)"""
+        names = self._names_by_category_difficulty.get((category, difficulty))
+        if not names and difficulty is not None:
+            names = self._names_by_category_difficulty.get((category, None))
+        return names or ()
+
+    def by_muscle_group(self, muscle_group: str) -> Tuple[int, ...]:
+        return self._by_muscle_group.get(muscle_group, ())
+
+    def by_equipment(self, equipment: Optional[str]) -> Tuple[int, ...]:
+        """equipment 를 쓰는 운동 ID (None 이면 장비가 필요 없는 운동)"""
+        return self._by_equipment.get(equipment, ())
+
+    def names_for_equipment(self, available_equipment: Iterable[str]) -> FrozenSet[str]:
+        """가진 장비만으로 할 수 있는 운동 이름 (장비가 필요 없는 운동 포함)"""
+        available = frozenset(available_equipment)
+        ids = set(self.by_equipment(None))
+        for equipment in available:
+            ids.update(i for i in self.by_equipment(equipment) if available.issuperset(self.exercises[i].equipment))
+        return frozenset(self.exercises[i].name for i in ids)
+
+    def names_by_muscle_set(self, category: str, set_name: str, max_difficulty: str) -> Tuple[str, ...]:
+        """MUSCLE_GROUP_SETS 의 근육 묶음을 쓰고 난이도가 max_difficulty 이하인 운동 이름 (미리 계산한 값)"""
+        return self._names_by_muscle_set.get((category, set_name, max_difficulty), ())
+
+    def names_by_muscle_groups(self, category: str, muscle_groups: Tuple[str, ...],
+                               max_difficulty: str) -> Tuple[str, ...]:
+        """muscle_groups 중 하나라도 쓰고 난이도가 max_difficulty 이하인 운동 이름 (카탈로그 순서, 매번 계산)"""
+        levels = DIFFICULTY_LEVELS[:DIFFICULTY_LEVELS.index(max_difficulty) + 1]
+        ids = sorted({i for muscle in muscle_groups for level in levels
+                      for i in self._by_category_muscle_difficulty.get((category, muscle, level), ())})
+        return tuple(dict.fromkeys(self.exercises[i].name for i in ids))
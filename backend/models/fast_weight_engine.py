@@ -0,0 +1,302 @@
+# 체중 예측 NumPy 고속 엔진
+#
+# WeightPredictionModel 과 동일한 모델(경과일수, 3일/7일 이동평균 -> 선형회귀)을
+# pandas DataFrame / sklearn 없이 NumPy 배열 연산만으로 계산합니다.
+#
+# 허용 오차: StandardScaler + LinearRegression 경로와 비교해 반올림 전 예측값의 상대 오차는
+# 1e-9 이하이며, 0.1kg 단위로 반올림한 결과는 (x.x5 경계의 동률을 제외하면) 동일합니다.
+# 추세가 발산하는 시계열의 장기 예측에서는 절대값이 커지므로 상대 오차로 비교합니다.
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+import numpy as np
+
+FEATURE_NAMES = ('days_since_start', 'weight_ma_3', 'weight_ma_7')
+ISO_DATE_LENGTH = 10  # YYYY-MM-DD
+
+
+class WeightFeatures(NamedTuple):
+    """날짜순으로 정렬된 특성 배열"""
+    base_date: np.datetime64  # 첫 기록 날짜
+    days_since_start: np.ndarray  # float64
+    weight: np.ndarray
+    weight_ma_3: np.ndarray
+    weight_ma_7: np.ndarray
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """(n, 3) 특성 행렬"""
+        return np.column_stack((self.days_since_start, self.weight_ma_3, self.weight_ma_7))
+
+
+class LinearFit(NamedTuple):
+    """정규화 계수를 원래 단위로 접어 넣은 선형회귀 결과"""
+    coef: np.ndarray  # 원 단위 특성에 대한 계수 (3,)
+    intercept: float
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return X @ self.coef + self.intercept
+
+
+def parse_dates(dates: Sequence[str]) -> np.ndarray:
+    """YYYY-MM-DD 문자열을 datetime64[D] 배열로 일괄 변환 (다른 형식이면 ValueError)"""
+    if any(len(d) != ISO_DATE_LENGTH for d in dates):
+        raise ValueError("YYYY-MM-DD 형식이 아닌 날짜가 포함되어 있습니다")
+    return np.array(dates, dtype='datetime64[D]')
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """누적합 기반 이동평균 (pandas rolling(window, min_periods=1).mean() 과 동일)"""
+    csum = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+    idx = np.arange(1, len(values) + 1)
+    start = np.maximum(idx - window, 0)
+    return (csum[idx] - csum[start]) / (idx - start)
+
+
+def build_features(dates: np.ndarray, weights: np.ndarray) -> WeightFeatures:
+    """datetime64[D] 날짜와 체중 배열로 학습 특성 생성"""
+    # pandas sort_values 와 같은 기본 정렬(quicksort)로 중복 날짜 순서를 맞춤
+    order = np.argsort(dates)
+    dates = dates[order]
+    weight = np.asarray(weights, dtype=np.float64)[order]
+
+    base_date = dates[0]
+    days_since_start = (dates - base_date).astype(np.int64).astype(np.float64)
+
+    return WeightFeatures(
+        base_date=base_date,
+        days_since_start=days_since_start,
+        weight=weight,
+        weight_ma_3=rolling_mean(weight, 3),
+        weight_ma_7=rolling_mean(weight, 7),
+    )
+
+
+def features_from_records(weight_data: List[Dict]) -> WeightFeatures:
+    """{'date', 'weight'} 딕셔너리 목록을 특성 배열로 변환"""
+    dates = parse_dates([record['date'] for record in weight_data])
+    weights = np.fromiter((record['weight'] for record in weight_data),
+                          dtype=np.float64, count=len(weight_data))
+    return build_features(dates, weights)
+
+
+def _scale(X: np.ndarray, mean: np.ndarray) -> np.ndarray:
+    """StandardScaler 와 같은 규칙의 표준편차 (0에 가까우면 1)"""
+    scale = np.sqrt(((X - mean) ** 2).mean(axis=0))
+    eps = np.finfo(np.float64).eps
+    scale[scale < 10 * eps * np.maximum(np.abs(mean), 1.0)] = 1.0
+    return scale
+
+
+def fit_linear(X: np.ndarray, y: np.ndarray) -> LinearFit:
+    """정규화 + 최소제곱 해를 닫힌 형태로 계산 (LinearRegression 과 동일한 최소노름 해)"""
+    mean = X.mean(axis=0)
+    scale = _scale(X, mean)
+    X_scaled = (X - mean) / scale
+
+    y_mean = y.mean()
+    coef_scaled = np.linalg.lstsq(X_scaled, y - y_mean, rcond=None)[0]
+
+    coef = coef_scaled / scale
+    intercept = float(y_mean - mean @ coef)
+    return LinearFit(coef=coef, intercept=intercept)
+
+
+def fit_from_moments(mean: np.ndarray, comoment: np.ndarray, count: int) -> LinearFit:
+    """[특성 3개, 체중] 의 평균 (4,) 과 편차곱 합 (4, 4) 으로 회귀 계수 계산
+
+    정규화 특성의 정규방정식을 유사역행렬로 풀어 fit_linear 의 최소노름 해와 같은 결과를 냅니다.
+    """
+    cov = comoment / count
+    x_mean = mean[:3]
+    scale = np.sqrt(np.maximum(np.diag(cov)[:3], 0.0))
+    eps = np.finfo(np.float64).eps
+    scale[scale < 10 * eps * np.maximum(np.abs(x_mean), 1.0)] = 1.0
+
+    gram = cov[:3, :3] / np.outer(scale, scale)
+    moment = cov[:3, 3] / scale
+    coef = (np.linalg.pinv(gram) @ moment) / scale
+    intercept = float(mean[3] - x_mean @ coef)
+    return LinearFit(coef=coef, intercept=intercept)
+
+
+def fit_features(features: WeightFeatures) -> LinearFit:
+    """특성 배열로 체중 선형회귀 학습"""
+    return fit_linear(features.matrix, features.weight)
+
+
+def _transition_matrix(coef: np.ndarray, intercept: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """예측 상태 [ma_3, ma_7, 경과일수, 1] 의 1일 전이 행렬 (..., 4, 4) 과 예측 벡터 (..., 4)"""
+    coef = np.asarray(coef, dtype=np.float64)
+    intercept = np.asarray(intercept, dtype=np.float64)
+    readout = np.stack((coef[..., 1], coef[..., 2], coef[..., 0], intercept), axis=-1)
+
+    transition = np.zeros(readout.shape[:-1] + (4, 4))
+    # ma_3 <- (ma_3 * 2 + 예측값) / 3, ma_7 <- (ma_7 * 6 + 예측값) / 7
+    transition[..., 0, :] = readout / 3
+    transition[..., 0, 0] += 2 / 3
+    transition[..., 1, :] = readout / 7
+    transition[..., 1, 1] += 6 / 7
+    transition[..., 2, 2:] = 1.0  # 경과일수 + 1
+    transition[..., 3, 3] = 1.0
+    return transition, readout
+
+
+def _forecast_states(transition: np.ndarray, readout: np.ndarray,
+                     initial: np.ndarray, days_ahead: int) -> np.ndarray:
+    """(N, 4) 초기 상태에서 (N, days_ahead) 예측값을 배가(doubling) 방식으로 계산"""
+    states = np.empty(initial.shape[:-1] + (days_ahead, 4))
+    states[..., 0, :] = initial
+
+    filled = 1
+    power = transition  # transition ** filled
+    while filled < days_ahead:
+        step = min(filled, days_ahead - filled)
+        states[..., filled:filled + step, :] = states[..., :step, :] @ np.swapaxes(power, -1, -2)
+        filled += step
+        power = power @ power
+
+    return (states @ readout[..., None])[..., 0]
+
+
+def forecast_weights(fit: LinearFit, features: WeightFeatures, days_ahead: int) -> np.ndarray:
+    """향후 days_ahead 일의 체중을 한 번에 계산 (반올림 전 값)
+
+    이동평균 갱신이 선형이므로 상태를 전이 행렬의 거듭제곱으로 펼치고,
+    거듭제곱은 배가(doubling) 방식으로 log2(days_ahead) 번의 행렬 곱만 수행합니다.
+    """
+    if days_ahead <= 0:
+        return np.empty(0)
+
+    return forecast_from_state(fit, features.weight_ma_3[-1], features.weight_ma_7[-1],
+                               features.days_since_start[-1], days_ahead)
+
+
+def forecast_from_state(fit: LinearFit, ma_3: float, ma_7: float,
+                        last_days: float, days_ahead: int) -> np.ndarray:
+    """마지막 기록의 이동평균 / 경과일수만으로 향후 체중 계산 (이력 재처리 없음)"""
+    if days_ahead <= 0:
+        return np.empty(0)
+
+    transition, readout = _transition_matrix(fit.coef, fit.intercept)
+    initial = np.array([ma_3, ma_7, last_days + 1, 1.0])
+    return _forecast_states(transition, readout, initial, days_ahead)
+
+
+def impulse_response(fit: LinearFit, days_ahead: int) -> np.ndarray:
+    """i 일째 실제 체중이 예측보다 1 높을 때 i + j 일째 예측값의 변화량 h[j] (h[0] = 1)
+
+    실제 체중은 이동평균 상태에 (1/3, 1/7) 로만 들어가므로 예측 경로는 잡음에 대해 선형이고,
+    잡음 경로 e 의 영향은 h 와의 합성곱입니다.
+    """
+    response = np.ones(max(days_ahead, 0))
+    if days_ahead > 1:
+        transition, readout = _transition_matrix(fit.coef, fit.intercept)
+        shock = np.array([1 / 3, 1 / 7, 0.0, 0.0])
+        response[1:] = _forecast_states(transition, readout, shock, days_ahead - 1)
+    return response
+
+
+def forecast_dates(features: WeightFeatures, days_ahead: int) -> np.ndarray:
+    """마지막 기록 다음 날부터 days_ahead 일의 datetime64[D] 배열"""
+    last_date = features.base_date + int(features.days_since_start[-1])
+    return last_date + np.arange(1, days_ahead + 1)
+
+
+class BatchFeatures(NamedTuple):
+    """여러 사용자의 특성을 (N, L) 크기로 뒤쪽을 채워(padding) 쌓은 배열"""
+    base_dates: np.ndarray  # (N,) datetime64[D]
+    lengths: np.ndarray  # (N,) 사용자별 실제 기록 수
+    days_since_start: np.ndarray  # (N, L)
+    weight: np.ndarray
+    weight_ma_3: np.ndarray
+    weight_ma_7: np.ndarray
+
+    @property
+    def mask(self) -> np.ndarray:
+        """(N, L) 실제 기록 위치"""
+        return np.arange(self.weight.shape[1]) < self.lengths[:, None]
+
+    def last(self, values: np.ndarray) -> np.ndarray:
+        """사용자별 마지막 기록 값 (N,)"""
+        return values[np.arange(len(self.lengths)), self.lengths - 1]
+
+
+def _batch_rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """행별 누적합 이동평균 (뒤쪽 padding 은 앞 위치 값에 영향을 주지 않음)"""
+    csum = np.concatenate((np.zeros((values.shape[0], 1)), np.cumsum(values, axis=1)), axis=1)
+    idx = np.arange(1, values.shape[1] + 1)
+    start = np.maximum(idx - window, 0)
+    return (csum[:, idx] - csum[:, start]) / (idx - start)
+
+
+def build_batch_features(dates_list: Sequence[np.ndarray],
+                         weights_list: Sequence[np.ndarray]) -> BatchFeatures:
+    """사용자별 datetime64[D] 날짜 / 체중 배열을 쌓아 특성 생성"""
+    lengths = np.array([len(dates) for dates in dates_list], dtype=np.int64)
+    n_users, max_len = len(lengths), int(lengths.max())
+
+    # 중복 날짜 순서가 build_features 와 같도록 사용자별로 같은 정렬을 적용
+    days = np.zeros((n_users, max_len), dtype=np.int64)
+    weight = np.zeros((n_users, max_len))
+    for i, (dates, weights) in enumerate(zip(dates_list, weights_list)):
+        order = np.argsort(dates)
+        days[i, :lengths[i]] = dates[order].astype(np.int64)
+        weight[i, :lengths[i]] = np.asarray(weights, dtype=np.float64)[order]
+
+    mask = np.arange(max_len) < lengths[:, None]
+    base_days = days[:, 0]
+    days_since_start = np.where(mask, days - base_days[:, None], 0).astype(np.float64)
+
+    return BatchFeatures(
+        base_dates=base_days.astype('datetime64[D]'),
+        lengths=lengths,
+        days_since_start=days_since_start,
+        weight=weight,
+        weight_ma_3=_batch_rolling_mean(weight, 3),
+        weight_ma_7=_batch_rolling_mean(weight, 7),
+    )
+
+
+def fit_batch(batch: BatchFeatures) -> LinearFit:
+    """N 개의 독립 회귀를 한 번에 학습 (coef (N, 3), intercept (N,))
+
+    사용자별로 정규화한 특성의 3x3 정규방정식을 쌓아 유사역행렬로 풀며,
+    이는 fit_linear 의 최소노름 최소제곱 해와 같습니다.
+    """
+    mask = batch.mask
+    count = batch.lengths[:, None].astype(np.float64)
+    X = np.stack((batch.days_since_start, batch.weight_ma_3, batch.weight_ma_7), axis=-1)
+    X = X * mask[..., None]
+    y = batch.weight * mask
+
+    mean = X.sum(axis=1) / count
+    centered = (X - mean[:, None, :]) * mask[..., None]
+    scale = np.sqrt((centered ** 2).sum(axis=1) / count)
+    eps = np.finfo(np.float64).eps
+    scale[scale < 10 * eps * np.maximum(np.abs(mean), 1.0)] = 1.0
+    X_scaled = centered / scale[:, None, :]
+
+    y_mean = y.sum(axis=1) / count[:, 0]
+    y_centered = (y - y_mean[:, None]) * mask
+
+    gram = np.einsum('nli,nlj->nij', X_scaled, X_scaled)
+    moment = np.einsum('nli,nl->ni', X_scaled, y_centered)
+    coef_scaled = np.einsum('nij,nj->ni', np.linalg.pinv(gram), moment)
+
+    coef = coef_scaled / scale
+    intercept = y_mean - np.einsum('ni,ni->n', mean, coef)
+    return LinearFit(coef=coef, intercept=intercept)
+
+
+def forecast_weights_batch(fit: LinearFit, batch: BatchFeatures, days_ahead: int) -> np.ndarray:
+    """N 명의 향후 days_ahead 일 체중을 (N, days_ahead) 배열로 한 번에 계산"""
+    if days_ahead <= 0:
+        return np.empty((len(batch.lengths), 0))
+
+    transition, readout = _transition_matrix(fit.coef, fit.intercept)
+    initial = np.stack((
+        batch.last(batch.weight_ma_3),
+        batch.last(batch.weight_ma_7),
+        batch.last(batch.days_since_start) + 1,
+        np.ones(len(batch.lengths)),
+    ), axis=-1)
+    return _forecast_states(transition, readout, initial, days_ahead)
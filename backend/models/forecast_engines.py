@@ -0,0 +1,157 @@
+# 체중 예측 엔진 레지스트리
+#
+# 모든 엔진은 날짜(datetime64[D]) / 값 배열을 받아 점 예측과 잔차 부트스트랩 예측 구간을 반환합니다.
+# - linear: 기존 모델 (경과일수, 3일/7일 이동평균 -> 선형회귀)
+# - holt:   지수가중 선형 추세 (Brown 선형 지수평활과 같은 할인 최소제곱, 날짜 간격을 그대로 반영)
+# - huber:  최근 구간의 Huber 로버스트 선형 추세 (이상치 영향 제한)
+#
+# 부트스트랩은 엔진을 반복 학습하지 않습니다. 예측 경로가 잔차에 대해 선형이므로
+# 잔차를 한 번에 (n_boot × ...) 행렬로 뽑고, 행렬 곱 / 합성곱 한 번으로 (n_boot × horizon) 경로를 만듭니다.
+from typing import Callable, Dict, NamedTuple
+
+import numpy as np
+
+from models import fast_weight_engine
+
+DEFAULT_LEVEL = 0.8  # 예측 구간 포함 확률
+DEFAULT_N_BOOT = 500
+FAST_ENGINE = "linear"  # 부하 시 대체 엔진
+MIN_RECORDS = 5
+
+HOLT_HALF_LIFE_DAYS = 14.0
+HOLT_MIN_WEIGHT = 1e-4  # 이보다 가중치가 작은 오래된 기록은 계산에서 제외
+HUBER_WINDOW_DAYS = 90
+HUBER_C = 1.345
+HUBER_ITERATIONS = 20
+
+class Forecast(NamedTuple):
+    point: np.ndarray  # (horizon,)
+    lower: np.ndarray
+    upper: np.ndarray
+
+class ForecastEngine(NamedTuple):
+    name: str
+    forecast: Callable[..., Forecast]  # (dates, values, horizon, level, n_boot, rng) -> Forecast
+    description: str
+
+ENGINES: Dict[str, ForecastEngine] = {}
+
+def register_engine(name: str, description: str):
+    """예측 함수를 이름으로 레지스트리에 등록하는 데코레이터"""
+    def decorator(fn):
+        ENGINES[name] = ForecastEngine(name, fn, description)
+        return fn
+    return decorator
+
+def get_engine(name: str) -> ForecastEngine:
+    engine = ENGINES.get(name)
+    if engine is None:
+        raise ValueError(f"지원하지 않는 예측 엔진입니다: {name} (사용 가능: {', '.join(ENGINES)})")
+    return engine
+
+def _interval(point: np.ndarray, deviations: np.ndarray, level: float) -> Forecast:
+    """(n_boot, horizon) 경로 편차의 분위수로 예측 구간 계산"""
+    lower, upper = np.quantile(point + deviations, [(1 - level) / 2, (1 + level) / 2], axis=0)
+    return Forecast(point, lower, upper)
+
+def _causal_convolve(noise: np.ndarray, response: np.ndarray) -> np.ndarray:
+    """행마다 out[t] = sum_{k<=t} response[t - k] * noise[k] (FFT, horizon × horizon 행렬 없이 O(n_boot × horizon) 메모리)"""
+    horizon = noise.shape[1]
+    size = 1 << (2 * horizon - 1).bit_length()  # 순환 합성곱이 겹치지 않는 2의 거듭제곱 길이
+    spectrum = np.fft.rfft(noise, size, axis=1) * np.fft.rfft(response, size)
+    return np.fft.irfft(spectrum, size, axis=1)[:, :horizon]
+
+@register_engine("linear", "경과일수와 3일/7일 이동평균 선형회귀 (기존 모델)")
+def linear_forecast(dates, values, horizon, level, n_boot, rng) -> Forecast:
+    features = fast_weight_engine.build_features(dates, values)
+    fit = fast_weight_engine.fit_features(features)
+    point = fast_weight_engine.forecast_weights(fit, features, horizon)
+
+    # 매일 실제 값 = 예측 + 잔차 로 두고, 잔차가 이동평균을 통해 이후 예측에 전파되는 효과를 합성곱으로 반영
+    residuals = features.weight - fit.predict(features.matrix)
+    noise = rng.choice(residuals, size=(n_boot, horizon))
+    deviations = _causal_convolve(noise, fast_weight_engine.impulse_response(fit, horizon))
+    return _interval(point, deviations, level)
+
+def _trend_forecast(days, values, obs_weights, horizon, level, n_boot, rng, residual_clip=None) -> Forecast:
+    """가중 최소제곱 선형 추세 예측과 부트스트랩 구간
+
+    추세 계수는 관측값에 대해 선형(beta = P @ y)이므로, 잔차를 다시 뽑은 y* 에 대한 재학습은
+    P 를 곱하는 것과 같습니다. 계수 불확실성과 앞으로의 관측 잡음을 함께 반영합니다.
+    """
+    design = np.column_stack((np.ones_like(days), days))
+    weighted = design * obs_weights[:, None]
+    smoother = np.linalg.pinv(design.T @ weighted) @ weighted.T  # P: (2, n)
+    beta = smoother @ values
+    residuals = values - design @ beta
+    if residual_clip is not None:
+        residuals = np.clip(residuals, -residual_clip, residual_clip)
+    # 잔차도 관측 가중치에 비례해 뽑음 (오래되어 추세와 멀어진 기록의 잔차가 구간을 넓히지 않도록)
+    probabilities = obs_weights / obs_weights.sum()
+    residuals = residuals - probabilities @ residuals
+
+    steps = np.arange(1, horizon + 1, dtype=np.float64)
+    future = np.column_stack((np.ones_like(steps), steps))  # 마지막 기록 기준 경과일수
+    point = future @ beta
+
+    noise = rng.choice(residuals, size=(n_boot, len(values) + horizon), p=probabilities)
+    deviations = (noise[:, :len(values)] @ smoother.T) @ future.T + noise[:, len(values):]
+    return _interval(point, deviations, level)
+
+def _days_before_last(dates) -> np.ndarray:
+    """마지막 기록 기준 경과일수 (0 이하) 를 날짜순으로"""
+    days = np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+    return (days - days.max()).astype(np.float64)
+
+@register_engine("holt", f"지수가중 선형 추세 (반감기 {HOLT_HALF_LIFE_DAYS:g}일)")
+def holt_forecast(dates, values, horizon, level, n_boot, rng) -> Forecast:
+    days = _days_before_last(dates)
+    obs_weights = 0.5 ** (-days / HOLT_HALF_LIFE_DAYS)
+    recent = obs_weights >= HOLT_MIN_WEIGHT
+    recent[-MIN_RECORDS:] = True
+    return _trend_forecast(days[recent], np.asarray(values, dtype=np.float64)[recent],
+                           obs_weights[recent], horizon, level, n_boot, rng)
+
+@register_engine("huber", f"최근 {HUBER_WINDOW_DAYS}일 Huber 로버스트 선형 추세")
+def huber_forecast(dates, values, horizon, level, n_boot, rng) -> Forecast:
+    days = _days_before_last(dates)
+    recent = days >= -HUBER_WINDOW_DAYS
+    recent[-MIN_RECORDS:] = True
+    days, values = days[recent], np.asarray(values, dtype=np.float64)[recent]
+    design = np.column_stack((np.ones_like(days), days))
+
+    # IRLS: 잔차가 c * scale 을 넘는 기록은 가중치를 줄여 다시 적합
+    obs_weights = np.ones_like(values)
+    scale = 0.0
+    for _ in range(HUBER_ITERATIONS):
+        weighted = design * obs_weights[:, None]
+        beta = np.linalg.pinv(design.T @ weighted) @ (weighted.T @ values)
+        residuals = values - design @ beta
+        scale = np.median(np.abs(residuals - np.median(residuals))) / 0.6745
+        if scale <= 0:
+            break
+        new_weights = np.minimum(1.0, HUBER_C * scale / np.maximum(np.abs(residuals), 1e-12))
+        if np.allclose(new_weights, obs_weights, atol=1e-6):
+            break
+        obs_weights = new_weights
+
+    # 최종 가중치를 고정한 선형 평활기로 부트스트랩 (이상치 잔차는 c * scale 로 잘라서 사용)
+    clip = HUBER_C * scale if scale > 0 else None
+    return _trend_forecast(days, values, obs_weights, horizon, level, n_boot, rng, residual_clip=clip)
+
+def forecast(dates, values, horizon: int, engine: str = FAST_ENGINE, level: float = DEFAULT_LEVEL,
+             n_boot: int = DEFAULT_N_BOOT, seed: int = 0) -> Forecast:
+    """등록된 엔진으로 예측 (같은 입력이면 같은 구간이 나오도록 난수 seed 고정)"""
+    selected = get_engine(engine)
+    if not 0 < level < 1:
+        raise ValueError("예측 구간 확률은 0 과 1 사이여야 합니다")
+    if len(values) < MIN_RECORDS:
+        raise ValueError(f"최소 {MIN_RECORDS}개의 데이터가 필요합니다")
+    if horizon <= 0:
+        empty = np.empty(0)
+        return Forecast(empty, empty, empty)
+
+    order = np.argsort(np.asarray(dates, dtype='datetime64[D]'), kind='stable')
+    dates = np.asarray(dates, dtype='datetime64[D]')[order]
+    values = np.asarray(values, dtype=np.float64)[order]
+    return selected.forecast(dates, values, horizon, level, n_boot, np.random.default_rng(seed))
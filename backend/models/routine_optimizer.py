@@ -0,0 +1,182 @@
+# 주간 루틴 최적화 (운동 요일 / 분할 / 운동 종목 선택)
+#
+# 요일 조합(최대 C(7, k) = 35개)을 모두 점수화해 가장 좋은 조합을 고릅니다.
+# - 회복: 같은 근육을 쓰는 세션 사이 간격이 짧을수록 벌점 (요일 쌍 벌점표를 미리 계산, 일요일 -> 월요일도 1일 간격)
+# - 선호 요일: 선호 요일을 빠뜨리거나 (선호 요일이 더 많으면) 다른 요일을 고르면 큰 벌점
+# - 근육 증가 목표는 요일 조합마다 상체 / 하체 / 전신 분할을 분기 한정(branch and bound)으로 찾고
+#   (운동량 균형 - 회복 벌점) 결과를 요일 조합 bitmask 별 표로 미리 계산합니다.
+# 세션 시간은 최대 잉여 방식으로 나눠 운동별 시간의 합이 time_per_session 과 정확히 같습니다.
+import random
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DAYS = ('월요일', '화요일', '수요일', '목요일', '금요일', '토요일', '일요일')
+DAY_INDEX = {day: index for index, day in enumerate(DAYS)}
+
+GAP_PENALTY = {1: 10.0, 2: 3.0}  # 같은 근육 세션 간격(일)별 벌점, 3일(72시간) 이상은 0
+PREFERENCE_WEIGHT = 100.0  # 선호 요일을 어길 때마다 (회복 벌점보다 항상 우선)
+SCORE_EPSILON = 1e-9
+
+# 근육 증가 분할: MUSCLE_SPLIT 번호와 같은 순서 (0 상체, 1 하체, 2 전신)
+UPPER, LOWER, FULL = 0, 1, 2
+SPLIT_OVERLAP = (  # 두 분할 세션이 같은 근육을 쓰는 정도
+    (1.0, 0.0, 0.5),
+    (0.0, 1.0, 0.5),
+    (0.5, 0.5, 1.0),
+)
+SPLIT_VOLUME = ((1.0, 0.0), (0.0, 1.0), (0.6, 0.6))  # 분할별 (상체, 하체) 운동량
+VOLUME_WEIGHT = 2.0  # 덜 훈련한 부위의 주간 운동량 보상
+IMBALANCE_WEIGHT = 1.0  # 상체 / 하체 운동량 차이 벌점
+MAX_DAY_VOLUME = 2 * SPLIT_VOLUME[FULL][0]  # 하루에 더할 수 있는 (상체 + 하체) 운동량 최대값
+
+def _gap(first: int, second: int) -> int:
+    """두 요일 사이 간격 (주 단위로 반복되므로 일요일 -> 월요일은 1일)"""
+    distance = abs(first - second)
+    return min(distance, 7 - distance)
+
+PAIR_PENALTY = tuple(
+    tuple(GAP_PENALTY.get(_gap(first, second), 0.0) if first != second else 0.0 for second in range(7))
+    for first in range(7)
+)
+MASK_DAYS = tuple(tuple(day for day in range(7) if mask >> day & 1) for mask in range(128))
+MASKS_BY_SIZE = tuple(
+    tuple(sum(1 << day for day in days) for days in combinations(range(7), size)) for size in range(8)
+)
+# 모든 요일이 같은 전신 세션일 때의 회복 벌점 (일반 목표)
+RECOVERY_BY_MASK = tuple(
+    sum(PAIR_PENALTY[first][second] for first, second in combinations(days, 2)) for days in MASK_DAYS
+)
+
+def _split_score(days: Sequence[int], splits: Sequence[int]) -> float:
+    """분할 배정 점수 = 회복 벌점 - 덜 훈련한 부위 운동량 보상 + 상체 / 하체 차이 벌점"""
+    recovery = sum(PAIR_PENALTY[days[i]][days[j]] * SPLIT_OVERLAP[splits[i]][splits[j]]
+                   for i, j in combinations(range(len(days)), 2))
+    upper = sum(SPLIT_VOLUME[split][0] for split in splits)
+    lower = sum(SPLIT_VOLUME[split][1] for split in splits)
+    return recovery - VOLUME_WEIGHT * min(upper, lower) + IMBALANCE_WEIGHT * abs(upper - lower)
+
+def _rotate(mask: int, shift: int) -> int:
+    """요일을 shift 일 앞당긴 bitmask"""
+    return ((mask >> shift) | (mask << (7 - shift))) & 0x7F
+
+# 벌점표가 요일 회전에 대해 같으므로, 회전하면 같아지는 조합은 대표 조합 하나만 탐색
+CANONICAL_ROTATION = tuple(min((_rotate(mask, shift), shift) for shift in range(7)) for mask in range(128))
+
+@lru_cache(maxsize=None)
+def best_split_assignment(mask: int) -> Tuple[float, Tuple[int, ...]]:
+    """요일 조합의 가장 좋은 상체 / 하체 / 전신 분할과 점수 (작을수록 좋음)"""
+    canonical, shift = CANONICAL_ROTATION[mask]
+    score, splits = _search_splits(canonical)
+    split_by_day = dict(zip(MASK_DAYS[canonical], splits))
+    return score, tuple(split_by_day[(day - shift) % 7] for day in MASK_DAYS[mask])
+
+@lru_cache(maxsize=None)
+def _search_splits(mask: int) -> Tuple[float, Tuple[int, ...]]:
+    """분기 한정 탐색
+
+    pending[i][split] 은 아직 배정하지 않은 i 번째 요일을 split 으로 배정할 때 이미 배정한 요일들과의
+    회복 벌점입니다. 하한 = 지금까지의 벌점 + 남은 요일별 최소 pending 벌점 - 남은 요일이 모두 최선의
+    운동량을 낸다고 가정한 보상이며, 하한이 지금까지의 최고 점수 이상이면 그 가지를 더 탐색하지 않습니다.
+    """
+    days = MASK_DAYS[mask]
+    count = len(days)
+    splits = [0] * count
+    # 상체 / 하체를 번갈아 배정(홀수면 마지막은 전신)한 분할을 초기 해로 두어 처음부터 가지치기
+    initial = tuple(FULL if count % 2 and i == count - 1 else i % 2 for i in range(count))
+    best = [_split_score(days, initial), initial]
+
+    def search(position, recovery, upper, lower, pending):
+        remaining = count - position
+        if remaining == 0:
+            score = recovery - VOLUME_WEIGHT * min(upper, lower) + IMBALANCE_WEIGHT * abs(upper - lower)
+            if score < best[0] - SCORE_EPSILON:
+                best[0], best[1] = score, tuple(splits)
+            return
+        reachable = min(min(upper, lower) + remaining, (upper + lower + MAX_DAY_VOLUME * remaining) / 2)
+        bound = recovery + sum(min(costs) for costs in pending[position:]) - VOLUME_WEIGHT * reachable
+        if bound >= best[0] - SCORE_EPSILON:
+            return
+        penalties = PAIR_PENALTY[days[position]]
+        costs = pending[position]
+        for split in sorted((UPPER, LOWER, FULL), key=costs.__getitem__):
+            overlap = SPLIT_OVERLAP[split]
+            splits[position] = split
+            volume = SPLIT_VOLUME[split]
+            later = [tuple(cost + penalties[days[i]] * overlap[other] for other, cost in enumerate(pending[i]))
+                     for i in range(position + 1, count)]
+            search(position + 1, recovery + costs[split], upper + volume[0], lower + volume[1],
+                   pending[:position + 1] + later)
+
+    search(0, 0.0, 0.0, 0.0, [(0.0, 0.0, 0.0)] * count)
+    return best[0], best[1]
+
+# 요일 조합 128개의 분할 / 점수를 import 시 미리 계산 (대표 조합 20개 탐색, 수 ms) — 요청마다 탐색하지 않음
+SPLIT_TABLE = tuple(best_split_assignment(mask) for mask in range(128))
+
+def choose_workout_days(available_days: int, preferred_days: Sequence[str], split: bool,
+                        rng: random.Random) -> Tuple[Tuple[int, ...], Optional[Tuple[int, ...]]]:
+    """운동 요일 번호(0 = 월요일)와 요일별 분할 번호 (split=False 이면 None)
+
+    점수가 같은 조합이 여러 개면 rng 로 고릅니다 (seed 가 같으면 같은 결과).
+    """
+    count = max(0, min(int(available_days), 7))
+    preferred_mask = 0
+    for day in preferred_days:
+        if day in DAY_INDEX:
+            preferred_mask |= 1 << DAY_INDEX[day]
+    required = min(count, bin(preferred_mask).count("1"))
+
+    lowest_schedule_score = -VOLUME_WEIGHT * count if split else 0.0  # 회복 / 분할 점수의 하한
+    best_score = float("inf")
+    best_masks: List[int] = []
+    for mask in MASKS_BY_SIZE[count]:
+        score = PREFERENCE_WEIGHT * (required - bin(mask & preferred_mask).count("1"))
+        if score + lowest_schedule_score > best_score + SCORE_EPSILON:
+            continue  # 선호 요일 벌점만으로 이미 더 나쁨
+        score += SPLIT_TABLE[mask][0] if split else RECOVERY_BY_MASK[mask]
+        if score < best_score - SCORE_EPSILON:
+            best_score, best_masks = score, [mask]
+        elif score <= best_score + SCORE_EPSILON:
+            best_masks.append(mask)
+
+    mask = best_masks[0] if len(best_masks) == 1 else rng.choice(best_masks)
+    return MASK_DAYS[mask], (SPLIT_TABLE[mask][1] if split else None)
+
+def allocate_minutes(total: int, weights: Sequence[float]) -> List[int]:
+    """total 분을 비율대로 정수 분으로 나눔 (최대 잉여 방식, 합계가 정확히 total)"""
+    weight_sum = sum(weights)
+    if total <= 0 or weight_sum <= 0:
+        return [0] * len(weights)
+    raw = [total * weight / weight_sum for weight in weights]
+    minutes = [int(value) for value in raw]
+    by_remainder = sorted(range(len(weights)), key=lambda i: raw[i] - minutes[i], reverse=True)
+    for i in by_remainder[:total - sum(minutes)]:
+        minutes[i] += 1
+    return minutes
+
+def session_minutes(total: int, weights: Sequence[float], min_block: int) -> List[int]:
+    """종류별 시간 배분 (min_block 분보다 짧게 배정된 종류는 빼고 나머지에 다시 배분)"""
+    weights = list(weights)
+    while True:
+        minutes = allocate_minutes(total, weights)
+        short = [i for i, value in enumerate(minutes) if 0 < value < min_block]
+        if not short or sum(1 for weight in weights if weight > 0) <= 1:
+            return minutes
+        weights[min(short, key=lambda i: minutes[i])] = 0.0
+
+def select_exercises(candidates: Sequence[str], count: int, day: int, history: Dict[str, List[int]],
+                     rng: random.Random) -> List[str]:
+    """회복 벌점(같은 운동을 최근 요일에 했을수록 큼)이 작은 순으로 count 개 선택하고 history 에 기록"""
+    if count <= 0 or not candidates:
+        return []
+    penalties = PAIR_PENALTY[day]
+    scored = sorted(
+        candidates,
+        key=lambda name: (sum(penalties[used] for used in history.get(name, ())) + 0.1 * len(history.get(name, ())),
+                          rng.random()),
+    )
+    selected = scored[:count]
+    for name in selected:
+        history.setdefault(name, []).append(day)
+    return selected
@@ -1,34 +1,110 @@
 # 운동 루틴 추천 모델
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional
 import random
 
+from models import routine_optimizer
+from models.exercise_catalog import DIFFICULTY_LEVELS, ExerciseCatalog
+from utils.metrics import timed
+
+INTENSITY_LABELS = {
+    "beginner": "낮음",
+    "intermediate": "중간",
+    "advanced": "높음"
+}
+
+SETS_REPS_LABELS = {
+    "beginner": "2세트 x 8-12회",
+    "intermediate": "3세트 x 10-15회",
+    "advanced": "4세트 x 12-20회"
+}
+
+# 근육 증가를 위한 더 높은 세트/반복 수
+MUSCLE_GAIN_SETS_REPS = {
+    "beginner": "3세트 x 8-12회",
+    "intermediate": "4세트 x 8-12회",
+    "advanced": "4-5세트 x 6-10회"
+}
+
+# 세션 시간 배분
+MIN_BLOCK_MINUTES = 5  # 이보다 짧게 배정된 운동 종류는 빼고 다른 종류에 시간을 더함
+STRENGTH_SLOT_MINUTES = 15  # 근력 운동 1개당 시간
+MAX_STRENGTH_EXERCISES = 3
+MUSCLE_GAIN_SLOT_MINUTES = 12
+MIN_MUSCLE_GAIN_EXERCISES = 3
+
+# 근육 증가를 위한 운동 분할 (번호는 routine_optimizer 의 UPPER / LOWER / FULL)
+MUSCLE_SPLIT = {
+    0: {"focus": "상체", "exercises": ["팔굽혀펴기", "벤치프레스", "덤벨 컬", "숄더 프레스"]},
+    1: {"focus": "하체", "exercises": ["스쿼트", "런지", "데드리프트", "카프 레이즈"]},
+    2: {"focus": "전신", "exercises": ["데드리프트", "스쿼트", "풀업", "플랭크"]}
+}
+
+def _split_exercises_for_level(fitness_level: str, exercises: List[str]) -> tuple:
+    """수준별로 수행 가능한 분할 운동"""
+    if fitness_level == 'beginner':
+        return tuple(ex for ex in exercises if ex in ["팔굽혀펴기", "스쿼트", "런지", "플랭크"])
+    if fitness_level == 'intermediate':
+        return tuple(ex for ex in exercises if ex not in ["데드리프트", "벤치프레스"])
+    return tuple(exercises)
+
+# (수준, 분할 번호) -> 운동 목록을 미리 계산
+MUSCLE_SPLIT_BY_LEVEL = {
+    (level, split_index): _split_exercises_for_level(level, split["exercises"])
+    for level in ("beginner", "intermediate", "advanced")
+    for split_index, split in MUSCLE_SPLIT.items()
+}
+FULL_BODY_SPLIT = routine_optimizer.FULL
+
+# 분할별 카탈로그 근육 묶음 (exercise_catalog.MUSCLE_GROUP_SETS 의 이름)
+SPLIT_MUSCLE_SETS = {
+    routine_optimizer.UPPER: "upper",
+    routine_optimizer.LOWER: "lower",
+    routine_optimizer.FULL: "full",
+}
+
+GOAL_FOCUS = {
+    "weight_loss": {"cardio": 0.6, "strength": 0.3, "flexibility": 0.1},
+    "muscle_gain": {"cardio": 0.15, "strength": 0.75, "flexibility": 0.1},
+    "maintenance": {"cardio": 0.4, "strength": 0.4, "flexibility": 0.2},
+    "endurance": {"cardio": 0.7, "strength": 0.2, "flexibility": 0.1}
+}
+
+def validate_profile(user_profile: Dict):
+    """지원하지 않는 목표 / 수준이면 ValueError (API 에서 400 으로 응답)"""
+    goal = user_profile.get('goal', 'maintenance')
+    fitness_level = user_profile.get('fitness_level', 'beginner')
+    if goal not in GOAL_FOCUS:
+        raise ValueError(f"지원하지 않는 목표입니다: {goal} ({', '.join(GOAL_FOCUS)})")
+    if fitness_level not in DIFFICULTY_LEVELS:
+        raise ValueError(f"지원하지 않는 운동 수준입니다: {fitness_level} ({', '.join(DIFFICULTY_LEVELS)})")
+
+def muscle_gain_candidates(catalog: ExerciseCatalog, fitness_level: str, split_index: int) -> tuple:
+    """분할에 맞는 근력 운동 (카탈로그에 근육 부위 정보가 없으면 기본 분할 목록)"""
+    names = catalog.names_by_muscle_set('strength', SPLIT_MUSCLE_SETS[split_index], fitness_level)
+    return names or MUSCLE_SPLIT_BY_LEVEL[(fitness_level, split_index)]
+
+@lru_cache(maxsize=None)
+def _minutes_label(minutes: int) -> str:
+    return f"{minutes}분"
+
 class RoutineRecommendationModel:
-    def __init__(self):
-        self.exercise_database = {
-            "cardio": {
-                "beginner": ["걷기", "실내자전거", "수영", "요가"],
-                "intermediate": ["조깅", "사이클링", "댄스", "계단오르기"],
-                "advanced": ["러닝", "HIIT", "크로스핏", "복싱"]
-            },
-            "strength": {
-                "beginner": ["팔굽혀펴기", "스쿼트", "플랭크", "런지"],
-                "intermediate": ["덤벨운동", "바벨운동", "풀업", "딥스"],
-                "advanced": ["데드리프트", "벤치프레스", "스쿼트(바벨)", "오버헤드프레스"]
-            },
-            "flexibility": {
-                "all": ["스트레칭", "요가", "필라테스", "폼롤링"]
-            }
-        }
+    def __init__(self, catalog: Optional[ExerciseCatalog] = None):
+        # 운동 종목 카탈로그 (reload_catalog 로 서버 재시작 없이 교체)
+        self.catalog = catalog or ExerciseCatalog.default()
         
-        self.goal_focus = {
-            "weight_loss": {"cardio": 0.6, "strength": 0.3, "flexibility": 0.1},
-            "muscle_gain": {"cardio": 0.15, "strength": 0.75, "flexibility": 0.1},
-            "maintenance": {"cardio": 0.4, "strength": 0.4, "flexibility": 0.2},
-            "endurance": {"cardio": 0.7, "strength": 0.2, "flexibility": 0.1}
-        }
+        self.goal_focus = GOAL_FOCUS
     
+    def reload_catalog(self, path: str) -> ExerciseCatalog:
+        """스냅샷 파일로 새 카탈로그를 만든 뒤 한 번에 교체 (진행 중인 요청은 이전 카탈로그 사용)"""
+        catalog = ExerciseCatalog.from_file(path)
+        self.catalog = catalog
+        return catalog
+    
+    @timed("routine_assembly")
     def generate_weekly_routine(self, user_profile: Dict) -> Dict:
         """사용자 프로필 기반 주간 운동 루틴 생성"""
+        validate_profile(user_profile)
         
         # 사용자 정보 추출
         fitness_level = user_profile.get('fitness_level', 'beginner')
@@ -36,39 +112,34 @@ class RoutineRecommendationModel:
         available_days = user_profile.get('available_days', 3)
         time_per_session = user_profile.get('time_per_session', 60)  # 분
         preferred_days = user_profile.get('preferred_days', [])  # 선호 요일
+        seed = user_profile.get('seed')  # 지정하면 같은 프로필은 항상 같은 루틴
+        available_equipment = user_profile.get('available_equipment')  # None 이면 장비 제한 없음
+        
+        # 호출마다 독립된 난수 생성기 (동시 요청끼리 전역 random 상태를 공유하지 않음)
+        rng = random.Random(seed)
         
         # 목표에 따른 운동 비율
         focus = self.goal_focus[goal]
+        catalog = self.catalog  # 생성 도중 카탈로그가 교체되어도 같은 스냅샷 사용
+        equipment_names = None if available_equipment is None else catalog.names_for_equipment(available_equipment)
         
-        weekly_routine = {}
-        days = ['월요일', '화요일', '수요일', '목요일', '금요일', '토요일', '일요일']
-        
-        # 선호 요일을 우선적으로 활용
-        if preferred_days:
-            # 선호 요일이 충분하면 그대로 사용
-            if len(preferred_days) >= available_days:
-                workout_days = preferred_days[:available_days]
-            else:
-                # 선호 요일을 우선 사용하고 부족한 만큼 다른 요일 추가
-                remaining_days = [day for day in days if day not in preferred_days]
-                additional_days = random.sample(remaining_days, available_days - len(preferred_days))
-                workout_days = preferred_days + additional_days
-        else:
-            # 선호 요일이 없으면 랜덤 선택
-            workout_days = random.sample(days, min(available_days, 7))
-        
-        # 근육 증가 목표일 때 특별한 루틴 구성
-        if goal == 'muscle_gain':
-            workout_days = self._optimize_muscle_gain_schedule(workout_days, available_days)
+        # 회복 간격 / 선호 요일 / (근육 증가 목표는) 상체·하체·전신 분할을 함께 최적화
+        muscle_gain = goal == 'muscle_gain'
+        workout_days, splits = routine_optimizer.choose_workout_days(
+            available_days, preferred_days, muscle_gain, rng
+        )
         
+        weekly_routine = {}
+        history = {}  # 운동 이름 -> 수행한 요일 (같은 운동의 회복 간격 계산용)
         for i, day in enumerate(workout_days):
-            routine = self._generate_daily_routine(
-                fitness_level, focus, time_per_session, i, goal
+            weekly_routine[routine_optimizer.DAYS[day]] = self._generate_daily_routine(
+                fitness_level, focus, time_per_session, day, goal, catalog, rng,
+                split_index=splits[i] if muscle_gain else None, history=history,
+                equipment_names=equipment_names
             )
-            weekly_routine[day] = routine
         
         # 휴식일 추가
-        for day in days:
+        for day in routine_optimizer.DAYS:
             if day not in weekly_routine:
                 weekly_routine[day] = {"type": "휴식", "exercises": []}
         
@@ -78,137 +149,128 @@ class RoutineRecommendationModel:
             "recommendations": self._generate_recommendations(user_profile)
         }
     
-    def _optimize_muscle_gain_schedule(self, workout_days: List[str], available_days: int) -> List[str]:
-        """근육 증가 목표를 위한 최적 스케줄 조정"""
-        days_order = ['월요일', '화요일', '수요일', '목요일', '금요일', '토요일', '일요일']
+    def _generate_daily_routine(self, fitness_level: str, focus: Dict, 
+                              time_per_session: int, day: int, goal: str = 'maintenance',
+                              catalog: Optional[ExerciseCatalog] = None,
+                              rng: Optional[random.Random] = None,
+                              split_index: Optional[int] = None,
+                              history: Optional[Dict[str, List[int]]] = None,
+                              equipment_names: Optional[FrozenSet[str]] = None) -> Dict:
+        """일일 운동 루틴 생성 (운동별 시간의 합은 time_per_session 과 같음)
+
+        equipment_names 를 주면 그 운동(가진 장비로 할 수 있는 운동)만 후보로 사용합니다.
+        """
+        catalog = catalog or self.catalog
+        rng = rng or random.Random()
+        history = {} if history is None else history
         
-        if available_days >= 4:
-            # 4일 이상이면 상체/하체 분할 가능
-            return workout_days
-        elif available_days == 3:
-            # 3일이면 전신 운동으로 구성하되 하루씩 간격
-            optimal_3day = ['월요일', '수요일', '금요일']
-            return [day for day in optimal_3day if day in workout_days] + \
-                   [day for day in workout_days if day not in optimal_3day][:3]
+        if goal == 'muscle_gain':
+            split_index = FULL_BODY_SPLIT if split_index is None else split_index
+            strength_candidates = muscle_gain_candidates(catalog, fitness_level, split_index)
         else:
-            return workout_days
-    
-    def _generate_daily_routine(self, fitness_level: str, focus: Dict, 
-                              time_per_session: int, day_index: int, goal: str = 'maintenance') -> Dict:
-        """일일 운동 루틴 생성"""
+            strength_candidates = catalog.candidate_names('strength', fitness_level)
+        cardio_candidates = catalog.candidate_names('cardio', fitness_level)
+        flexibility_candidates = catalog.candidate_names('flexibility')
+        if equipment_names is not None:
+            cardio_candidates, strength_candidates, flexibility_candidates = (
+                tuple(name for name in names if name in equipment_names)
+                for names in (cardio_candidates, strength_candidates, flexibility_candidates)
+            )
         
-        # 시간 배분
-        cardio_time = int(time_per_session * focus['cardio'])
-        strength_time = int(time_per_session * focus['strength'])
-        flexibility_time = int(time_per_session * focus['flexibility'])
+        # 시간 배분 (후보 운동이 없거나 너무 짧게 배정된 종류의 시간은 나머지 종류로)
+        weights = [
+            focus['cardio'] if cardio_candidates else 0.0,
+            focus['strength'] if strength_candidates else 0.0,
+            focus['flexibility'] if flexibility_candidates else 0.0,
+        ]
+        cardio_time, strength_time, flexibility_time = routine_optimizer.session_minutes(
+            time_per_session, weights, MIN_BLOCK_MINUTES
+        )
         
         exercises = []
         
         # 유산소 운동
         if cardio_time > 0:
-            cardio_exercises = self.exercise_database['cardio'][fitness_level]
-            selected_cardio = random.choice(cardio_exercises)
+            selected_cardio = routine_optimizer.select_exercises(cardio_candidates, 1, day, history, rng)[0]
             exercises.append({
                 "type": "유산소",
                 "name": selected_cardio,
-                "duration": f"{cardio_time}분",
+                "duration": _minutes_label(cardio_time),
                 "intensity": self._get_intensity(fitness_level)
             })
         
         # 근력 운동 (근육 증가 목표일 때 특별 처리)
         if strength_time > 0:
             if goal == 'muscle_gain':
-                exercises.extend(self._generate_muscle_gain_routine(fitness_level, strength_time, day_index))
+                exercises.extend(self._generate_muscle_gain_routine(
+                    fitness_level, strength_time, day, rng, split_index, history, strength_candidates
+                ))
             else:
-                strength_exercises = self.exercise_database['strength'][fitness_level]
-                num_exercises = min(3, strength_time // 15)  # 15분당 1개 운동
-                selected_strength = random.sample(strength_exercises, 
-                                                min(num_exercises, len(strength_exercises)))
+                num_exercises = max(1, min(MAX_STRENGTH_EXERCISES, round(strength_time / STRENGTH_SLOT_MINUTES)))
+                selected_strength = routine_optimizer.select_exercises(
+                    strength_candidates, num_exercises, day, history, rng
+                )
+                durations = routine_optimizer.allocate_minutes(strength_time, [1] * len(selected_strength))
                 
-                for exercise in selected_strength:
+                for exercise, minutes in zip(selected_strength, durations):
                     exercises.append({
                         "type": "근력",
                         "name": exercise,
                         "sets": self._get_sets_reps(fitness_level),
-                        "rest": "60-90초"
+                        "rest": "60-90초",
+                        "duration": _minutes_label(minutes)
                     })
         
         # 유연성 운동
         if flexibility_time > 0:
-            flexibility_exercises = self.exercise_database['flexibility']['all']
-            selected_flexibility = random.choice(flexibility_exercises)
+            selected_flexibility = routine_optimizer.select_exercises(flexibility_candidates, 1, day, history, rng)[0]
             exercises.append({
                 "type": "유연성",
                 "name": selected_flexibility,
-                "duration": f"{flexibility_time}분"
+                "duration": _minutes_label(flexibility_time)
             })
         
         return {
             "type": "운동",
-            "total_time": f"{time_per_session}분",
+            "total_time": _minutes_label(time_per_session),
             "exercises": exercises
         }
     
     def _get_intensity(self, fitness_level: str) -> str:
-        intensity_map = {
-            "beginner": "낮음",
-            "intermediate": "중간",
-            "advanced": "높음"
-        }
-        return intensity_map.get(fitness_level, "중간")
+        return INTENSITY_LABELS.get(fitness_level, "중간")
     
     def _get_sets_reps(self, fitness_level: str) -> str:
-        sets_reps_map = {
-            "beginner": "2세트 x 8-12회",
-            "intermediate": "3세트 x 10-15회",
-            "advanced": "4세트 x 12-20회"
-        }
-        return sets_reps_map.get(fitness_level, "3세트 x 10-15회")
+        return SETS_REPS_LABELS.get(fitness_level, "3세트 x 10-15회")
     
-    def _generate_muscle_gain_routine(self, fitness_level: str, strength_time: int, day_index: int) -> List[Dict]:
-        """근육 증가 목표를 위한 특화 루틴 생성"""
+    def _generate_muscle_gain_routine(self, fitness_level: str, strength_time: int, day: int,
+                                      rng: Optional[random.Random] = None,
+                                      split_index: int = FULL_BODY_SPLIT,
+                                      history: Optional[Dict[str, List[int]]] = None,
+                                      candidates: Optional[tuple] = None) -> List[Dict]:
+        """근육 증가 목표를 위한 특화 루틴 생성 (candidates: 분할에 맞는 카탈로그 근력 운동)"""
+        rng = rng or random.Random()
+        history = {} if history is None else history
         exercises = []
         
-        # 근육 증가를 위한 운동 분할
-        muscle_split = {
-            0: {"focus": "상체", "exercises": ["팔굽혀펴기", "벤치프레스", "덤벨 컬", "숄더 프레스"]},
-            1: {"focus": "하체", "exercises": ["스쿼트", "런지", "데드리프트", "카프 레이즈"]},
-            2: {"focus": "전신", "exercises": ["데드리프트", "스쿼트", "풀업", "플랭크"]}
-        }
-        
-        split_index = day_index % 3
-        day_focus = muscle_split[split_index]
+        day_focus = MUSCLE_SPLIT[split_index]
         
-        # 수준별 운동 선택
-        available_exercises = []
-        if fitness_level == 'beginner':
-            available_exercises = [ex for ex in day_focus["exercises"] 
-                                 if ex in ["팔굽혀펴기", "스쿼트", "런지", "플랭크"]]
-        elif fitness_level == 'intermediate':
-            available_exercises = [ex for ex in day_focus["exercises"] 
-                                 if ex not in ["데드리프트", "벤치프레스"]]
-        else:
-            available_exercises = day_focus["exercises"]
+        # 수준별 운동 선택 (카탈로그 또는 미리 계산된 목록)
+        available_exercises = candidates or muscle_gain_candidates(self.catalog, fitness_level, split_index)
         
         # 운동 개수 결정 (시간에 따라)
-        num_exercises = min(len(available_exercises), max(3, strength_time // 12))
-        selected_exercises = random.sample(available_exercises, 
-                                         min(num_exercises, len(available_exercises)))
+        num_exercises = min(len(available_exercises),
+                            max(MIN_MUSCLE_GAIN_EXERCISES, round(strength_time / MUSCLE_GAIN_SLOT_MINUTES)))
+        selected_exercises = routine_optimizer.select_exercises(available_exercises, num_exercises, day, history, rng)
+        durations = routine_optimizer.allocate_minutes(strength_time, [1] * len(selected_exercises))
         
-        for exercise in selected_exercises:
-            # 근육 증가를 위한 더 높은 세트/반복 수
-            muscle_sets_reps = {
-                "beginner": "3세트 x 8-12회",
-                "intermediate": "4세트 x 8-12회", 
-                "advanced": "4-5세트 x 6-10회"
-            }
-            
+        for exercise, minutes in zip(selected_exercises, durations):
             exercises.append({
                 "type": "근력",
                 "name": exercise,
-                "sets": muscle_sets_reps[fitness_level],
+                "sets": MUSCLE_GAIN_SETS_REPS[fitness_level],
                 "rest": "90-120초",
-                "focus": day_focus["focus"]
+                "focus": day_focus["focus"],
+                "duration": _minutes_label(minutes)
             })
         
         return exercises
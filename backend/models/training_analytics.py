@@ -0,0 +1,313 @@
+# 칼로리 / 훈련 부하 분석
+#
+# workouts, nutrition_records 기록을 날짜별 열 배열(일별 집계)로 모아 두고, 대시보드 조회는
+# 원본 기록을 다시 훑지 않고 일별 집계에서 누적합 기반 이동 구간으로 계산합니다 (O(일수)).
+# - 에너지 수지: 섭취 칼로리 - (기초 대사량 + 운동 소모 칼로리), 식단을 기록한 날만 계산
+# - 급성:만성 부하 비율(ACWR): 세션 RPE 부하(운동 시간(분) × 운동 강도)의 7일 / 28일 이동평균 비율
+# - 영양소 합계: nutrition_records 의 total_* (없으면 100g 기준 값 × 제공량 × 섭취량 / 100, DB 트리거와 같은 식)
+# 집계 결과는 Regressors 로 만들어 WeightPredictionModel 의 추가 설명 변수로 쓸 수 있습니다.
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models import fast_weight_engine
+
+MACROS = ("calories", "protein", "carbs", "fat", "fiber", "sugar", "sodium")
+NUTRITION_COLUMNS = MACROS + ("meals",)
+WORKOUT_COLUMNS = ("burned_calories", "load", "duration", "sessions", "heart_rate_minutes", "heart_rate_duration")
+
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+DEFAULT_RPE = 5  # perceived_exertion 이 없는 운동의 강도
+DEFAULT_CALORIES_PER_KG_PER_MINUTE = 0.05  # exercises.calories_per_kg_per_minute 기본값
+REGRESSOR_NAMES = ("energy_balance_7d", "acute_load")
+PERIODS = ("day", "week")
+MAX_SPAN_DAYS = 3660  # 한 계정의 일별 집계 기간 상한 (약 10년, 잘못된 날짜로 배열이 커지지 않도록)
+
+def _column(records: Sequence[Dict], key: str, default: float = np.nan) -> np.ndarray:
+    """기록 목록의 한 필드를 float 배열로 (None / 누락은 default)"""
+    values = np.array([record.get(key) for record in records], dtype=np.float64)
+    values[np.isnan(values)] = default
+    return values
+
+def _days(records: Sequence[Dict], key: str) -> np.ndarray:
+    """YYYY-MM-DD 날짜 필드를 1970-01-01 기준 일수 배열로"""
+    return fast_weight_engine.parse_dates([str(record[key])[:10] for record in records]).astype(np.int64)
+
+def workout_columns(workouts: Sequence[Dict], body_weight: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """workouts 기록 -> (일수, WORKOUT_COLUMNS 순서의 (n, 6) 행렬)
+
+    total_calories_burned 가 없으면 체중(body_weight) × 운동 시간 × calories_per_kg_per_minute 로 추정합니다.
+    """
+    if not workouts:
+        return np.empty(0, dtype=np.int64), np.empty((0, len(WORKOUT_COLUMNS)))
+    duration = _column(workouts, "total_duration", 0.0)
+    burned = _column(workouts, "total_calories_burned")
+    if body_weight:
+        rate = _column(workouts, "calories_per_kg_per_minute", DEFAULT_CALORIES_PER_KG_PER_MINUTE)
+        burned = np.where(np.isnan(burned) | (burned <= 0), body_weight * duration * rate, burned)
+    burned[np.isnan(burned)] = 0.0
+    heart_rate = _column(workouts, "average_heart_rate")
+    has_heart_rate = ~np.isnan(heart_rate)
+    values = np.column_stack((
+        burned,
+        duration * _column(workouts, "perceived_exertion", DEFAULT_RPE),
+        duration,
+        np.ones(len(workouts)),
+        np.where(has_heart_rate, heart_rate * duration, 0.0),
+        np.where(has_heart_rate, duration, 0.0),
+    ))
+    return _days(workouts, "workout_date"), values
+
+def nutrition_columns(nutrition: Sequence[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """nutrition_records 기록 -> (일수, NUTRITION_COLUMNS 순서의 (n, 8) 행렬)"""
+    if not nutrition:
+        return np.empty(0, dtype=np.int64), np.empty((0, len(NUTRITION_COLUMNS)))
+    grams = _column(nutrition, "serving_size") * _column(nutrition, "quantity", 1.0)
+    columns = []
+    for macro in MACROS:
+        total = _column(nutrition, f"total_{macro}")
+        computed = _column(nutrition, f"{macro}_per_100g") * grams / 100
+        total = np.where(np.isnan(total), computed, total)
+        total[np.isnan(total)] = 0.0
+        columns.append(total)
+    columns.append(np.ones(len(nutrition)))
+    return _days(nutrition, "meal_date"), np.column_stack(columns)
+
+def rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """축 0 방향 누적합 기반 이동합 (앞쪽은 있는 날만큼)"""
+    csum = np.concatenate((np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)))
+    idx = np.arange(1, len(values) + 1)
+    return csum[idx] - csum[np.maximum(idx - window, 0)]
+
+def _week_start(days: np.ndarray) -> np.ndarray:
+    """월요일 시작 주의 첫날 (1970-01-01 은 목요일)"""
+    return days - (days + 3) % 7
+
+def _round(values: np.ndarray, digits: int = 1) -> List[Optional[float]]:
+    """NaN 은 None 으로 바꾼 반올림 목록"""
+    rounded = np.round(values, digits).tolist()
+    if not np.isnan(values).any():
+        return rounded
+    return [None if value != value else value for value in rounded]
+
+class Regressors(NamedTuple):
+    """일별 추가 설명 변수 (WeightPredictionModel 용, 값이 없는 날은 NaN)"""
+    names: Tuple[str, ...]
+    start: np.datetime64
+    values: np.ndarray  # (days, len(names))
+
+    def at(self, dates: np.ndarray) -> np.ndarray:
+        """datetime64[D] 날짜별 값 (범위 밖은 NaN)"""
+        index = (np.asarray(dates, dtype='datetime64[D]') - self.start).astype(np.int64)
+        result = np.full((len(index), len(self.names)), np.nan)
+        valid = (index >= 0) & (index < len(self.values))
+        result[valid] = self.values[index[valid]]
+        return result
+
+    def future(self, window: int = ACUTE_DAYS) -> np.ndarray:
+        """예측 기간 동안 유지된다고 보는 값 (최근 window 일 평균, 값이 없으면 NaN)"""
+        recent = self.values[-window:]
+        available = ~np.isnan(recent)
+        counts = available.sum(axis=0)
+        totals = np.where(available, recent, 0.0).sum(axis=0)
+        return np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+
+class DailyRollup:
+    """start 일부터 연속된 날짜별 집계 열 배열 (기록이 추가되면 앞뒤로 늘어남)
+
+    materialize 는 받은 기록에 있는 날짜의 집계만 다시 계산하므로, 변경된 날의 기록만 보내면 됩니다.
+    """
+
+    def __init__(self):
+        self.start: Optional[int] = None  # 1970-01-01 기준 일수
+        self.nutrition = np.zeros((0, len(NUTRITION_COLUMNS)))
+        self.workouts = np.zeros((0, len(WORKOUT_COLUMNS)))
+
+    def __len__(self):
+        return len(self.nutrition)
+
+    @property
+    def start_date(self) -> Optional[str]:
+        return None if self.start is None else str(np.datetime64(self.start, 'D'))
+
+    @property
+    def end_date(self) -> Optional[str]:
+        return None if self.start is None else str(np.datetime64(self.start + len(self) - 1, 'D'))
+
+    def materialize(self, workouts: Sequence[Dict] = (), nutrition: Sequence[Dict] = (),
+                    body_weight: Optional[float] = None, replace: bool = True) -> "DailyRollup":
+        """기록을 일별 집계에 반영
+
+        replace=True 이면 기록이 있는 날짜의 해당 집계(운동 / 식단)를 이 기록들로 다시 계산하고
+        (같은 날짜를 다시 보내도 중복 집계되지 않음), False 이면 기존 집계에 더합니다.
+        """
+        workout_days, workout_values = workout_columns(workouts, body_weight)
+        nutrition_days, nutrition_values = nutrition_columns(nutrition)
+        all_days = np.concatenate((workout_days, nutrition_days))
+        if len(all_days) == 0:
+            return self
+        self._ensure(int(all_days.min()), int(all_days.max()))
+
+        for table, days, values in ((self.workouts, workout_days, workout_values),
+                                    (self.nutrition, nutrition_days, nutrition_values)):
+            rows = days - self.start
+            if replace:
+                table[np.unique(rows)] = 0.0
+            np.add.at(table, rows, values)
+        return self
+
+    def dump(self, target):
+        """.npz 로 저장 (파일 경로 또는 파일 객체)"""
+        start = np.array([] if self.start is None else [self.start], dtype=np.int64)
+        np.savez(target, start=start, nutrition=self.nutrition, workouts=self.workouts)
+
+    @classmethod
+    def load(cls, source) -> "DailyRollup":
+        """dump 로 저장한 집계 불러오기"""
+        with np.load(source) as data:
+            if data["nutrition"].shape[1:] != (len(NUTRITION_COLUMNS),) or \
+                    data["workouts"].shape[1:] != (len(WORKOUT_COLUMNS),):
+                raise ValueError("지원하지 않는 집계 형식입니다")
+            rollup = cls()
+            rollup.start = int(data["start"][0]) if len(data["start"]) else None
+            rollup.nutrition = data["nutrition"]
+            rollup.workouts = data["workouts"]
+        return rollup
+
+    def _ensure(self, first: int, last: int):
+        """[first, last] 날짜가 들어가도록 배열 확장 (전체 기간이 MAX_SPAN_DAYS 를 넘으면 ValueError)"""
+        if self.start is not None:
+            first, last = min(first, self.start), max(last, self.start + len(self) - 1)
+        if last - first + 1 > MAX_SPAN_DAYS:
+            raise ValueError(f"기록 기간이 너무 깁니다 ({str(np.datetime64(first, 'D'))} ~ "
+                             f"{str(np.datetime64(last, 'D'))}, 최대 {MAX_SPAN_DAYS}일)")
+        if self.start is None:
+            self.start = first
+        before = max(self.start - first, 0)
+        after = max(last - (self.start + len(self) - 1), 0)
+        if before or after:
+            self.nutrition = np.pad(self.nutrition, ((before, after), (0, 0)))
+            self.workouts = np.pad(self.workouts, ((before, after), (0, 0)))
+            self.start -= before
+
+    def _daily(self, resting_calories: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """전체 기간의 일별 지표 배열 (이동 구간은 조회 구간 이전 기록까지 포함해 계산)"""
+        nutrition = dict(zip(NUTRITION_COLUMNS, self.nutrition.T))
+        workouts = dict(zip(WORKOUT_COLUMNS, self.workouts.T))
+        logged = nutrition["meals"] > 0
+        balance = nutrition["calories"] - workouts["burned_calories"] - (resting_calories or 0.0)
+
+        acute = rolling_sum(workouts["load"], ACUTE_DAYS) / ACUTE_DAYS
+        chronic = rolling_sum(workouts["load"], CHRONIC_DAYS) / CHRONIC_DAYS
+        with np.errstate(divide="ignore", invalid="ignore"):
+            acwr = np.where(chronic > 0, acute / chronic, np.nan)
+            heart_rate = np.where(workouts["heart_rate_duration"] > 0,
+                                  workouts["heart_rate_minutes"] / workouts["heart_rate_duration"], np.nan)
+        acwr[:CHRONIC_DAYS - 1] = np.nan  # 만성 구간(28일)이 채워지기 전에는 계산하지 않음
+        return {
+            **nutrition,
+            **workouts,
+            "energy_balance": np.where(logged, balance, np.nan),
+            "acute_load": acute,
+            "chronic_load": chronic,
+            "acwr": acwr,
+            "average_heart_rate": heart_rate,
+        }
+
+    def _range(self, start_date: Optional[str], end_date: Optional[str]) -> Tuple[int, int]:
+        """조회 구간의 행 범위 [first, last)"""
+        first = 0 if start_date is None else int(np.datetime64(start_date, 'D').astype(np.int64)) - self.start
+        last = len(self) if end_date is None else int(np.datetime64(end_date, 'D').astype(np.int64)) - self.start + 1
+        return max(first, 0), min(last, len(self))
+
+    def summary(self, start_date: Optional[str] = None, end_date: Optional[str] = None, period: str = "day",
+                resting_calories: Optional[float] = None) -> Dict:
+        """구간의 일별 / 주별 에너지 수지, 훈련 부하, 영양소 합계"""
+        if period not in PERIODS:
+            raise ValueError(f"지원하지 않는 집계 단위입니다: {period} (사용 가능: {', '.join(PERIODS)})")
+        if self.start is None:
+            return {"period": period, "rows": [], "totals": {}}
+        first, last = self._range(start_date, end_date)
+        if first >= last:
+            return {"period": period, "rows": [], "totals": {}}
+
+        daily = {key: values[first:last] for key, values in self._daily(resting_calories).items()}
+        days = np.arange(self.start + first, self.start + last)
+        rows = self._daily_rows(days, daily) if period == "day" else self._weekly_rows(days, daily)
+
+        logged_days = int((daily["meals"] > 0).sum())
+        totals = {macro: round(float(daily[macro].sum()), 1) for macro in MACROS}
+        totals.update(
+            burned_calories=round(float(daily["burned_calories"].sum()), 1),
+            energy_balance=round(float(np.nansum(daily["energy_balance"])), 1) if logged_days else None,
+            load=round(float(daily["load"].sum()), 1),
+            sessions=int(daily["sessions"].sum()),
+            logged_days=logged_days,
+            days=last - first,
+        )
+        return {"period": period, "rows": rows, "totals": totals}
+
+    @staticmethod
+    def _daily_rows(days: np.ndarray, daily: Dict[str, np.ndarray]) -> List[Dict]:
+        columns = {
+            "date": np.datetime_as_string(days.astype('datetime64[D]')).tolist(),
+            **{macro: _round(daily[macro]) for macro in MACROS},
+            "burned_calories": _round(daily["burned_calories"]),
+            "energy_balance": _round(daily["energy_balance"]),
+            "load": _round(daily["load"]),
+            "acute_load": _round(daily["acute_load"]),
+            "chronic_load": _round(daily["chronic_load"]),
+            "acwr": _round(daily["acwr"], 2),
+            "sessions": daily["sessions"].astype(np.int64).tolist(),
+            "duration": daily["duration"].astype(np.int64).tolist(),
+            "average_heart_rate": _round(daily["average_heart_rate"], 0),
+        }
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    @staticmethod
+    def _weekly_rows(days: np.ndarray, daily: Dict[str, np.ndarray]) -> List[Dict]:
+        """월요일 시작 주별 합계 (ACWR 과 이동평균 부하는 주 마지막 날 값)"""
+        weeks = _week_start(days)
+        boundaries = np.flatnonzero(np.concatenate(([True], weeks[1:] != weeks[:-1])))
+        ends = np.concatenate((boundaries[1:], [len(days)])) - 1
+
+        def total(values):
+            return np.add.reduceat(values, boundaries)
+
+        logged = total((daily["meals"] > 0).astype(np.float64))
+        balance = np.where(logged > 0, total(np.nan_to_num(daily["energy_balance"])), np.nan)
+        columns = {
+            "week_start": np.datetime_as_string(weeks[boundaries].astype('datetime64[D]')).tolist(),
+            **{macro: _round(total(daily[macro])) for macro in MACROS},
+            "burned_calories": _round(total(daily["burned_calories"])),
+            "energy_balance": _round(balance),
+            "load": _round(total(daily["load"])),
+            "acute_load": _round(daily["acute_load"][ends]),
+            "chronic_load": _round(daily["chronic_load"][ends]),
+            "acwr": _round(daily["acwr"][ends], 2),
+            "sessions": total(daily["sessions"]).astype(np.int64).tolist(),
+            "duration": total(daily["duration"]).astype(np.int64).tolist(),
+            "logged_days": logged.astype(np.int64).tolist(),
+        }
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    def regressors(self, resting_calories: Optional[float] = None) -> Optional[Regressors]:
+        """체중 예측용 일별 설명 변수 (최근 7일 식단 기록일 평균 에너지 수지, 7일 평균 훈련 부하)"""
+        if self.start is None:
+            return None
+        daily = self._daily(resting_calories)
+        logged = daily["meals"] > 0
+        logged_days = rolling_sum(logged.astype(np.float64), ACUTE_DAYS)
+        balance_sum = rolling_sum(np.where(logged, daily["energy_balance"], 0.0), ACUTE_DAYS)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            balance = np.where(logged_days > 0, balance_sum / logged_days, np.nan)
+        return Regressors(REGRESSOR_NAMES, np.datetime64(self.start, 'D'),
+                          np.column_stack((balance, daily["acute_load"])))
+
+def analyze_records(workouts: Sequence[Dict], nutrition: Sequence[Dict], body_weight: Optional[float] = None,
+                    start_date: Optional[str] = None, end_date: Optional[str] = None, period: str = "day",
+                    resting_calories: Optional[float] = None) -> Dict:
+    """저장하지 않고 기록 목록을 바로 집계 (ACWR 은 보낸 기록 범위 안에서만 계산)"""
+    rollup = DailyRollup().materialize(workouts, nutrition, body_weight)
+    return rollup.summary(start_date, end_date, period, resting_calories)
@@ -1,19 +1,47 @@
 # 체중 예측 모델
-import pandas as pd
+# pandas / scikit-learn / joblib 은 해당 경로(sklearn backend, ISO 형식이 아닌 날짜, 상태 저장)를
+# 처음 사용할 때 import 합니다. numpy 경로만 쓰는 요청은 이 라이브러리들을 불러오지 않습니다.
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import StandardScaler
 from datetime import datetime, timedelta
-import joblib
+
+from models import fast_weight_engine, forecast_engines
+from utils.metrics import timed
+
+MIN_RECORDS = 5
+REFERENCE_CONDITION = "morning_empty"  # 측정 조건 보정의 기준 (공복 아침 체중으로 환산)
+COMPOSITION_FIELDS = ("body_fat_percentage", "muscle_mass")
+BATCH_CHUNK_SIZE = 256  # 한 번에 쌓아서 학습하는 사용자 수 (padding 메모리 상한)
+
+def parse_record_dates(dates):
+    """날짜 문자열 목록을 datetime64[D] 배열로 변환 (ISO 형식이 아니면 pandas 로 파싱)"""
+    try:
+        return fast_weight_engine.parse_dates(dates)
+    except ValueError:
+        import pandas as pd
+        # 원소마다 형식을 추론 (format 을 지정하지 않으면 호출마다 "Could not infer format" 경고)
+        return pd.to_datetime(pd.Series(dates), format='mixed').values.astype('datetime64[D]')
 
 class WeightPredictionModel:
-    def __init__(self):
-        self.model = LinearRegression()
-        self.scaler = StandardScaler()
+    # backend: "numpy" (기본, pandas/sklearn 없이 계산) 또는 "sklearn" (기존 경로)
+    def __init__(self, backend: str = "numpy"):
+        if backend not in ("numpy", "sklearn"):
+            raise ValueError(f"지원하지 않는 backend 입니다: {backend}")
+        self.backend = backend
+        self.model = None  # sklearn 경로 학습 결과 (LinearRegression, StandardScaler)
+        self.scaler = None
+        if backend == "sklearn":
+            from sklearn.linear_model import LinearRegression
+            from sklearn.preprocessing import StandardScaler
+            self.model = LinearRegression()
+            self.scaler = StandardScaler()
+        self.fit = None  # numpy 경로 학습 결과 (fast_weight_engine.LinearFit)
+        self.regressors = None  # 추가 설명 변수 (training_analytics.Regressors, numpy 경로만)
+        self.regressor_fill = None  # 값이 없는 날에 쓰는 학습 구간 평균
         self.is_trained = False
     
     def prepare_features(self, weight_data):
         """체중 데이터를 모델 학습용 특성으로 변환"""
+        import pandas as pd
         df = pd.DataFrame(weight_data)
         df['date'] = pd.to_datetime(df['date'])
         df = df.sort_values('date')
@@ -28,12 +56,34 @@ class WeightPredictionModel:
         
         return df
     
-    def train(self, weight_data):
-        """체중 데이터로 모델 학습"""
-        if len(weight_data) < 5:
+    def prepare_feature_arrays(self, weight_data):
+        """체중 데이터를 NumPy 특성 배열로 변환"""
+        dates = parse_record_dates([record['date'] for record in weight_data])
+        weights = np.array([record['weight'] for record in weight_data], dtype=np.float64)
+        return fast_weight_engine.build_features(dates, weights)
+    
+    def train(self, weight_data, regressors=None):
+        """체중 데이터로 모델 학습 (regressors: 일별 추가 설명 변수, 예: 에너지 수지 / 훈련 부하)"""
+        if len(weight_data) < MIN_RECORDS:
             raise ValueError("최소 5개의 체중 데이터가 필요합니다")
         
-        df = self.prepare_features(weight_data)
+        if self.backend == "numpy":
+            with timed("feature_prep"):
+                features = self.prepare_feature_arrays(weight_data)
+                X = features.matrix
+                if regressors is not None:
+                    X = np.column_stack((X, self._regressor_matrix(regressors, features)))
+            with timed("regression_fit"):
+                self.fit = fast_weight_engine.fit_linear(X, features.weight)
+            self.regressors = regressors
+            self.is_trained = True
+            return self
+        
+        if regressors is not None:
+            raise ValueError("추가 설명 변수는 numpy backend 에서만 지원합니다")
+        
+        with timed("feature_prep"):
+            df = self.prepare_features(weight_data)
         
         # 특성 선택
         features = ['days_since_start', 'weight_ma_3', 'weight_ma_7']
@@ -41,47 +91,382 @@ class WeightPredictionModel:
         y = df['weight'].values
         
         # 정규화
-        X_scaled = self.scaler.fit_transform(X)
+        with timed("scaler_fit"):
+            X_scaled = self.scaler.fit_transform(X)
         
         # 모델 학습
-        self.model.fit(X_scaled, y)
+        with timed("regression_fit"):
+            self.model.fit(X_scaled, y)
         self.is_trained = True
         
         return self
     
-    def predict_future_weight(self, weight_data, days_ahead=14):
-        """향후 체중 예측"""
+    def predict_future_weight(self, weight_data, days_ahead=14, as_array=False):
+        """향후 체중 예측 (as_array=True 이면 반올림하지 않은 예측값 배열만 반환)"""
         if not self.is_trained:
             raise ValueError("모델이 학습되지 않았습니다")
         
-        df = self.prepare_features(weight_data)
+        if self.backend == "numpy":
+            return self._predict_future_weight_numpy(weight_data, days_ahead, as_array)
+        
+        with timed("feature_prep"):
+            df = self.prepare_features(weight_data)
         last_row = df.iloc[-1]
         
         predictions = []
+        raw_predictions = []
         current_weight = last_row['weight']
         current_ma_3 = last_row['weight_ma_3']
         current_ma_7 = last_row['weight_ma_7']
         
-        for day in range(1, days_ahead + 1):
-            # 특성 생성
-            days_since_start = last_row['days_since_start'] + day
-            features = np.array([[days_since_start, current_ma_3, current_ma_7]])
+        with timed("forecast"):
+            for day in range(1, days_ahead + 1):
+                # 특성 생성
+                days_since_start = last_row['days_since_start'] + day
+                features = np.array([[days_since_start, current_ma_3, current_ma_7]])
             
-            # 예측
-            features_scaled = self.scaler.transform(features)
-            predicted_weight = self.model.predict(features_scaled)[0]
+                # 예측
+                features_scaled = self.scaler.transform(features)
+                predicted_weight = self.model.predict(features_scaled)[0]
+                raw_predictions.append(predicted_weight)
             
-            # 예측 날짜
-            prediction_date = last_row['date'] + timedelta(days=day)
+                # 예측 날짜
+                prediction_date = last_row['date'] + timedelta(days=day)
             
-            predictions.append({
-                'date': prediction_date.strftime('%Y-%m-%d'),
-                'predicted_weight': round(predicted_weight, 1)
-            })
+                predictions.append({
+                    'date': prediction_date.strftime('%Y-%m-%d'),
+                    'predicted_weight': round(predicted_weight, 1)
+                })
             
-            # 이동평균 업데이트 (간단한 근사)
-            current_weight = predicted_weight
-            current_ma_3 = (current_ma_3 * 2 + predicted_weight) / 3
-            current_ma_7 = (current_ma_7 * 6 + predicted_weight) / 7
+                # 이동평균 업데이트 (간단한 근사)
+                current_weight = predicted_weight
+                current_ma_3 = (current_ma_3 * 2 + predicted_weight) / 3
+                current_ma_7 = (current_ma_7 * 6 + predicted_weight) / 7
         
-        return predictions
\ No newline at end of file
+        if as_array:
+            return np.array(raw_predictions, dtype=np.float64)
+        return predictions
+    
+    def _regressor_matrix(self, regressors, features):
+        """기록 날짜별 추가 설명 변수 (값이 없는 날은 학습 구간 평균, 전부 없으면 0)"""
+        dates = features.base_date + features.days_since_start.astype(np.int64)
+        values = regressors.at(dates)
+        available = ~np.isnan(values)
+        counts = available.sum(axis=0)
+        self.regressor_fill = np.where(available, values, 0.0).sum(axis=0) / np.maximum(counts, 1)
+        return np.where(available, values, self.regressor_fill)
+    
+    def _forecast_fit(self):
+        """예측 기간의 추가 설명 변수를 최근 평균으로 고정해 절편에 접어 넣은 회귀 계수"""
+        if self.regressors is None:
+            return self.fit
+        future = self.regressors.future()
+        future = np.where(np.isnan(future), self.regressor_fill, future)
+        return fast_weight_engine.LinearFit(
+            coef=self.fit.coef[:3], intercept=self.fit.intercept + float(self.fit.coef[3:] @ future)
+        )
+    
+    def regressor_coefficients(self):
+        """추가 설명 변수 1 단위당 체중 변화 (kg)"""
+        if self.regressors is None:
+            return {}
+        return dict(zip(self.regressors.names, self.fit.coef[3:].tolist()))
+    
+    def _predict_future_weight_numpy(self, weight_data, days_ahead, as_array=False):
+        """NumPy 경로 향후 체중 예측 (전체 기간을 한 번에 계산)"""
+        with timed("feature_prep"):
+            features = self.prepare_feature_arrays(weight_data)
+        with timed("forecast"):
+            weights = fast_weight_engine.forecast_weights(self._forecast_fit(), features, days_ahead)
+        if as_array:
+            return weights
+        
+        dates = np.datetime_as_string(fast_weight_engine.forecast_dates(features, days_ahead))
+        return [
+            {'date': date, 'predicted_weight': round(weight, 1)}
+            for date, weight in zip(dates.tolist(), weights.tolist())
+        ]
+
+
+def predict_weight_batch(weight_series, days_ahead=14):
+    """여러 사용자의 체중 예측을 쌓아서 한 번에 학습/예측
+    
+    결과는 입력 순서대로 {'predictions': [...]} 또는 {'error': 메시지} 이며,
+    한 사용자의 잘못된 데이터가 다른 사용자의 결과에 영향을 주지 않습니다.
+    """
+    results = [None] * len(weight_series)
+    parsed = []
+    
+    for index, weight_data in enumerate(weight_series):
+        if len(weight_data) < MIN_RECORDS:
+            results[index] = {'error': "최소 5개의 체중 데이터가 필요합니다"}
+            continue
+        try:
+            dates = parse_record_dates([record['date'] for record in weight_data])
+            weights = np.array([record['weight'] for record in weight_data], dtype=np.float64)
+        except (ValueError, TypeError) as e:
+            results[index] = {'error': f"데이터 형식 오류: {str(e)}"}
+            continue
+        if np.isnat(dates).any() or not np.isfinite(weights).all():
+            results[index] = {'error': "날짜 또는 체중 값이 올바르지 않습니다"}
+            continue
+        parsed.append((index, dates, weights))
+    
+    # 길이가 비슷한 사용자끼리 묶어 padding 낭비를 줄임
+    parsed.sort(key=lambda item: len(item[1]))
+    for start in range(0, len(parsed), BATCH_CHUNK_SIZE):
+        chunk = parsed[start:start + BATCH_CHUNK_SIZE]
+        with timed("feature_prep"):
+            batch = fast_weight_engine.build_batch_features(
+                [dates for _, dates, _ in chunk], [weights for _, _, weights in chunk]
+            )
+        with timed("regression_fit"):
+            fit = fast_weight_engine.fit_batch(batch)
+        with timed("forecast"):
+            forecasts = fast_weight_engine.forecast_weights_batch(fit, batch, days_ahead)
+        
+        last_dates = batch.base_dates + batch.last(batch.days_since_start).astype(np.int64)
+        offsets = np.arange(1, days_ahead + 1)
+        
+        for row, (index, _, _) in enumerate(chunk):
+            if not np.isfinite(forecasts[row]).all():
+                results[index] = {'error': "예측값을 계산할 수 없습니다"}
+                continue
+            dates = np.datetime_as_string(last_dates[row] + offsets)
+            results[index] = {
+                'predictions': [
+                    {'date': date, 'predicted_weight': round(weight, 1)}
+                    for date, weight in zip(dates.tolist(), forecasts[row].tolist())
+                ]
+            }
+    
+    return results
+
+
+def condition_offsets(days, weights, conditions):
+    """측정 조건별 체중 차이 추정 (기준 조건 대비, 각 조건 2회 이상 측정된 경우만)
+
+    선형 추세를 뺀 잔차의 조건별 중앙값 차이를 사용해 추세 변화와 조건 차이를 구분합니다.
+    """
+    conditions = np.asarray(conditions, dtype=object)
+    is_reference = conditions == REFERENCE_CONDITION
+    if is_reference.sum() < 2:
+        return {}
+    
+    design = np.column_stack((np.ones(len(days)), days))
+    residuals = weights - design @ np.linalg.lstsq(design, weights, rcond=None)[0]
+    reference = np.median(residuals[is_reference])
+    offsets = {}
+    for condition in set(conditions.tolist()) - {REFERENCE_CONDITION, None}:
+        selected = conditions == condition
+        if selected.sum() >= 2:
+            offsets[condition] = float(np.median(residuals[selected]) - reference)
+    return offsets
+
+def _forecast_entries(last_date, result, value_key, digits):
+    dates = np.datetime_as_string(last_date + np.arange(1, len(result.point) + 1))
+    return [
+        {'date': date, value_key: round(point, digits),
+         'lower_bound': round(lower, digits), 'upper_bound': round(upper, digits)}
+        for date, point, lower, upper in zip(dates.tolist(), result.point.tolist(),
+                                             result.lower.tolist(), result.upper.tolist())
+    ]
+
+def predict_weight_with_engine(weight_data, days_ahead=14, engine=forecast_engines.FAST_ENGINE,
+                               level=forecast_engines.DEFAULT_LEVEL):
+    """등록된 예측 엔진으로 체중 / 체성분 예측과 예측 구간 계산
+    
+    measurement_condition 이 있으면 조건별 차이를 빼 기준 조건(공복 아침) 체중으로 예측하고,
+    body_fat_percentage / muscle_mass 가 5회 이상 기록되어 있으면 같은 엔진으로 함께 예측합니다.
+    """
+    if len(weight_data) < MIN_RECORDS:
+        raise ValueError("최소 5개의 체중 데이터가 필요합니다")
+    with timed("feature_prep"):
+        dates = parse_record_dates([record['date'] for record in weight_data])
+        weights = np.array([record['weight'] for record in weight_data], dtype=np.float64)
+        days = (dates - dates.min()).astype(np.float64)
+        
+        offsets = condition_offsets(days, weights, [record.get('measurement_condition') for record in weight_data])
+        if offsets:
+            weights = weights - np.array([offsets.get(record.get('measurement_condition'), 0.0)
+                                          for record in weight_data])
+    
+    with timed("forecast"):
+        result = forecast_engines.forecast(dates, weights, days_ahead, engine, level)
+        composition = {}
+        for field in COMPOSITION_FIELDS:
+            measured = [(date, record[field]) for date, record in zip(dates, weight_data)
+                        if record.get(field) is not None]
+            if len(measured) >= MIN_RECORDS:
+                field_dates, values = zip(*measured)
+                field_result = forecast_engines.forecast(np.array(field_dates), np.array(values, dtype=np.float64),
+                                                         days_ahead, engine, level)
+                composition[field] = _forecast_entries(dates.max(), field_result, 'predicted_value', 1)
+    
+    return {
+        'predictions': _forecast_entries(dates.max(), result, 'predicted_weight', 1),
+        'condition_offsets': {condition: round(offset, 2) for condition, offset in offsets.items()},
+        'body_composition': composition,
+    }
+
+
+class IncrementalWeightModel:
+    """기록이 추가될 때마다 충분통계량만 갱신하는 체중 예측 모델
+    
+    WeightPredictionModel 과 같은 특성/회귀를 사용하며, 평균과 편차곱 합(Welford 방식),
+    최근 7개 체중만 유지하므로 기록 추가와 예측 모두 이력 길이와 무관하게 O(1) 입니다.
+    기록은 날짜순으로 추가해야 하며, 과거 날짜가 들어오면 from_records 로 다시 생성합니다.
+    """
+    STATE_VERSION = 1
+    WINDOW = 7
+    
+    def __init__(self):
+        self.count = 0
+        self.base_day = None  # 첫 기록 날짜 (1970-01-01 기준 일수)
+        self.last_day = None
+        self.mean = np.zeros(4)  # [경과일수, ma_3, ma_7, 체중] 평균
+        self.comoment = np.zeros((4, 4))  # 편차곱 합
+        self.recent_weights = []  # 최근 WINDOW 개 체중
+        self._fit = None
+    
+    @property
+    def is_trained(self):
+        return self.count >= MIN_RECORDS
+    
+    @classmethod
+    def from_records(cls, weight_data):
+        """전체 이력으로 상태를 한 번에 계산"""
+        if not weight_data:
+            return cls()
+        
+        dates = parse_record_dates([record['date'] for record in weight_data])
+        weights = np.array([record['weight'] for record in weight_data], dtype=np.float64)
+        return cls.from_arrays(dates, weights)
+    
+    @classmethod
+    def from_arrays(cls, dates, weights):
+        """datetime64[D] 날짜 배열과 체중 배열로 상태를 한 번에 계산"""
+        model = cls()
+        if len(dates) == 0:
+            return model
+        
+        with timed("feature_prep"):
+            features = fast_weight_engine.build_features(dates, weights)
+        values = np.column_stack((features.matrix, features.weight))
+        
+        model.count = len(values)
+        model.base_day = int(features.base_date.astype(np.int64))
+        model.last_day = model.base_day + int(features.days_since_start[-1])
+        model.mean = values.mean(axis=0)
+        centered = values - model.mean
+        model.comoment = centered.T @ centered
+        model.recent_weights = features.weight[-cls.WINDOW:].tolist()
+        return model
+    
+    def update(self, record):
+        """{'date', 'weight'} 기록 하나를 추가"""
+        day = int(parse_record_dates([record['date']])[0].astype(np.int64))
+        return self._add(day, float(record['weight']))
+    
+    def extend(self, dates, weights):
+        """날짜순으로 정렬된 datetime64[D] 날짜 / 체중 배열을 차례로 추가"""
+        days = np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+        for day, weight in zip(days.tolist(), np.asarray(weights, dtype=np.float64).tolist()):
+            self._add(day, weight)
+        return self
+    
+    @property
+    def last_date(self):
+        """마지막 기록 날짜 (YYYY-MM-DD, 기록이 없으면 None)"""
+        if self.last_day is None:
+            return None
+        return str(np.datetime64(self.last_day, 'D'))
+    
+    def _add(self, day, weight):
+        if self.last_day is not None and day < self.last_day:
+            raise ValueError("마지막 기록보다 이전 날짜는 추가할 수 없습니다")
+        if self.base_day is None:
+            self.base_day = day
+        self.last_day = day
+        
+        self.recent_weights.append(weight)
+        del self.recent_weights[:-self.WINDOW]
+        ma_3 = sum(self.recent_weights[-3:]) / len(self.recent_weights[-3:])
+        ma_7 = sum(self.recent_weights) / len(self.recent_weights)
+        
+        values = np.array([day - self.base_day, ma_3, ma_7, weight], dtype=np.float64)
+        self.count += 1
+        delta = values - self.mean
+        self.mean = self.mean + delta / self.count
+        self.comoment = self.comoment + np.outer(delta, values - self.mean)
+        self._fit = None
+        return self
+    
+    @property
+    def fit(self):
+        """현재 충분통계량으로 계산한 회귀 계수 (갱신 전까지 재사용)"""
+        if not self.is_trained:
+            raise ValueError("최소 5개의 체중 데이터가 필요합니다")
+        if self._fit is None:
+            with timed("regression_fit"):
+                self._fit = fast_weight_engine.fit_from_moments(self.mean, self.comoment, self.count)
+        return self._fit
+    
+    def predict_future_weight(self, days_ahead=14, as_array=False):
+        """향후 체중 예측 (이력 없이 현재 상태만 사용)"""
+        if not self.is_trained:
+            raise ValueError("최소 5개의 체중 데이터가 필요합니다")
+        ma_3 = sum(self.recent_weights[-3:]) / len(self.recent_weights[-3:])
+        ma_7 = sum(self.recent_weights) / len(self.recent_weights)
+        fit = self.fit
+        with timed("forecast"):
+            weights = fast_weight_engine.forecast_from_state(
+                fit, ma_3, ma_7, self.last_day - self.base_day, days_ahead
+            )
+        if as_array:
+            return weights
+        
+        dates = np.datetime_as_string(
+            np.datetime64(self.last_day, 'D') + np.arange(1, days_ahead + 1)
+        )
+        return [
+            {'date': date, 'predicted_weight': round(weight, 1)}
+            for date, weight in zip(dates.tolist(), weights.tolist())
+        ]
+    
+    def get_state(self):
+        """직렬화용 상태 딕셔너리"""
+        return {
+            'version': self.STATE_VERSION,
+            'count': self.count,
+            'base_day': self.base_day,
+            'last_day': self.last_day,
+            'mean': self.mean,
+            'comoment': self.comoment,
+            'recent_weights': np.array(self.recent_weights),
+        }
+    
+    @classmethod
+    def from_state(cls, state):
+        """get_state 결과로 모델 복원"""
+        if state.get('version') != cls.STATE_VERSION:
+            raise ValueError("지원하지 않는 모델 상태 버전입니다")
+        model = cls()
+        model.count = int(state['count'])
+        model.base_day = state['base_day']
+        model.last_day = state['last_day']
+        model.mean = np.asarray(state['mean'], dtype=np.float64)
+        model.comoment = np.asarray(state['comoment'], dtype=np.float64)
+        model.recent_weights = np.asarray(state['recent_weights'], dtype=np.float64).tolist()
+        return model
+    
+    def dump(self, target):
+        """joblib 으로 상태 저장 (파일 경로 또는 파일 객체)"""
+        import joblib
+        joblib.dump(self.get_state(), target)
+    
+    @classmethod
+    def load(cls, source):
+        """dump 로 저장한 상태 불러오기"""
+        import joblib
+        return cls.from_state(joblib.load(source))
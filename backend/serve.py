@@ -0,0 +1,304 @@
+# 여러 워커 프로세스로 서버 실행 (Linux / macOS)
+#
+# 사용법 (backend 디렉터리에서):
+#   python serve.py --workers 4
+#   kill -HUP <마스터 PID>      # 워커를 하나씩 교체하는 무중단 재시작 (rolling reload)
+#   kill -TERM <마스터 PID>     # 처리 중인 요청을 마치고 종료
+#
+# 마스터 프로세스가 소켓을 한 번 열고, 앱을 미리 import 한 뒤(WEB_PRELOAD=1) 워커를 fork 합니다.
+# 운동 카탈로그 / 루틴 분할표처럼 시작 후 바뀌지 않는 상태는 fork 전에 만들어 두고 gc.freeze() 로
+# GC 가 건드리지 않게 하므로 워커들이 같은 메모리 페이지를 공유합니다. 학습된 체중 모델은
+# MODEL_CACHE_BACKEND=shared (mmap 파일), 칼로리 / 훈련 부하 일별 집계는 ANALYTICS_STORE_BACKEND=disk 로
+# 워커 간에 공유합니다 (memory 로 바꾸면 워커마다 집계가 달라짐).
+#
+# SIGHUP 을 받으면 운동 카탈로그 스냅샷을 다시 읽은 뒤 워커마다 새 워커를 띄워 요청을 받을 준비가
+# 되면 기존 워커에 SIGTERM 을 보냅니다. 기존 워커는 바로 새 연결을 받지 않고, WEB_DRAIN_SECONDS 동안
+# 기존 keep-alive 연결의 응답에 Connection: close 를 붙여 클라이언트가 다른 워커로 다시 연결하게 한 뒤
+# 처리 중인 요청을 마치고(최대 WEB_GRACEFUL_TIMEOUT 초) 종료하므로 재시작 중에도 요청이 끊기지 않습니다.
+# 코드 변경을 반영하려면 WEB_PRELOAD=0 으로 실행하세요 (워커가 fork 후 앱을 import).
+import argparse
+import asyncio
+import gc
+import os
+import select
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+# 여러 워커가 같은 체중 모델 캐시 / 일별 집계를 쓰도록 기본 저장소를 공유 파일로 (환경 변수가 있으면 그대로)
+os.environ.setdefault("MODEL_CACHE_BACKEND", "shared")
+os.environ.setdefault("ANALYTICS_STORE_BACKEND", "disk")
+
+
+def log(message: str):
+    print(f"[serve {os.getpid()}] {message}", file=sys.stderr, flush=True)
+
+
+class ServeConfig:
+    def __init__(self, workers: int = 2, host: str = "0.0.0.0", port: int = 8000, preload: bool = True,
+                 graceful_timeout: float = 30, ready_timeout: float = 60, access_log: bool = True,
+                 drain_seconds: float = 2):
+        if workers < 1:
+            raise ValueError("워커 수는 1 이상이어야 합니다")
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.preload = preload
+        self.graceful_timeout = graceful_timeout
+        self.ready_timeout = ready_timeout
+        self.access_log = access_log
+        self.drain_seconds = drain_seconds
+
+    @classmethod
+    def from_env(cls) -> "ServeConfig":
+        """환경 변수(WEB_WORKERS, WEB_HOST, WEB_PORT, WEB_PRELOAD, WEB_GRACEFUL_TIMEOUT 등)로 생성"""
+        workers = os.getenv("WEB_WORKERS")
+        return cls(
+            workers=int(workers) if workers else (os.cpu_count() or 1),
+            host=os.getenv("WEB_HOST", "0.0.0.0"),
+            port=int(os.getenv("WEB_PORT", "8000")),
+            preload=os.getenv("WEB_PRELOAD", "1") not in ("0", "false", "False"),
+            graceful_timeout=float(os.getenv("WEB_GRACEFUL_TIMEOUT", "30")),
+            ready_timeout=float(os.getenv("WEB_READY_TIMEOUT", "60")),
+            access_log=os.getenv("WEB_ACCESS_LOG", "1") not in ("0", "false", "False"),
+            drain_seconds=float(os.getenv("WEB_DRAIN_SECONDS", "2")),
+        )
+
+
+class DrainingApp:
+    """종료 대기(draining) 중이면 모든 응답에 Connection: close 를 붙이는 ASGI 래퍼"""
+
+    def __init__(self, app):
+        self.app = app
+        self.draining = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.draining:
+            return await self.app(scope, receive, send)
+
+        async def send_closing(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"connection", b"close")]}
+            await send(message)
+
+        await self.app(scope, receive, send_closing)
+
+
+def _run_worker(sock: socket.socket, ready_fd: int, app, config: ServeConfig) -> int:
+    """fork 된 워커: 공유 소켓으로 uvicorn 을 실행하고, 요청을 받을 준비가 되면 ready_fd 에 알림"""
+    for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, signal.SIG_DFL)
+    import uvicorn
+    if app is None:
+        from main import app
+    draining_app = DrainingApp(app)
+
+    class DrainingServer(uvicorn.Server):
+        def handle_exit(self, sig, frame):
+            # 첫 SIGTERM: 새 연결을 받지 않고 drain_seconds 뒤에 uvicorn graceful 종료 시작
+            if draining_app.draining or config.drain_seconds <= 0:
+                return super().handle_exit(sig, frame)
+            draining_app.draining = True
+            loop.call_soon_threadsafe(self._drain)
+
+        def _drain(self):
+            for listener in self.servers:
+                listener.close()
+            loop.call_later(config.drain_seconds, super().handle_exit, signal.SIGTERM, None)
+
+    server = DrainingServer(uvicorn.Config(draining_app, lifespan="on", access_log=config.access_log,
+                                           timeout_graceful_shutdown=config.graceful_timeout))
+
+    async def serve():
+        nonlocal loop
+        loop = asyncio.get_running_loop()
+        task = asyncio.ensure_future(server.serve(sockets=[sock]))
+        while not server.started and not task.done():
+            await asyncio.sleep(0.02)
+        if server.started:
+            os.write(ready_fd, b"1")
+        os.close(ready_fd)
+        await task
+
+    loop = None
+    asyncio.run(serve())
+    return 0 if server.started else 1
+
+
+class Worker:
+    def __init__(self, pid: int, ready_fd: int):
+        self.pid = pid
+        self.ready_fd = ready_fd
+        self.started_at = time.monotonic()
+
+
+class Supervisor:
+    """워커 프로세스 생성 / 재시작 / rolling reload 를 관리하는 마스터"""
+
+    def __init__(self, config: ServeConfig):
+        self.config = config
+        self.workers: Dict[int, Worker] = {}
+        self.app = None
+        self._socket: Optional[socket.socket] = None
+        self._stopping = False
+        self._reload_requested = False
+
+    def run(self) -> int:
+        self._socket = socket.create_server((self.config.host, self.config.port), backlog=2048)
+        self._socket.set_inheritable(True)
+        os.environ["WEB_SUPERVISOR_PID"] = str(os.getpid())  # 워커의 카탈로그 reload API 가 SIGHUP 을 보냄
+        if self.config.preload:
+            from main import app
+            self.app = app
+        gc.freeze()
+
+        signal.signal(signal.SIGHUP, self._request_reload)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        log(f"http://{self.config.host}:{self.config.port} 에서 워커 {self.config.workers}개 시작")
+        for _ in range(self.config.workers):
+            worker = self._spawn()
+            if not self._wait_ready(worker):
+                log("워커를 시작하지 못했습니다")
+                self._stop_workers()
+                return 1
+
+        while not self._stopping:
+            time.sleep(0.2)
+            self._reap()
+            if self._reload_requested and not self._stopping:
+                self._reload_requested = False
+                self.rolling_reload()
+        self._stop_workers()
+        self._socket.close()
+        log("종료")
+        return 0
+
+    def rolling_reload(self) -> bool:
+        """워커를 하나씩 새 워커로 교체 (새 워커가 준비된 뒤 기존 워커를 graceful 종료)"""
+        log("rolling reload 시작")
+        if self.config.preload:
+            try:
+                self._reload_shared_state()
+            except Exception as e:
+                log(f"공유 상태 reload 실패, 기존 워커 유지: {e}")
+                return False
+
+        for old in list(self.workers.values()):
+            if self._stopping:
+                return False
+            new = self._spawn()
+            if not self._wait_ready(new):
+                log(f"새 워커 {new.pid} 가 준비되지 않아 reload 중단")
+                self._terminate([new])
+                return False
+            self._terminate([old])
+        log("rolling reload 완료")
+        return True
+
+    def _reload_shared_state(self):
+        """fork 전에 마스터에서 읽기 전용 상태(운동 카탈로그)를 다시 만듦"""
+        from services.ai_tasks import EXERCISE_CATALOG_PATH, reload_exercise_catalog_task
+        gc.unfreeze()
+        try:
+            if EXERCISE_CATALOG_PATH:
+                log(f"운동 카탈로그 {reload_exercise_catalog_task()}개 다시 로드")
+        finally:
+            gc.collect()
+            gc.freeze()
+
+    def _spawn(self) -> Worker:
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            code = 1
+            try:
+                code = _run_worker(self._socket, ready_write, self.app, self.config)
+            finally:
+                os._exit(code)
+        os.close(ready_write)
+        worker = Worker(pid, ready_read)
+        self.workers[pid] = worker
+        return worker
+
+    def _wait_ready(self, worker: Worker) -> bool:
+        try:
+            readable, _, _ = select.select([worker.ready_fd], [], [], self.config.ready_timeout)
+            return bool(readable) and os.read(worker.ready_fd, 1) == b"1"
+        finally:
+            os.close(worker.ready_fd)
+
+    def _reap(self):
+        """예기치 않게 종료된 워커를 새 워커로 교체"""
+        while self.workers:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            worker = self.workers.pop(pid, None)
+            if worker is None or self._stopping:
+                continue
+            log(f"워커 {pid} 종료됨 (status {status}), 다시 시작")
+            if time.monotonic() - worker.started_at < 1:
+                time.sleep(1)  # 시작 직후 죽는 워커를 빠르게 반복 생성하지 않음
+            new = self._spawn()
+            if not self._wait_ready(new):
+                log(f"워커 {new.pid} 가 준비되지 않았습니다")
+
+    def _terminate(self, workers: List[Worker]):
+        """SIGTERM 후 graceful 종료를 기다리고, 시간이 지나면 SIGKILL"""
+        for worker in workers:
+            try:
+                os.kill(worker.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.config.drain_seconds + self.config.graceful_timeout + 5
+        for worker in workers:
+            while True:
+                try:
+                    pid, _ = os.waitpid(worker.pid, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if pid:
+                    break
+                if time.monotonic() > deadline:
+                    log(f"워커 {worker.pid} 강제 종료")
+                    os.kill(worker.pid, signal.SIGKILL)
+                    os.waitpid(worker.pid, 0)
+                    break
+                time.sleep(0.05)
+            self.workers.pop(worker.pid, None)
+
+    def _stop_workers(self):
+        self._terminate(list(self.workers.values()))
+
+    def _request_reload(self, signum, frame):
+        self._reload_requested = True
+
+    def _request_stop(self, signum, frame):
+        self._stopping = True
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    config = ServeConfig.from_env()
+    parser = argparse.ArgumentParser(description="여러 워커 프로세스로 API 서버 실행")
+    parser.add_argument("--workers", type=int, default=config.workers, help="워커 프로세스 수")
+    parser.add_argument("--host", default=config.host)
+    parser.add_argument("--port", type=int, default=config.port)
+    parser.add_argument("--no-preload", action="store_true", help="워커가 fork 후 앱을 import (코드 변경 반영)")
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, "fork"):
+        print("여러 워커 모드는 fork 를 지원하는 OS 에서만 사용할 수 있습니다 (python main.py 로 실행)",
+              file=sys.stderr)
+        return 1
+    config = ServeConfig(args.workers, args.host, args.port, config.preload and not args.no_preload,
+                         config.graceful_timeout, config.ready_timeout, config.access_log, config.drain_seconds)
+    return Supervisor(config).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
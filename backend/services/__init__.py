@@ -0,0 +1 @@
+# 서비스 패키지
\ No newline at end of file
@@ -0,0 +1,96 @@
+# 워커 풀에서 실행되는 AI 연산 작업
+# 프로세스 풀에서도 pickle 로 전달할 수 있도록 모듈 수준 함수로 정의합니다.
+# 체중 예측 모델(numpy, 필요 시 pandas / scikit-learn)은 첫 예측 작업에서 import 합니다.
+import os
+
+from models.exercise_catalog import ExerciseCatalog
+from models.routine_recommendation import RoutineRecommendationModel
+from services.model_cache import weight_model_cache
+from services.routine_cache import routine_cache
+
+# exercises 테이블 스냅샷 경로 (JSON/CSV, 없으면 기본 종목 사용)
+EXERCISE_CATALOG_PATH = os.getenv("EXERCISE_CATALOG_PATH")
+
+# 워커(프로세스)마다 한 번만 생성
+routine_model = RoutineRecommendationModel(
+    ExerciseCatalog.from_file(EXERCISE_CATALOG_PATH) if EXERCISE_CATALOG_PATH else None
+)
+
+def check_exercise_catalog_task(path=None):
+    """운동 카탈로그 스냅샷을 읽어 보기만 하고 종목 수를 반환 (교체하지 않음)"""
+    path = path or EXERCISE_CATALOG_PATH
+    if not path:
+        raise ValueError("EXERCISE_CATALOG_PATH 가 설정되지 않았습니다")
+    return len(ExerciseCatalog.from_file(path))
+
+def reload_exercise_catalog_task(path=None):
+    """운동 카탈로그 스냅샷을 다시 읽어 교체하고 종목 수를 반환"""
+    path = path or EXERCISE_CATALOG_PATH
+    if not path:
+        raise ValueError("EXERCISE_CATALOG_PATH 가 설정되지 않았습니다")
+    exercise_count = len(routine_model.reload_catalog(path))
+    routine_cache.clear()  # 이전 카탈로그로 만든 루틴 제거
+    return exercise_count
+
+def generate_routine_task(user_profile):
+    """주간 운동 루틴 생성 (캐시 대상 프로필은 저장된 루틴 재사용)"""
+    return routine_cache.get_or_generate(user_profile, routine_model.generate_weekly_routine)
+
+def generate_routines_task(user_profiles):
+    """여러 프로필의 루틴 생성 (프로필별 오류는 해당 항목에만 기록)"""
+    results = []
+    for user_profile in user_profiles:
+        try:
+            results.append({"routine": generate_routine_task(user_profile)})
+        except Exception as e:
+            results.append({"error": f"루틴 생성 중 오류 발생: {str(e)}"})
+    return results
+
+def predict_weight_task(weight_data, days_ahead):
+    """체중 모델 학습(캐시 미적중 시) 및 예측"""
+    model = weight_model_cache.get_or_train(weight_data)
+    return model.predict_future_weight(days_ahead)
+
+def predict_weight_engine_task(weight_data, days_ahead, engine, level):
+    """지정한 예측 엔진으로 체중 / 체성분 예측과 예측 구간 계산"""
+    from models.weight_prediction_model import predict_weight_with_engine
+    return predict_weight_with_engine(weight_data, days_ahead, engine, level)
+
+def predict_weight_arrays_task(dates, weights, days_ahead):
+    """파싱된 날짜 / 체중 배열로 학습 및 예측"""
+    from models.weight_prediction_model import IncrementalWeightModel, MIN_RECORDS
+    if len(dates) < MIN_RECORDS:
+        raise ValueError("최소 5개의 체중 데이터가 필요합니다")
+    model = IncrementalWeightModel.from_arrays(dates, weights)
+    return model.predict_future_weight(days_ahead)
+
+def predict_account_weight_task(cached_model, dates, weights, days_ahead):
+    """캐시된 계정 모델(없으면 None)에 새로 조회한 기록을 반영하고 예측, (모델, 예측) 반환"""
+    from models.weight_prediction_model import IncrementalWeightModel
+    if cached_model is None:
+        model = IncrementalWeightModel.from_arrays(dates, weights)
+    elif len(dates):
+        # 캐시에 있는 객체는 다른 요청과 공유되므로 복사본을 갱신
+        model = IncrementalWeightModel.from_state(cached_model.get_state()).extend(dates, weights)
+    else:
+        model = cached_model
+    return model, model.predict_future_weight(days_ahead)
+
+def predict_weight_batch_task(weight_series, days_ahead):
+    """여러 사용자 체중 예측"""
+    from models.weight_prediction_model import predict_weight_batch
+    return predict_weight_batch(weight_series, days_ahead)
+
+def predict_weight_regressors_task(weight_data, days_ahead, regressors):
+    """에너지 수지 / 훈련 부하 설명 변수를 추가한 체중 모델 학습 및 예측"""
+    from models.weight_prediction_model import WeightPredictionModel
+    model = WeightPredictionModel().train(weight_data, regressors)
+    return {
+        "predictions": model.predict_future_weight(weight_data, days_ahead),
+        "regressor_coefficients": {name: round(coef, 6) for name, coef in model.regressor_coefficients().items()},
+    }
+
+def analyze_training_records_task(workouts, nutrition, body_weight, start_date, end_date, period, resting_calories):
+    """저장하지 않은 운동 / 식단 기록의 일별 / 주별 집계"""
+    from models.training_analytics import analyze_records
+    return analyze_records(workouts, nutrition, body_weight, start_date, end_date, period, resting_calories)
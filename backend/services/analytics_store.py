@@ -0,0 +1,180 @@
+# 계정별 칼로리 / 훈련 부하 일별 집계 저장소
+# 운동 / 식단 기록이 바뀐 날짜만 다시 집계(materialize)해 두고, 대시보드 조회는 일별 집계만 읽습니다.
+# 계정 수가 ANALYTICS_MAX_ACCOUNTS 를 넘으면 가장 오래 사용하지 않은 계정부터 메모리에서 제거합니다.
+# ANALYTICS_STORE_BACKEND=disk 이면 계정별 집계를 파일로 저장해 여러 워커 프로세스(serve.py)가 함께 씁니다.
+import contextlib
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Optional, Sequence
+
+if TYPE_CHECKING:
+    # numpy 를 쓰는 집계 모듈은 첫 기록 반영 시점에 import (앱 시작 시간 단축)
+    from models.training_analytics import DailyRollup, Regressors
+
+ANALYTICS_STORE_BACKENDS = ("memory", "disk")
+
+class AnalyticsStore:
+    """계정 ID -> DailyRollup
+
+    directory 를 지정하면 계정별 집계를 .npz 파일에 저장하고(임시 파일에 쓴 뒤 교체, 쓰기는 파일 잠금 안에서),
+    메모리에는 읽은 파일의 (inode, 수정 시각, 크기)와 함께 두어 다른 워커가 파일을 바꾸면 다시 읽습니다.
+    이 경우 ANALYTICS_MAX_ACCOUNTS 는 메모리에 둘 계정 수이며, 메모리에서 빠진 계정도 파일에는 남습니다.
+    """
+    SUFFIX = ".npz"
+
+    def __init__(self, max_accounts: int = 10000, directory: Optional[str] = None):
+        self.max_accounts = max_accounts
+        self.directory = directory
+        self._rollups: "OrderedDict[str, DailyRollup]" = OrderedDict()
+        self._signatures: Dict[str, tuple] = {}  # 계정 ID -> 읽은 파일의 (inode, 수정 시각, 크기)
+        self._lock = threading.Lock()
+        self.materialized_records = 0
+        self.evictions = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> "AnalyticsStore":
+        """환경 변수(ANALYTICS_STORE_BACKEND=memory|disk, ANALYTICS_STORE_DIR, ANALYTICS_MAX_ACCOUNTS)로 생성"""
+        backend = os.getenv("ANALYTICS_STORE_BACKEND", "memory")
+        if backend not in ANALYTICS_STORE_BACKENDS:
+            raise ValueError(f"지원하지 않는 집계 저장소입니다: {backend}")
+        directory = os.getenv("ANALYTICS_STORE_DIR", os.path.join(".cache", "analytics")) if backend == "disk" else None
+        return cls(int(os.getenv("ANALYTICS_MAX_ACCOUNTS", "10000")), directory)
+
+    def __len__(self):
+        return len(self._rollups)
+
+    def materialize(self, account_id: str, workouts: Sequence[Dict] = (), nutrition: Sequence[Dict] = (),
+                    body_weight: Optional[float] = None, replace: bool = True) -> Dict:
+        """계정의 일별 집계에 기록 반영, 집계 범위 반환"""
+        from models.training_analytics import DailyRollup
+        with self._lock, self._locked():
+            rollup = self._touch(account_id)
+            if rollup is None:
+                rollup = self._remember(account_id, DailyRollup())
+            try:
+                rollup.materialize(workouts, nutrition, body_weight, replace)
+            except ValueError:
+                if rollup.start is None:  # 반영하지 못한 새 계정은 남기지 않음
+                    self._forget(account_id)
+                raise
+            if self.directory:
+                self._save(account_id, rollup)
+            self.materialized_records += len(workouts) + len(nutrition)
+            return {"days": len(rollup), "start_date": rollup.start_date, "end_date": rollup.end_date}
+
+    def summary(self, account_id: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                period: str = "day", resting_calories: Optional[float] = None) -> Optional[Dict]:
+        """계정의 구간 집계 (집계가 없으면 None)"""
+        with self._lock:
+            rollup = self._touch(account_id)
+            if rollup is None:
+                return None
+            return rollup.summary(start_date, end_date, period, resting_calories)
+
+    def regressors(self, account_id: str, resting_calories: Optional[float] = None) -> Optional["Regressors"]:
+        """체중 예측용 일별 설명 변수 (집계가 없으면 None)"""
+        with self._lock:
+            rollup = self._touch(account_id)
+            return None if rollup is None else rollup.regressors(resting_calories)
+
+    def clear(self, account_id: str) -> bool:
+        with self._lock, self._locked():
+            removed = self._forget(account_id)
+            if self.directory:
+                try:
+                    os.remove(self._path(account_id))
+                    removed = True
+                except FileNotFoundError:
+                    pass
+            return removed
+
+    def _touch(self, account_id: str) -> Optional["DailyRollup"]:
+        """계정 집계 (디스크 저장소면 다른 워커가 바꾼 파일을 다시 읽음)"""
+        if self.directory:
+            self._refresh(account_id)
+        rollup = self._rollups.get(account_id)
+        if rollup is not None:
+            self._rollups.move_to_end(account_id)
+        return rollup
+
+    def _remember(self, account_id: str, rollup: "DailyRollup") -> "DailyRollup":
+        self._rollups[account_id] = rollup
+        self._rollups.move_to_end(account_id)
+        while len(self._rollups) > self.max_accounts:
+            evicted, _ = self._rollups.popitem(last=False)
+            self._signatures.pop(evicted, None)
+            self.evictions += 1
+        return rollup
+
+    def _forget(self, account_id: str) -> bool:
+        self._signatures.pop(account_id, None)
+        return self._rollups.pop(account_id, None) is not None
+
+    def _path(self, account_id: str) -> str:
+        name = hashlib.blake2b(account_id.encode(), digest_size=16).hexdigest()
+        return os.path.join(self.directory, name + self.SUFFIX)
+
+    @staticmethod
+    def _signature(stat: os.stat_result) -> tuple:
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _refresh(self, account_id: str):
+        """파일이 메모리의 집계와 다르면 다시 읽고, 파일이 없으면 메모리에서도 제거"""
+        from models.training_analytics import DailyRollup
+        path = self._path(account_id)
+        try:
+            signature = self._signature(os.stat(path))
+            if self._signatures.get(account_id) == signature and account_id in self._rollups:
+                return
+            rollup = DailyRollup.load(path)
+        except (OSError, ValueError):
+            # 파일이 없거나(다른 워커가 지움) 읽을 수 없는 형식
+            self._forget(account_id)
+            return
+        self._remember(account_id, rollup)
+        self._signatures[account_id] = signature
+
+    def _save(self, account_id: str, rollup: "DailyRollup"):
+        path = self._path(account_id)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            rollup.dump(f)
+        os.replace(tmp_path, path)
+        self._signatures[account_id] = self._signature(os.stat(path))
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """디스크 저장소면 워커 프로세스 간 쓰기 잠금 (읽기-수정-쓰기 사이에 다른 워커가 끼어들지 않도록)"""
+        if not self.directory:
+            yield
+            return
+        import fcntl  # POSIX 전용 (disk 저장소를 쓸 때만 필요)
+        with open(os.path.join(self.directory, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            days = sum(len(rollup) for rollup in self._rollups.values())
+        stats = {
+            "backend": "disk" if self.directory else "memory",
+            "accounts": len(self._rollups),
+            "days": days,
+            "materialized_records": self.materialized_records,
+            "evictions": self.evictions,
+            "max_accounts": self.max_accounts,
+        }
+        if self.directory:
+            stats["stored_accounts"] = sum(1 for entry in os.scandir(self.directory)
+                                           if entry.name.endswith(self.SUFFIX))
+        return stats
+
+# 앱 전역 집계 저장소
+analytics_store = AnalyticsStore.from_env()
@@ -0,0 +1,127 @@
+# CPU 연산용 워커 풀
+# 이벤트 루프를 막지 않도록 모델 연산을 스레드/프로세스 풀에서 실행하고,
+# 대기 중인 작업 수가 상한을 넘으면 바로 거절합니다.
+import asyncio
+import contextvars
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+
+from utils.metrics import record_timings, registry, request_timings
+
+class PoolOverloadedError(Exception):
+    """워커 풀 대기열이 가득 찬 경우"""
+
+def _call_with_timings(call):
+    """프로세스 풀 워커에서 실행: 단계별 시간(timed)을 모아 결과와 함께 부모로 돌려줌"""
+    timings = []
+    request_timings.set(timings)
+    return call(), timings
+
+class ComputePool:
+    def __init__(self, kind: str = "thread", max_workers: Optional[int] = None, max_queue: int = 32):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"지원하지 않는 워커 풀 종류입니다: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.in_flight = 0  # 실행 중 + 대기 중인 작업 수
+        self._executor: Optional[Executor] = None
+        self._initializer = None
+        self._initargs = ()
+    
+    @classmethod
+    def from_env(cls) -> "ComputePool":
+        """환경 변수(COMPUTE_POOL_KIND, COMPUTE_POOL_WORKERS, COMPUTE_POOL_MAX_QUEUE)로 생성"""
+        workers = os.getenv("COMPUTE_POOL_WORKERS")
+        return cls(
+            kind=os.getenv("COMPUTE_POOL_KIND", "thread"),
+            max_workers=int(workers) if workers else None,
+            max_queue=int(os.getenv("COMPUTE_POOL_MAX_QUEUE", "32")),
+        )
+    
+    @property
+    def capacity(self) -> int:
+        """동시에 받을 수 있는 최대 작업 수"""
+        return self.max_workers + self.max_queue
+    
+    @property
+    def queue_depth(self) -> int:
+        """워커를 기다리는 작업 수"""
+        return max(0, self.in_flight - self.max_workers)
+    
+    def start(self, initializer=None, initargs=()):
+        """워커 풀 생성 (이미 생성되어 있으면 무시)
+
+        initializer 는 프로세스 풀 워커마다 한 번 실행되며, 첫 요청을 기다리지 않고
+        모든 워커를 바로 띄워 백그라운드에서 초기화합니다.
+        """
+        if self._executor is not None:
+            return
+        if initializer is not None:
+            self._initializer, self._initargs = initializer, initargs
+        initializer, initargs = self._initializer, self._initargs
+        if self.kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 initializer=initializer, initargs=initargs)
+            if initializer is not None:
+                # 워커 수만큼 빈 작업을 넣어 모든 워커를 바로 띄움 (워커는 필요할 때 하나씩 생성됨)
+                for _ in range(self.max_workers):
+                    self._executor.submit(int)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="compute")
+    
+    def restart(self) -> bool:
+        """프로세스 풀 워커를 새 프로세스로 교체 (스레드 풀이면 아무것도 하지 않고 False)
+
+        워커 프로세스가 가진 모듈 상태(운동 카탈로그, 루틴 캐시 등)를 부모와 다시 맞출 때 사용합니다.
+        이후 작업은 새 워커에서 실행되고, 이전 워커에서 실행 중인 작업은 끝난 뒤 종료됩니다.
+        """
+        if self.kind != "process" or self._executor is None:
+            return False
+        old, self._executor = self._executor, None
+        self.start()
+        old.shutdown(wait=False)
+        return True
+    
+    def shutdown(self, wait: bool = True):
+        """워커 풀 종료 (대기 중인 작업은 취소)"""
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._executor = None
+    
+    async def run(self, fn, *args, **kwargs):
+        """fn(*args, **kwargs) 를 워커 풀에서 실행하고 결과를 기다림"""
+        if self.in_flight >= self.capacity:
+            raise PoolOverloadedError("요청이 많아 잠시 후 다시 시도해주세요")
+        self.start()
+        
+        call = partial(fn, *args, **kwargs)
+        if self.kind == "thread":
+            # 요청별 계측 정보(contextvars)가 워커 스레드에서도 보이도록 컨텍스트 복사
+            call = partial(contextvars.copy_context().run, call)
+        else:
+            # 워커 프로세스의 히스토그램은 /metrics 에 보이지 않으므로 단계별 시간을 결과와 함께 받아 부모에 기록
+            call = partial(_call_with_timings, call)
+        
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, call)
+        finally:
+            self.in_flight -= 1
+        if self.kind == "process":
+            result, timings = result
+            record_timings(timings)
+        return result
+
+# 앱 전역 워커 풀 (main.py 의 lifespan 에서 시작/종료)
+compute_pool = ComputePool.from_env()
+
+registry.gauge("compute_pool_in_flight", "워커 풀에서 실행 중이거나 대기 중인 작업 수",
+               callback=lambda: compute_pool.in_flight)
+registry.gauge("compute_pool_queue_depth", "워커를 기다리는 작업 수",
+               callback=lambda: compute_pool.queue_depth)
@@ -0,0 +1,70 @@
+# 예측 엔진별 지연 예산
+# 엔진마다 최근 처리 시간(워커 풀 대기 포함)의 지수이동평균을 기록하고, 예산을 넘었거나
+# 워커 풀에 대기 중인 작업이 있으면 비싼 엔진 대신 빠른 엔진(linear)으로 처리합니다.
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from utils.metrics import registry
+
+FAST_ENGINE = "linear"  # models.forecast_engines.FAST_ENGINE (numpy 를 불러오지 않도록 따로 정의)
+DEFAULT_BUDGETS_MS = {"holt": 50.0, "huber": 80.0}  # 없는 엔진은 예산 제한 없음
+
+DEGRADED_TOTAL = registry.counter(
+    "forecast_engine_degraded_total", "지연 예산 초과로 빠른 엔진으로 대체한 요청 수", labelnames=("engine",))
+
+def parse_budgets(value: str) -> Dict[str, float]:
+    """"holt=50,huber=80" 형식의 엔진별 예산(ms)"""
+    budgets = {}
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        name, _, budget = item.partition("=")
+        budgets[name.strip()] = float(budget)
+    return budgets
+
+class EngineBudget:
+    def __init__(self, budgets_ms: Optional[Dict[str, float]] = None, smoothing: float = 0.2,
+                 recovery: float = 0.8):
+        self.budgets_ms = dict(DEFAULT_BUDGETS_MS if budgets_ms is None else budgets_ms)
+        self.smoothing = smoothing  # 지수이동평균 가중치
+        self.recovery = recovery  # 대체할 때마다 추정치를 줄여 부하가 풀리면 다시 시도
+        self.latency_ms: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "EngineBudget":
+        """환경 변수(FORECAST_ENGINE_BUDGETS)로 기본 예산을 덮어써서 생성"""
+        budgets = dict(DEFAULT_BUDGETS_MS)
+        budgets.update(parse_budgets(os.getenv("FORECAST_ENGINE_BUDGETS", "")))
+        return cls(budgets)
+
+    def choose(self, engine: str, queue_depth: int = 0) -> Tuple[str, bool]:
+        """실제로 사용할 엔진과 대체 여부"""
+        budget = self.budgets_ms.get(engine)
+        if engine == FAST_ENGINE or budget is None:
+            return engine, False
+        with self._lock:
+            estimate = self.latency_ms.get(engine, 0.0)
+            if queue_depth <= 0 and estimate <= budget:
+                return engine, False
+            self.latency_ms[engine] = estimate * self.recovery
+        DEGRADED_TOTAL.inc(engine=engine)
+        return FAST_ENGINE, True
+
+    def record(self, engine: str, seconds: float):
+        """엔진 처리 시간 기록"""
+        elapsed_ms = seconds * 1000
+        with self._lock:
+            previous = self.latency_ms.get(engine)
+            self.latency_ms[engine] = elapsed_ms if previous is None else (
+                previous + self.smoothing * (elapsed_ms - previous))
+
+    def stats(self) -> Dict:
+        return {
+            "budgets_ms": dict(self.budgets_ms),
+            "latency_ms": {engine: round(value, 3) for engine, value in self.latency_ms.items()},
+        }
+
+# 앱 전역 엔진 예산
+engine_budget = EngineBudget.from_env()
@@ -0,0 +1,443 @@
+# 학습된 체중 모델 캐시
+# 정규화한 weight_data 의 해시를 키로 학습 결과(IncrementalWeightModel)를 저장해
+# 같은 데이터로 다시 요청하면 재학습 없이 예측만 수행합니다.
+import contextlib
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    # numpy 를 불러오는 모델 모듈은 첫 학습 시점에 import (앱 시작 시간 단축)
+    from models.weight_prediction_model import IncrementalWeightModel
+
+ENTRY_OVERHEAD_BYTES = 512  # 객체/딕셔너리 등 배열 외 메모리 추정치
+
+def normalize_weight_data(weight_data: List[Dict]) -> List[Dict]:
+    """모델이 학습에 쓰는 순서로 정렬하고 날짜(YYYY-MM-DD) / 체중(float) 형식을 통일한 기록 목록
+
+    날짜로만 정렬하며, 같은 날짜 기록의 순서는 이동평균 특성을 바꾸므로 체중으로 정렬하지 않고
+    모델(fast_weight_engine.build_features, pandas sort_values)과 같은 정렬로 정합니다.
+    """
+    import numpy as np
+    from models.weight_prediction_model import parse_record_dates
+    dates = parse_record_dates([record['date'] for record in weight_data])
+    order = np.argsort(dates)
+    iso_dates = np.datetime_as_string(dates[order]).tolist()
+    return [{'date': date, 'weight': float(weight_data[i]['weight'])} for date, i in zip(iso_dates, order.tolist())]
+
+def weight_data_key(normalized_data: List[Dict]) -> str:
+    """기록 목록의 내용 해시 (순서 포함)"""
+    digest = hashlib.blake2b(digest_size=16)
+    for record in normalized_data:
+        digest.update(f"{record['date']},{record['weight']!r};".encode())
+    return digest.hexdigest()
+
+def model_nbytes(model: "IncrementalWeightModel") -> int:
+    """캐시 항목 메모리 사용량 추정"""
+    return ENTRY_OVERHEAD_BYTES + sum(getattr(value, "nbytes", 0) for value in model.get_state().values())
+
+class MemoryModelStore:
+    """프로세스 내 LRU 저장소 (개수 / TTL / 메모리 상한)"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 600,
+                 max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> (model, expires_at, nbytes)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional["IncrementalWeightModel"]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            model, expires_at, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return model
+
+    def set(self, key: str, model: "IncrementalWeightModel"):
+        nbytes = model_nbytes(model)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (model, time.monotonic() + self.ttl_seconds, nbytes)
+            self.total_bytes += nbytes
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self.total_bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def _remove(self, key: str):
+        _, _, nbytes = self._entries.pop(key)
+        self.total_bytes -= nbytes
+
+class DiskModelStore:
+    """joblib 파일 저장소 (여러 uvicorn 워커가 같은 디렉터리를 공유)
+
+    파일 수정 시각을 마지막 사용 시각으로 사용해 TTL 과 LRU 제거를 처리합니다.
+    파일별 (마지막 사용 시각, 크기) 색인을 메모리에 두고 저장 시에는 색인만으로 상한을 검사하며,
+    다른 워커가 쓰거나 지운 파일은 RESCAN_INTERVAL 번 저장할 때마다 디렉터리를 다시 읽어 반영합니다.
+    """
+    SUFFIX = ".joblib"
+    RESCAN_INTERVAL = 256
+
+    def __init__(self, directory: str, max_entries: int = 10000, ttl_seconds: float = 3600,
+                 max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._index: Dict[str, tuple] = {}  # 경로 -> (마지막 사용 시각, 크기)
+        self._total_bytes = 0
+        self._sets_since_scan = 0
+        self._lock = threading.Lock()
+        self._rescan()
+
+    def __len__(self):
+        return len(self._index)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def get(self, key: str) -> Optional["IncrementalWeightModel"]:
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl_seconds < time.time():
+                os.remove(path)
+                self._forget(path)
+                self.evictions += 1
+                return None
+            from models.weight_prediction_model import IncrementalWeightModel
+            model = IncrementalWeightModel.load(path)
+            os.utime(path)  # 최근 사용 표시
+            with self._lock:
+                if path in self._index:
+                    self._index[path] = (time.time(), self._index[path][1])
+            return model
+        except (OSError, EOFError, ValueError):
+            # 다른 워커가 제거했거나 쓰는 중인 파일
+            return None
+
+    def set(self, key: str, model: "IncrementalWeightModel"):
+        # 임시 파일에 쓴 뒤 교체해 다른 워커가 반쯤 쓴 파일을 읽지 않도록 함
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        model.dump(tmp_path)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._forget_locked(path)
+            self._index[path] = (time.time(), size)
+            self._total_bytes += size
+            self._sets_since_scan += 1
+            rescan = self._sets_since_scan >= self.RESCAN_INTERVAL
+        if rescan:
+            self._rescan()
+        self._evict()
+
+    def clear(self):
+        for path in self._entry_paths():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._index.clear()
+            self._total_bytes = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def _entry_paths(self) -> List[str]:
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                if name.endswith(self.SUFFIX)]
+
+    def _rescan(self):
+        """디렉터리를 읽어 색인을 다시 만듦 (시작 시 / RESCAN_INTERVAL 번 저장마다)"""
+        index = {}
+        for path in self._entry_paths():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            index[path] = (stat.st_mtime, stat.st_size)
+        with self._lock:
+            self._index = index
+            self._total_bytes = sum(size for _, size in index.values())
+            self._sets_since_scan = 0
+
+    def _forget(self, path: str):
+        with self._lock:
+            self._forget_locked(path)
+
+    def _forget_locked(self, path: str):
+        entry = self._index.pop(path, None)
+        if entry is not None:
+            self._total_bytes -= entry[1]
+
+    def _evict(self):
+        """TTL 이 지난 파일과 개수 / 용량 상한을 넘는 오래된 파일 제거 (상한 안이면 정렬하지 않음)"""
+        with self._lock:
+            if len(self._index) <= self.max_entries and self._total_bytes <= self.max_bytes:
+                return
+            entries = sorted((last_used, size, path) for path, (last_used, size) in self._index.items())
+        now = time.time()
+        for last_used, size, path in entries:
+            expired = last_used + self.ttl_seconds < now
+            if not expired and len(self._index) <= self.max_entries and self._total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except OSError:
+                pass
+            self._forget(path)
+
+class SharedModelStore:
+    """mmap 된 .npy 파일의 고정 슬롯 저장소 (여러 워커가 같은 페이지를 공유, 직렬화 없음)
+
+    키 해시로 정한 버킷(WAYS 개 슬롯)에 모델 상태(충분통계량)를 그대로 기록합니다.
+    쓰기는 파일 잠금(flock) 안에서 슬롯의 seq 를 홀수 -> 짝수로 올리며 하고, 읽기는 잠금 없이
+    복사 전후 seq 가 같은 짝수일 때만 사용합니다 (쓰는 중인 슬롯은 미적중 처리).
+    버킷이 가득 차면 가장 오래 사용하지 않은 슬롯을 덮어씁니다.
+    """
+    WAYS = 4
+
+    def __init__(self, path: str, max_entries: int = 4096, ttl_seconds: float = 600):
+        self.path = path
+        self.buckets = max(1, -(-max_entries // self.WAYS))
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0  # 이 프로세스에서 덮어쓴 항목 수
+        self._slots = None  # 첫 사용 시 mmap (numpy 는 이때 import)
+        self._lock_path = path + ".lock"
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def slot_dtype():
+        import numpy as np
+        from models.weight_prediction_model import IncrementalWeightModel
+        return np.dtype([
+            ("seq", "<u8"), ("key", "V16"), ("last_used", "<f8"), ("expires_at", "<f8"),
+            ("version", "<i8"), ("count", "<i8"), ("base_day", "<i8"), ("last_day", "<i8"),
+            ("mean", "<f8", (4,)), ("comoment", "<f8", (4, 4)),
+            ("recent_count", "<i8"), ("recent_weights", "<f8", (IncrementalWeightModel.WINDOW,)),
+        ])
+
+    def _open(self):
+        if self._slots is not None:
+            return self._slots
+        import numpy as np
+        dtype, shape = self.slot_dtype(), (self.buckets, self.WAYS)
+        with self._locked():
+            try:
+                slots = np.lib.format.open_memmap(self.path, mode="r+")
+                if slots.dtype != dtype or slots.shape != shape:
+                    raise ValueError("저장소 형식이 다릅니다")
+            except (OSError, ValueError):
+                # 파일이 없거나 형식 / 크기가 바뀐 경우 새로 생성 (기존 항목은 버림)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                slots = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=shape)
+                slots.flush()
+                os.replace(tmp_path, self.path)
+        self._slots = slots
+        return slots
+
+    @contextlib.contextmanager
+    def _locked(self):
+        import fcntl  # POSIX 전용 (shared 저장소를 쓸 때만 필요)
+        with open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _locate(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        return digest, int.from_bytes(digest[:8], "little") % self.buckets
+
+    def __len__(self):
+        slots = self._open()
+        return int(((slots["seq"] > 0) & (slots["expires_at"] >= time.time())).sum())
+
+    @property
+    def total_bytes(self) -> int:
+        return len(self) * self._open().dtype.itemsize
+
+    def get(self, key: str) -> Optional["IncrementalWeightModel"]:
+        slots = self._open()
+        digest, bucket = self._locate(key)
+        row = slots[bucket]
+        for way in range(self.WAYS):
+            if row["key"][way].tobytes() != digest:
+                continue
+            seq = int(row["seq"][way])
+            entry = row[way].copy()
+            if seq % 2 or int(row["seq"][way]) != seq or entry["key"].tobytes() != digest:
+                return None  # 다른 워커가 쓰는 중
+            if entry["expires_at"] < time.time():
+                return None
+            row["last_used"][way] = time.time()  # LRU 표시 (경쟁해도 순서만 조금 달라짐)
+            try:
+                return self._model(entry)
+            except ValueError:
+                return None  # 이전 버전 모델 상태
+        return None
+
+    def set(self, key: str, model: "IncrementalWeightModel"):
+        slots = self._open()
+        digest, bucket = self._locate(key)
+        state = model.get_state()
+        recent = state["recent_weights"]
+        now = time.time()
+        with self._locked():
+            row = slots[bucket]
+            matches = [way for way in range(self.WAYS) if row["key"][way].tobytes() == digest]
+            if matches:
+                way = matches[0]
+            else:
+                way = int(row["last_used"].argmin())
+                if row["seq"][way] > 0 and row["expires_at"][way] >= now:
+                    self.evictions += 1
+            row["seq"][way] += 1  # 홀수: 쓰는 중
+            entry = row[way]
+            entry["key"] = digest
+            entry["last_used"] = now
+            entry["expires_at"] = now + self.ttl_seconds
+            entry["version"] = state["version"]
+            entry["count"] = state["count"]
+            entry["base_day"] = state["base_day"] if state["base_day"] is not None else 0
+            entry["last_day"] = state["last_day"] if state["last_day"] is not None else 0
+            entry["mean"] = state["mean"]
+            entry["comoment"] = state["comoment"]
+            entry["recent_count"] = len(recent)
+            entry["recent_weights"][:len(recent)] = recent
+            row["seq"][way] += 1
+
+    def clear(self):
+        slots = self._open()
+        with self._locked():
+            slots[...] = 0
+
+    @staticmethod
+    def _model(entry) -> "IncrementalWeightModel":
+        from models.weight_prediction_model import IncrementalWeightModel
+        return IncrementalWeightModel.from_state({
+            "version": int(entry["version"]),
+            "count": int(entry["count"]),
+            "base_day": int(entry["base_day"]),
+            "last_day": int(entry["last_day"]),
+            "mean": entry["mean"],
+            "comoment": entry["comoment"],
+            "recent_weights": entry["recent_weights"][:int(entry["recent_count"])],
+        })
+
+class WeightModelCache:
+    """weight_data 해시 -> 학습된 모델 캐시"""
+
+    def __init__(self, store=None):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "WeightModelCache":
+        """환경 변수(MODEL_CACHE_BACKEND=memory|disk|shared|off 등)로 생성"""
+        backend = os.getenv("MODEL_CACHE_BACKEND", "memory")
+        max_entries = int(os.getenv("MODEL_CACHE_MAX_ENTRIES", "1024"))
+        ttl_seconds = float(os.getenv("MODEL_CACHE_TTL", "600"))
+        max_bytes = int(os.getenv("MODEL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+        if backend == "off":
+            return cls(store=None)
+        if backend == "disk":
+            directory = os.getenv("MODEL_CACHE_DIR", os.path.join(".cache", "weight_models"))
+            return cls(DiskModelStore(directory, max_entries, ttl_seconds, max_bytes))
+        if backend == "shared":
+            path = os.getenv("MODEL_CACHE_SHARED_PATH", os.path.join(".cache", "weight_models.npy"))
+            return cls(SharedModelStore(path, max_entries, ttl_seconds))
+        if backend == "memory":
+            return cls(MemoryModelStore(max_entries, ttl_seconds, max_bytes))
+        raise ValueError(f"지원하지 않는 캐시 저장소입니다: {backend}")
+
+    def get_or_train(self, weight_data: List[Dict]) -> "IncrementalWeightModel":
+        """캐시된 모델을 반환하고, 없으면 학습 후 저장"""
+        if self.store is None:
+            return self._train(weight_data)
+
+        # 학습은 받은 기록 그대로 (캐시 없이 학습한 모델과 같은 순서), 키는 학습 순서로 정렬한 기록
+        key = weight_data_key(normalize_weight_data(weight_data))
+        model = self.store.get(key)
+        if model is not None:
+            self._count(hit=True)
+            return model
+
+        self._count(hit=False)
+        model = self._train(weight_data)
+        self.store.set(key, model)
+        return model
+
+    def get(self, key: str) -> Optional["IncrementalWeightModel"]:
+        """키로 저장된 모델 (계정별 모델 등 weight_data 해시가 아닌 키에 사용)"""
+        if self.store is None:
+            return None
+        model = self.store.get(key)
+        self._count(hit=model is not None)
+        return model
+
+    def set(self, key: str, model: "IncrementalWeightModel"):
+        if self.store is not None:
+            self.store.set(key, model)
+
+    def stats(self) -> Dict:
+        """적중 / 미적중 / 제거 횟수와 현재 크기"""
+        if self.store is None:
+            return {"backend": "off", "hits": self.hits, "misses": self.misses}
+        return {
+            "backend": type(self.store).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.store.evictions,
+            "entries": len(self.store),
+            "bytes": self.store.total_bytes,
+        }
+
+    def _train(self, weight_data: List[Dict]) -> "IncrementalWeightModel":
+        from models.weight_prediction_model import IncrementalWeightModel
+        model = IncrementalWeightModel.from_records(weight_data)
+        model.fit  # 최소 기록 수 검사 및 계수 계산을 저장 전에 수행
+        return model
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+# 앱 전역 체중 모델 캐시
+weight_model_cache = WeightModelCache.from_env()
@@ -0,0 +1,91 @@
+# 체중 예측 엔진 사전 준비 (warm-up)
+# 무거운 라이브러리는 첫 예측 요청에서 import 되므로, MODEL_WARMUP 에 지정한 엔진은
+# 앱 시작 직후 백그라운드에서 미리 import 하고 작은 데이터로 한 번 학습/예측해 둡니다.
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterable, Tuple
+
+WARMUP_ENGINES = ("numpy", "sklearn")
+
+# 엔진별 준비 소요 시간(초) — 프로세스 풀이면 워커가 보낸 결과 중 가장 느린 워커 기준
+warmup_status: Dict[str, float] = {}
+warmup_errors: Dict[str, str] = {}
+# 프로세스 풀이면 warm-up 을 마친 워커별 결과 (pid -> 엔진별 소요 시간)
+warmup_workers: Dict[int, Dict[str, float]] = {}
+
+def parse_engines(value: str) -> Tuple[str, ...]:
+    """쉼표로 구분한 엔진 목록 (예: "numpy,sklearn", 빈 값이면 warm-up 안 함)"""
+    engines = tuple(name.strip() for name in (value or "").split(",") if name.strip())
+    for engine in engines:
+        if engine not in WARMUP_ENGINES:
+            raise ValueError(f"지원하지 않는 warm-up 엔진입니다: {engine}")
+    return engines
+
+def _sample_weight_data(count: int = 14):
+    start = date(2024, 1, 1)
+    return [{"date": (start + timedelta(days=i)).isoformat(), "weight": 70.0 - 0.1 * i}
+            for i in range(count)]
+
+def warm_up(engines: Iterable[str]) -> Dict[str, float]:
+    """엔진 모듈을 import 하고 샘플 데이터로 학습/예측 한 번 실행"""
+    weight_data = _sample_weight_data()
+    for engine in engines:
+        start = time.perf_counter()
+        try:
+            if engine == "numpy":
+                from models.weight_prediction_model import IncrementalWeightModel, predict_weight_batch
+                IncrementalWeightModel.from_records(weight_data).predict_future_weight(7)
+                predict_weight_batch([weight_data, weight_data], 7)
+            elif engine == "sklearn":
+                from models.weight_prediction_model import WeightPredictionModel
+                model = WeightPredictionModel(backend="sklearn").train(weight_data)
+                model.predict_future_weight(weight_data, 7)
+        except Exception as e:
+            # warm-up 실패는 서비스에 영향을 주지 않음 (첫 요청에서 같은 오류가 다시 드러남)
+            warmup_errors[engine] = str(e)
+            print(f"[warmup {os.getpid()}] {engine} warm-up 실패: {e}", file=sys.stderr, flush=True)
+            continue
+        warmup_status[engine] = round(time.perf_counter() - start, 4)
+    return dict(warmup_status)
+
+def _warm_up_worker(engines: Tuple[str, ...], results):
+    """프로세스 풀 워커 초기화 함수: warm-up 후 결과를 부모 프로세스로 보냄"""
+    warm_up(engines)
+    results.put((os.getpid(), dict(warmup_status), dict(warmup_errors)))
+
+def _collect_worker_results(results, max_workers: int):
+    """워커가 보낸 warm-up 결과를 부모 프로세스의 상태에 합침 (엔진별로 가장 느린 워커 기준)"""
+    while True:
+        pid, status, errors = results.get()
+        warmup_workers[pid] = status
+        while len(warmup_workers) > max_workers:  # 워커 풀 재시작으로 사라진 워커
+            del warmup_workers[next(iter(warmup_workers))]
+        for engine, seconds in status.items():
+            warmup_status[engine] = max(seconds, warmup_status.get(engine, 0.0))
+        for engine, message in errors.items():
+            warmup_errors[engine] = f"워커 {pid}: {message}"
+
+def start_warm_up(pool, engines: Iterable[str]):
+    """워커 풀 종류에 맞게 백그라운드 warm-up 시작
+
+    스레드 풀은 같은 프로세스이므로 별도 스레드 하나에서, 프로세스 풀은 모든 워커의
+    초기화 함수로 실행하고 각 워커의 결과(소요 시간, 오류)를 큐로 받아 헬스 체크에 보여줍니다.
+    """
+    engines = tuple(engines)
+    if not engines:
+        return
+    if pool.kind == "process":
+        results = multiprocessing.SimpleQueue()
+        threading.Thread(target=_collect_worker_results, args=(results, pool.max_workers),
+                         name="model-warmup", daemon=True).start()
+        pool.start(initializer=_warm_up_worker, initargs=(engines, results))
+    else:
+        pool.start()
+        threading.Thread(target=warm_up, args=(engines,), name="model-warmup", daemon=True).start()
+
+# 환경 변수로 지정한 warm-up 엔진
+MODEL_WARMUP = parse_engines(os.getenv("MODEL_WARMUP", ""))
@@ -0,0 +1,90 @@
+# 운동 루틴 메모이제이션
+# 같은 프로필(수준, 목표, 요일 수, 시간, 선호 요일, seed, 가진 장비)이면 저장된 루틴을 바로 반환합니다.
+#   fresh  (기본): seed 를 지정한 요청만 저장 (seed 가 없으면 매번 새로운 루틴)
+#   cached       : seed 가 없는 요청도 저장 (같은 프로필은 TTL 동안 같은 루틴)
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Tuple
+
+ROUTINE_CACHE_MODES = ("fresh", "cached")
+
+def routine_profile_key(user_profile: Dict) -> Tuple[Hashable, ...]:
+    """루틴 생성 결과를 결정하는 프로필 값 (generate_weekly_routine 과 같은 기본값)"""
+    return (
+        user_profile.get('fitness_level', 'beginner'),
+        user_profile.get('goal', 'maintenance'),
+        user_profile.get('available_days', 3),
+        user_profile.get('time_per_session', 60),
+        tuple(user_profile.get('preferred_days', [])),
+        user_profile.get('seed'),
+        None if user_profile.get('available_equipment') is None
+        else tuple(sorted(set(user_profile['available_equipment']))),
+    )
+
+class RoutineCache:
+    """프로필 키 -> 생성된 루틴 LRU (반환된 루틴은 공유되므로 수정하지 않아야 함)"""
+
+    def __init__(self, mode: str = "fresh", max_entries: int = 4096):
+        if mode not in ROUTINE_CACHE_MODES:
+            raise ValueError(f"지원하지 않는 루틴 캐시 모드입니다: {mode}")
+        self.mode = mode
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RoutineCache":
+        """환경 변수(ROUTINE_CACHE_MODE, ROUTINE_CACHE_MAX_ENTRIES)로 생성"""
+        return cls(
+            mode=os.getenv("ROUTINE_CACHE_MODE", "fresh"),
+            max_entries=int(os.getenv("ROUTINE_CACHE_MAX_ENTRIES", "4096")),
+        )
+
+    def __len__(self):
+        return len(self._entries)
+
+    def is_cacheable(self, user_profile: Dict) -> bool:
+        return self.mode == "cached" or user_profile.get('seed') is not None
+
+    def get_or_generate(self, user_profile: Dict, generate: Callable[[Dict], Dict]) -> Dict:
+        """저장된 루틴을 반환하고, 없으면 generate(user_profile) 결과를 저장"""
+        if self.max_entries <= 0 or not self.is_cacheable(user_profile):
+            return generate(user_profile)
+
+        key = routine_profile_key(user_profile)
+        with self._lock:
+            routine = self._entries.get(key)
+            if routine is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return routine
+            self.misses += 1
+
+        routine = generate(user_profile)
+        with self._lock:
+            self._entries[key] = routine
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return routine
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
+
+# 앱 전역 루틴 캐시
+routine_cache = RoutineCache.from_env()
@@ -0,0 +1,68 @@
+# 동일 요청 합치기 (single-flight)
+# 같은 키의 계산이 이미 진행 중이면 새로 계산하지 않고 그 결과를 함께 기다립니다.
+# - 계산은 별도 태스크로 실행하므로 먼저 요청한 클라이언트의 연결이 끊겨도 다른 대기 요청은 결과를 받습니다.
+# - 계산이 실패하면 같은 예외가 모든 대기 요청에 전달됩니다.
+# - timeout 을 넘기면 해당 요청만 SingleFlightTimeoutError 로 끝나고 계산은 계속됩니다.
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+from utils.metrics import registry
+
+CALLS_TOTAL = registry.counter(
+    "single_flight_calls_total", "single-flight 호출 수 (leader: 직접 계산, follower: 진행 중인 계산 공유)",
+    labelnames=("name", "role"))
+TIMEOUTS_TOTAL = registry.counter(
+    "single_flight_timeouts_total", "single-flight 대기 시간 초과 수", labelnames=("name",))
+
+class SingleFlightTimeoutError(Exception):
+    """진행 중인 계산을 기다리다 시간 초과"""
+
+class SingleFlight:
+    def __init__(self, name: str, timeout: Optional[float] = 30.0):
+        self.name = name
+        self.timeout = timeout if timeout and timeout > 0 else None  # None 이면 제한 없음
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    @classmethod
+    def from_env(cls, name: str) -> "SingleFlight":
+        """환경 변수(SINGLE_FLIGHT_TIMEOUT, 초, 0 이면 제한 없음)로 생성"""
+        return cls(name, float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "30")))
+
+    def __len__(self):
+        return len(self._in_flight)
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable]):
+        """key 의 계산이 진행 중이면 그 결과를, 아니면 fn() 을 실행한 결과를 반환"""
+        task = self._in_flight.get(key)
+        if task is None:
+            CALLS_TOTAL.inc(name=self.name, role="leader")
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            CALLS_TOTAL.inc(name=self.name, role="follower")
+
+        try:
+            # shield: 대기 중인 요청이 취소되거나 시간 초과되어도 공유 계산은 계속 진행
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except asyncio.TimeoutError:
+            TIMEOUTS_TOTAL.inc(name=self.name)
+            raise SingleFlightTimeoutError(f"요청 처리 시간이 초과되었습니다 ({self.timeout:g}초)")
+
+    def _finish(self, key: Hashable, task: asyncio.Future):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # 기다리는 요청이 없을 때 "exception was never retrieved" 경고 방지
+
+    def stats(self) -> Dict:
+        leaders = CALLS_TOTAL.value(name=self.name, role="leader")
+        followers = CALLS_TOTAL.value(name=self.name, role="follower")
+        return {
+            "in_flight": len(self._in_flight),
+            "computations": int(leaders),
+            "coalesced": int(followers),  # 절약한 계산 수
+            "timeouts": int(TIMEOUTS_TOTAL.value(name=self.name)),
+            "timeout_seconds": self.timeout,
+        }
@@ -0,0 +1,165 @@
+# 계정별 체중 기록 조회 (Supabase PostgREST / 로컬 SQLite)
+# weight_records 에서 record_date, weight 두 열만 날짜순으로 가져와 WeightSeriesBuilder 배열에 바로 채웁니다.
+# PostgREST 는 앱 시작 시 만든 keep-alive 연결 풀(httpx.AsyncClient)을 재사용하고,
+# 응답을 CSV 로 받아 조각 단위로 파싱합니다. after 를 주면 그 날짜 이후 기록만 조회합니다.
+import asyncio
+import os
+import sqlite3
+import threading
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    # numpy 를 쓰는 파서는 첫 조회 시점에 import (앱 시작 시간 단축)
+    from services.weight_ingest import WeightSeriesBuilder
+
+HISTORY_TABLE = "weight_records"
+HISTORY_COLUMNS = "record_date,weight"
+PAGE_SIZE = 1000  # Supabase 기본 max-rows 이하로 페이지 단위 조회
+
+class WeightHistoryError(Exception):
+    """체중 기록 저장소 조회 실패"""
+
+def account_model_key(account_id: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> str:
+    """계정 / 조회 구간별 모델 캐시 키"""
+    return f"account-{account_id}-{start_date or ''}-{end_date or ''}"
+
+class PostgrestWeightHistory:
+    """Supabase(PostgREST) REST API 로 weight_records 조회"""
+
+    def __init__(self, url: str, api_key: str, max_connections: int = 10, timeout: float = 10.0,
+                 transport=None):
+        self.base_url = url.rstrip("/") + "/rest/v1"
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.transport = transport  # 테스트용 가짜 PostgREST (httpx.MockTransport 등)
+        self._client = None
+
+    def start(self):
+        """연결 풀 생성 (이미 생성되어 있으면 무시)"""
+        if self._client is not None:
+            return
+        import httpx
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"apikey": self.api_key, "Authorization": f"Bearer {self.api_key}",
+                     "Accept": "text/csv"},
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections),
+            timeout=self.timeout,
+            transport=self.transport,
+        )
+
+    async def close(self):
+        if self._client is None:
+            return
+        await self._client.aclose()
+        self._client = None
+
+    async def fetch(self, account_id: str, after: Optional[str] = None,
+                    start_date: Optional[str] = None, end_date: Optional[str] = None) -> "WeightSeriesBuilder":
+        """계정의 체중 기록 (after 초과, start_date 이상, end_date 이하 구간)"""
+        self.start()
+        params = [("select", HISTORY_COLUMNS), ("account_id", f"eq.{account_id}"),
+                  ("order", "record_date.asc")]
+        if after:
+            params.append(("record_date", f"gt.{after}"))
+        elif start_date:
+            params.append(("record_date", f"gte.{start_date}"))
+        if end_date:
+            params.append(("record_date", f"lte.{end_date}"))
+
+        import httpx
+        from services.weight_ingest import WeightSeriesBuilder
+        builder = WeightSeriesBuilder("csv")
+        offset = 0
+        while True:
+            page_params = params + [("limit", str(PAGE_SIZE)), ("offset", str(offset))]
+            before = builder.count
+            try:
+                async with self._client.stream("GET", f"/{HISTORY_TABLE}", params=page_params) as response:
+                    if response.status_code >= 400:
+                        await response.aread()
+                        raise WeightHistoryError(
+                            f"체중 기록 조회 실패 ({response.status_code}): {response.text[:200]}")
+                    async for chunk in response.aiter_bytes():
+                        builder.feed(chunk)
+            except httpx.HTTPError as e:
+                raise WeightHistoryError(f"체중 기록 저장소에 연결할 수 없습니다: {str(e)}")
+            builder.begin_part()
+            if builder.count - before < PAGE_SIZE:
+                return builder
+            offset += PAGE_SIZE
+
+class SQLiteWeightHistory:
+    """weight_records(account_id, record_date, weight) 테이블이 있는 로컬 SQLite (개발 / 테스트용)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._connection is not None:
+            return
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+
+    async def close(self):
+        if self._connection is None:
+            return
+        self._connection.close()
+        self._connection = None
+
+    async def fetch(self, account_id: str, after: Optional[str] = None,
+                    start_date: Optional[str] = None, end_date: Optional[str] = None) -> "WeightSeriesBuilder":
+        self.start()
+        return await asyncio.to_thread(self._fetch, account_id, after, start_date, end_date)
+
+    def _fetch(self, account_id, after, start_date, end_date) -> "WeightSeriesBuilder":
+        query = f"SELECT {HISTORY_COLUMNS} FROM {HISTORY_TABLE} WHERE account_id = ?"
+        args = [account_id]
+        if after:
+            query += " AND record_date > ?"
+            args.append(after)
+        elif start_date:
+            query += " AND record_date >= ?"
+            args.append(start_date)
+        if end_date:
+            query += " AND record_date <= ?"
+            args.append(end_date)
+        query += " ORDER BY record_date"
+
+        from services.weight_ingest import WeightSeriesBuilder
+        builder = WeightSeriesBuilder("csv")
+        try:
+            with self._lock:
+                for record_date, weight in self._connection.execute(query, args):
+                    builder.append(str(record_date), weight)
+        except sqlite3.Error as e:
+            raise WeightHistoryError(f"체중 기록 조회 실패: {str(e)}")
+        return builder
+
+def weight_history_from_env():
+    """환경 변수로 체중 기록 저장소 생성 (설정이 없으면 None)
+
+    WEIGHT_HISTORY_BACKEND: postgrest (SUPABASE_URL 이 있으면 기본값), sqlite 또는 off
+    """
+    supabase_url = os.getenv("SUPABASE_URL")
+    backend = os.getenv("WEIGHT_HISTORY_BACKEND", "postgrest" if supabase_url else "off")
+    if backend == "off":
+        return None
+    if backend == "postgrest":
+        if not supabase_url:
+            raise ValueError("SUPABASE_URL 이 설정되지 않았습니다")
+        return PostgrestWeightHistory(
+            supabase_url,
+            os.getenv("SUPABASE_KEY", ""),
+            max_connections=int(os.getenv("WEIGHT_HISTORY_MAX_CONNECTIONS", "10")),
+            timeout=float(os.getenv("WEIGHT_HISTORY_TIMEOUT", "10")),
+        )
+    if backend == "sqlite":
+        return SQLiteWeightHistory(os.getenv("WEIGHT_HISTORY_SQLITE_PATH", "weight_history.db"))
+    raise ValueError(f"지원하지 않는 체중 기록 저장소입니다: {backend}")
+
+# 앱 전역 체중 기록 저장소 (main.py 의 lifespan 에서 연결 생성/종료)
+weight_history = weight_history_from_env()
@@ -0,0 +1,134 @@
+# 체중 기록 스트리밍 파서
+# NDJSON / CSV 본문을 조각(chunk) 단위로 받아 줄마다 바로 파싱하고,
+# 미리 할당한 배열(날짜: 1970-01-01 기준 int32 일수, 체중: float32)에 채웁니다.
+# 전체 본문, 기록 딕셔너리 목록, DataFrame 을 만들지 않습니다.
+import codecs
+import csv
+import json
+from datetime import date
+
+import numpy as np
+
+INGEST_FORMATS = ("ndjson", "csv")
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+DATE_COLUMNS = ("date", "record_date")
+WEIGHT_COLUMN = "weight"
+
+def detect_format(content_type: str = "", filename: str = "") -> str:
+    """Content-Type 또는 파일 이름으로 형식 판별 (기본값 ndjson)"""
+    if "csv" in (content_type or "").lower() or (filename or "").lower().endswith(".csv"):
+        return "csv"
+    return "ndjson"
+
+class WeightSeriesBuilder:
+    """체중 기록을 점진적으로 파싱해 타입이 지정된 배열로 모으는 빌더"""
+
+    def __init__(self, fmt: str = "ndjson", initial_capacity: int = 1024):
+        if fmt not in INGEST_FORMATS:
+            raise ValueError(f"지원하지 않는 업로드 형식입니다: {fmt}")
+        self.fmt = fmt
+        self.count = 0
+        self._days = np.empty(initial_capacity, dtype=np.int32)
+        self._weights = np.empty(initial_capacity, dtype=np.float32)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._pending = ""  # 아직 줄바꿈이 오지 않은 마지막 줄
+        self._line_number = 0
+        self._date_index = None  # CSV 헤더에서 찾은 열 위치
+        self._weight_index = None
+
+    @property
+    def days(self) -> np.ndarray:
+        return self._days[:self.count]
+
+    @property
+    def weights(self) -> np.ndarray:
+        return self._weights[:self.count]
+
+    @property
+    def dates(self) -> np.ndarray:
+        """datetime64[D] 배열"""
+        return self.days.astype('datetime64[D]')
+
+    def feed(self, chunk: bytes):
+        """본문 조각 하나를 파싱"""
+        text = self._pending + self._decoder.decode(chunk)
+        lines = text.split("\n")
+        self._pending = lines.pop()
+        self._parse_lines(lines)
+
+    def close(self):
+        """남은 마지막 줄까지 파싱"""
+        self._flush()
+        if self.fmt == "csv" and self._date_index is None:
+            raise ValueError("CSV 헤더가 없습니다")
+
+    def begin_part(self):
+        """이어서 받을 새 본문(CSV 는 헤더부터)의 시작 — 여러 응답 페이지를 한 배열로 모을 때 사용"""
+        self._flush()
+        self._date_index = None
+        self._weight_index = None
+
+    def _flush(self):
+        text = self._pending + self._decoder.decode(b"", final=True)
+        self._pending = ""
+        if text:
+            self._parse_lines([text])
+
+    def _parse_lines(self, lines):
+        if self.fmt == "csv":
+            self._parse_csv(lines)
+        else:
+            self._parse_ndjson(lines)
+
+    def _parse_ndjson(self, lines):
+        for line in lines:
+            self._line_number += 1
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                record_date = record.get("date") or record.get("record_date")
+                self.append(record_date, record[WEIGHT_COLUMN])
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                raise ValueError(f"{self._line_number}번째 줄을 읽을 수 없습니다: {str(e)}")
+
+    def _parse_csv(self, lines):
+        for row in csv.reader(line.rstrip("\r") for line in lines):
+            self._line_number += 1
+            if not row or not any(field.strip() for field in row):
+                continue
+            if self._date_index is None:
+                self._read_header(row)
+                continue
+            try:
+                self.append(row[self._date_index], row[self._weight_index])
+            except (ValueError, IndexError) as e:
+                raise ValueError(f"{self._line_number}번째 줄을 읽을 수 없습니다: {str(e)}")
+
+    def _read_header(self, row):
+        columns = [field.strip().lower() for field in row]
+        date_columns = [name for name in DATE_COLUMNS if name in columns]
+        if not date_columns or WEIGHT_COLUMN not in columns:
+            raise ValueError("CSV 헤더에 date(또는 record_date)와 weight 열이 필요합니다")
+        self._date_index = columns.index(date_columns[0])
+        self._weight_index = columns.index(WEIGHT_COLUMN)
+
+    def append(self, record_date, weight):
+        """기록 하나 추가 (record_date: YYYY-MM-DD 문자열)"""
+        if self.count == len(self._days):
+            self._grow()
+        if not isinstance(record_date, str):
+            raise ValueError("날짜가 없습니다")
+        weight = float(weight)
+        if not np.isfinite(weight):
+            raise ValueError("체중 값이 올바르지 않습니다")
+        self._days[self.count] = date.fromisoformat(record_date.strip()).toordinal() - EPOCH_ORDINAL
+        self._weights[self.count] = weight
+        self.count += 1
+
+    def _grow(self):
+        """용량을 두 배로 늘림 (기록 수에 대해 분할 상환 O(1))"""
+        capacity = max(1, 2 * len(self._days))
+        self._days = np.resize(self._days, capacity)
+        self._weights = np.resize(self._weights, capacity)
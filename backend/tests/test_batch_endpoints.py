@@ -0,0 +1,131 @@
+# 일괄 / 스트리밍 엔드포인트 (NDJSON 루틴 일괄 생성, 일괄 체중 예측, 스트리밍 업로드)
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from api import ai_routes
+from benchmarks.synthetic import weight_series
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def _ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_routine_batch_returns_every_index_and_reuses_duplicates(client):
+    profile = {"fitness_level": "beginner", "goal": "weight_loss", "available_days": 3, "seed": 7}
+    other = {"fitness_level": "advanced", "goal": "muscle_gain", "available_days": 4, "seed": 7}
+    response = client.post("/api/generate-routine/batch", json={"profiles": [profile, other, profile]})
+    assert response.status_code == 200
+    lines = {line["index"]: line for line in _ndjson(response)}
+    assert sorted(lines) == [0, 1, 2]
+    assert lines[0]["routine"] == lines[2]["routine"]
+    assert lines[1]["routine"]["user_profile"]["goal"] == "muscle_gain"
+
+
+def test_routine_batch_reports_invalid_profile_per_line(client):
+    profiles = [{"goal": "bulk"}, {"goal": "maintenance", "seed": 1}]
+    lines = {line["index"]: line for line in _ndjson(client.post("/api/generate-routine/batch",
+                                                                   json={"profiles": profiles}))}
+    assert "error" in lines[0]
+    assert "routine" in lines[1]
+
+
+def test_routine_batch_emits_error_lines_when_chunk_fails(client, monkeypatch):
+    def broken(user_profiles):
+        raise RuntimeError("worker crashed")
+
+    monkeypatch.setattr(ai_routes, "generate_routines_task", broken)
+    profiles = [{"seed": i} for i in range(3)]
+    response = client.post("/api/generate-routine/batch", json={"profiles": profiles})
+    assert response.status_code == 200
+    lines = _ndjson(response)
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+    assert all("worker crashed" in line["error"] for line in lines)
+
+
+def test_unseeded_profiles_are_not_coalesced_in_fresh_mode(client, monkeypatch):
+    monkeypatch.setattr(ai_routes.routine_cache, "mode", "fresh")
+    calls = []
+
+    def generate(user_profiles):
+        calls.append(len(user_profiles))
+        return [{"seed": profile["seed"]} for profile in user_profiles]
+
+    monkeypatch.setattr(ai_routes, "generate_routines_task", generate)
+    profile = {"fitness_level": "beginner", "goal": "weight_loss"}
+    response = client.post("/api/generate-routine/batch", json={"profiles": [profile, profile, {**profile, "seed": 1},
+                                                                             {**profile, "seed": 1}]})
+    assert sorted(line["index"] for line in _ndjson(response)) == [0, 1, 2, 3]
+    assert sum(calls) == 3
+
+    computations = ai_routes.routine_flight.stats()["computations"]
+    assert client.post("/api/generate-routine", json=profile).status_code == 200
+    assert ai_routes.routine_flight.stats()["computations"] == computations
+
+
+def test_generate_routine_rejects_unknown_level(client):
+    response = client.post("/api/generate-routine", json={"fitness_level": "expert", "goal": "muscle_gain"})
+    assert response.status_code == 400
+
+
+def test_weight_batch_isolates_user_errors(client):
+    good = weight_series(30, seed=1)
+    users = [{"user_id": "a", "weight_data": good},
+             {"user_id": "b", "weight_data": good[:3]}]
+    body = client.post("/api/predict-weight/batch", json={"users": users, "days_ahead": 7}).json()
+    assert body["success_count"] == 1 and body["error_count"] == 1
+    single = client.post("/api/predict-weight", json={"weight_data": good, "days_ahead": 7}).json()
+    assert body["results"][0]["predictions"] == single["predictions"]
+    assert "error" in body["results"][1]
+
+
+def test_weight_stream_ndjson_and_csv_agree(client):
+    records = sorted(weight_series(40, seed=2, duplicate_prob=0), key=lambda record: record["date"])
+    ndjson = "".join(json.dumps(record) + "\n" for record in records)
+    csv_body = "date,weight\n" + "".join(f"{r['date']},{r['weight']}\n" for r in records)
+    from_ndjson = client.post("/api/predict-weight/stream?days_ahead=5", content=ndjson,
+                              headers={"Content-Type": "application/x-ndjson"}).json()
+    from_csv = client.post("/api/predict-weight/stream?days_ahead=5", content=csv_body,
+                           headers={"Content-Type": "text/csv"}).json()
+    assert from_ndjson["input_data_count"] == 40
+    assert from_ndjson["predictions"] == from_csv["predictions"]
+    assert len(from_ndjson["predictions"]) == 5
+
+
+@pytest.mark.parametrize("body, content_type", [
+    ('{"date": "2024-01-01", "weight": 70}\nnot json\n', "application/x-ndjson"),
+    ("2024-01-01,70\n", "text/csv"),
+    ("".join(f'{{"date": "2024-01-0{i}", "weight": 70}}\n' for i in range(1, 4)), "application/x-ndjson"),
+])
+def test_weight_stream_rejects_bad_input(client, body, content_type):
+    response = client.post("/api/predict-weight/stream", content=body, headers={"Content-Type": content_type})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("days_ahead", [0, ai_routes.MAX_DAYS_AHEAD + 1, 6000])
+def test_predict_weight_rejects_out_of_range_days_ahead(client, days_ahead):
+    data = weight_series(30, seed=1)
+    response = client.post("/api/predict-weight",
+                           json={"weight_data": data, "days_ahead": days_ahead, "engine": "linear"})
+    assert response.status_code == 422
+    response = client.post(f"/api/predict-weight/stream?days_ahead={days_ahead}",
+                           content="".join(json.dumps(record) + "\n" for record in data),
+                           headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 422
+
+
+def test_linear_engine_interval_at_max_days_ahead(client):
+    data = weight_series(60, seed=2)
+    response = client.post("/api/predict-weight", json={"weight_data": data, "days_ahead": ai_routes.MAX_DAYS_AHEAD,
+                                                        "engine": "linear"})
+    assert response.status_code == 200
+    predictions = response.json()["predictions"]
+    assert len(predictions) == ai_routes.MAX_DAYS_AHEAD
@@ -0,0 +1,51 @@
+# 운동 카탈로그 인덱스 (장비 / 근육 부위) 와 장비 조건 루틴 생성
+from models.exercise_catalog import ExerciseCatalog
+from models.routine_recommendation import RoutineRecommendationModel
+
+RECORDS = [
+    {"name": "푸시업", "category": "strength", "difficulty_level": "beginner", "muscle_groups": ["chest"]},
+    {"name": "덤벨 프레스", "category": "strength", "difficulty_level": "intermediate",
+     "muscle_groups": ["chest"], "equipment": ["dumbbell"]},
+    {"name": "벤치프레스", "category": "strength", "difficulty_level": "advanced",
+     "muscle_groups": ["chest", "triceps"], "equipment": "{barbell,bench}"},
+    {"name": "스쿼트", "category": "strength", "difficulty_level": "beginner", "muscle_groups": ["legs"]},
+    {"name": "고블릿 스쿼트", "category": "strength", "difficulty_level": "beginner",
+     "muscle_groups": ["legs"], "equipment": ["dumbbell"]},
+    {"name": "로잉머신", "category": "cardio", "difficulty_level": "beginner", "equipment": ["rower"]},
+    {"name": "걷기", "category": "cardio", "difficulty_level": "beginner"},
+    {"name": "스트레칭", "category": "flexibility", "difficulty_level": "beginner"},
+]
+
+
+def test_equipment_index():
+    catalog = ExerciseCatalog(RECORDS)
+    assert [catalog.get(i).name for i in catalog.by_equipment("dumbbell")] == ["덤벨 프레스", "고블릿 스쿼트"]
+    assert {catalog.get(i).name for i in catalog.by_equipment(None)} == {"푸시업", "스쿼트", "걷기", "스트레칭"}
+    # 필요한 장비를 모두 가져야 함
+    assert "벤치프레스" not in catalog.names_for_equipment(["barbell"])
+    assert "벤치프레스" in catalog.names_for_equipment(["barbell", "bench"])
+    assert catalog.names_for_equipment([]) == {"푸시업", "스쿼트", "걷기", "스트레칭"}
+
+
+def test_muscle_sets_are_built_eagerly():
+    catalog = ExerciseCatalog(RECORDS)
+    before = dict(vars(catalog))
+    assert catalog.names_by_muscle_set("strength", "upper", "intermediate") == ("푸시업", "덤벨 프레스")
+    assert catalog.names_by_muscle_set("strength", "full", "advanced") == \
+        ("푸시업", "덤벨 프레스", "벤치프레스", "스쿼트", "고블릿 스쿼트")
+    assert catalog.names_by_muscle_groups("strength", ("legs",), "beginner") == ("스쿼트", "고블릿 스쿼트")
+    assert vars(catalog) == before  # 조회가 카탈로그 상태를 바꾸지 않음
+
+
+def test_routine_uses_only_available_equipment():
+    model = RoutineRecommendationModel(ExerciseCatalog(RECORDS))
+    for goal in ("weight_loss", "muscle_gain", "maintenance"):
+        routine = model.generate_weekly_routine({"fitness_level": "advanced", "goal": goal, "available_days": 5,
+                                                 "available_equipment": [], "seed": 3})
+        names = {exercise["name"] for day in routine["weekly_routine"].values() for exercise in day["exercises"]}
+        assert names and names <= {"푸시업", "스쿼트", "걷기", "스트레칭"}
+
+    routine = model.generate_weekly_routine({"fitness_level": "beginner", "goal": "weight_loss",
+                                             "available_equipment": ["rower", "dumbbell"], "seed": 3})
+    names = {exercise["name"] for day in routine["weekly_routine"].values() for exercise in day["exercises"]}
+    assert "벤치프레스" not in names
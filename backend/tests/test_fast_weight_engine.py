@@ -0,0 +1,49 @@
+# NumPy 고속 엔진과 기존 pandas / scikit-learn 경로의 결과 비교
+import warnings
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import weight_series
+from models import fast_weight_engine
+from models.weight_prediction_model import WeightPredictionModel, parse_record_dates
+
+
+@pytest.mark.parametrize("n", [5, 50, 500])
+def test_numpy_matches_sklearn(n):
+    data = weight_series(n, seed=n)
+    fast = WeightPredictionModel(backend="numpy").train(data).predict_future_weight(data, 30, as_array=True)
+    slow = WeightPredictionModel(backend="sklearn").train(data).predict_future_weight(data, 30, as_array=True)
+    np.testing.assert_allclose(fast, slow, rtol=1e-9, atol=1e-9)
+
+
+def test_numpy_prediction_dates_match_sklearn():
+    data = weight_series(40, seed=1)
+    fast = WeightPredictionModel(backend="numpy").train(data).predict_future_weight(data, 14)
+    slow = WeightPredictionModel(backend="sklearn").train(data).predict_future_weight(data, 14)
+    assert [p["date"] for p in fast] == [p["date"] for p in slow]
+
+
+def test_rolling_mean_matches_pandas():
+    pd = pytest.importorskip("pandas")
+    values = np.random.default_rng(0).normal(70, 2, 100)
+    for window in (3, 7):
+        expected = pd.Series(values).rolling(window, min_periods=1).mean().to_numpy()
+        np.testing.assert_allclose(fast_weight_engine.rolling_mean(values, window), expected)
+
+
+def test_parse_dates_rejects_non_iso():
+    with pytest.raises(ValueError):
+        fast_weight_engine.parse_dates(["2024/01/02"])
+
+
+def test_parse_record_dates_falls_back_to_pandas_without_warning():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        dates = parse_record_dates(["2024/01/02", "2024-01-03T10:00", "2024.01.05"])
+    assert [str(d) for d in dates] == ["2024-01-02", "2024-01-03", "2024-01-05"]
+
+
+def test_train_requires_min_records():
+    with pytest.raises(ValueError):
+        WeightPredictionModel().train(weight_series(4, seed=0, duplicate_prob=0))
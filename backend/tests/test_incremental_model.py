@@ -0,0 +1,103 @@
+# 증분 체중 모델 (충분통계량 갱신, 상태 직렬화, 계정 예측 엔드포인트)
+import sqlite3
+import uuid
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from api import ai_routes
+from benchmarks.synthetic import weight_series
+from models.weight_prediction_model import IncrementalWeightModel, WeightPredictionModel
+from services.weight_history import SQLiteWeightHistory
+
+
+def _sorted_series(n, seed):
+    """날짜순, 날짜 중복 없는 기록 (중복 날짜의 순서는 전체 재계산의 정렬 방식에 따라 달라짐)"""
+    by_date = {record["date"]: record for record in weight_series(n, seed=seed)}
+    return [by_date[day] for day in sorted(by_date)]
+
+
+def test_incremental_updates_match_full_refit():
+    data = _sorted_series(120, seed=3)
+    model = IncrementalWeightModel.from_records(data[:10])
+    for record in data[10:]:
+        model.update(record)
+    full = IncrementalWeightModel.from_records(data)
+    assert model.count == full.count
+    np.testing.assert_allclose(model.predict_future_weight(30, as_array=True),
+                               full.predict_future_weight(30, as_array=True), rtol=1e-9)
+
+
+def test_incremental_matches_batch_model():
+    data = _sorted_series(60, seed=5)
+    incremental = IncrementalWeightModel.from_records(data).predict_future_weight(14, as_array=True)
+    batch = WeightPredictionModel(backend="numpy").train(data).predict_future_weight(data, 14, as_array=True)
+    np.testing.assert_allclose(incremental, batch, rtol=1e-9)
+
+
+def test_state_round_trip():
+    model = IncrementalWeightModel.from_records(_sorted_series(30, seed=1))
+    restored = IncrementalWeightModel.from_state(model.get_state())
+    assert restored.last_date == model.last_date
+    assert restored.predict_future_weight(7) == model.predict_future_weight(7)
+
+
+def test_empty_model_raises_value_error():
+    with pytest.raises(ValueError):
+        IncrementalWeightModel().predict_future_weight(7)
+    with pytest.raises(ValueError):
+        IncrementalWeightModel.from_records(_sorted_series(3, seed=2)).predict_future_weight(7)
+
+
+def test_older_date_is_rejected():
+    data = _sorted_series(10, seed=4)
+    model = IncrementalWeightModel.from_records(data[1:])
+    with pytest.raises(ValueError):
+        model.update(data[0])
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    path = str(tmp_path / "weight_history.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE weight_records (account_id TEXT, record_date TEXT, weight REAL)")
+    history = SQLiteWeightHistory(path)
+    monkeypatch.setattr(ai_routes, "weight_history", history)
+    with TestClient(main.app) as test_client:
+        yield test_client, path
+    if history._connection is not None:
+        history._connection.close()
+
+
+def test_account_without_enough_records_returns_400(client):
+    test_client, path = client
+    empty = uuid.uuid4()
+    assert test_client.get(f"/api/users/{empty}/predict-weight").status_code == 400
+
+    few = uuid.uuid4()
+    with sqlite3.connect(path) as connection:
+        connection.executemany("INSERT INTO weight_records VALUES (?, ?, ?)",
+                               [(str(few), record["date"], record["weight"]) for record in _sorted_series(3, seed=6)])
+    assert test_client.get(f"/api/users/{few}/predict-weight").status_code == 400
+
+
+def test_account_prediction_picks_up_new_records(client):
+    test_client, path = client
+    account = uuid.uuid4()
+    data = _sorted_series(40, seed=8)
+    with sqlite3.connect(path) as connection:
+        connection.executemany("INSERT INTO weight_records VALUES (?, ?, ?)",
+                               [(str(account), record["date"], record["weight"]) for record in data[:30]])
+    first = test_client.get(f"/api/users/{account}/predict-weight", params={"days_ahead": 7}).json()
+    assert first["input_data_count"] == 30
+
+    with sqlite3.connect(path) as connection:
+        connection.executemany("INSERT INTO weight_records VALUES (?, ?, ?)",
+                               [(str(account), record["date"], record["weight"]) for record in data[30:]])
+    second = test_client.get(f"/api/users/{account}/predict-weight", params={"days_ahead": 7}).json()
+    assert second["input_data_count"] == len(data)
+    assert second["fetched_records"] == len(data) - 30
+    expected = IncrementalWeightModel.from_records(data).predict_future_weight(7)
+    assert [p["predicted_weight"] for p in second["predictions"]] == [p["predicted_weight"] for p in expected]
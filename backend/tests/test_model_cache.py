@@ -0,0 +1,77 @@
+# 체중 모델 저장소 (mmap 공유 슬롯, 디스크)
+import hashlib
+import itertools
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import weight_series
+from models.weight_prediction_model import IncrementalWeightModel, WeightPredictionModel
+from services.model_cache import (DiskModelStore, MemoryModelStore, SharedModelStore, WeightModelCache,
+                                 normalize_weight_data, weight_data_key)
+
+
+def _model(seed):
+    data = sorted(weight_series(30, seed=seed, duplicate_prob=0), key=lambda record: record["date"])
+    return IncrementalWeightModel.from_records(data)
+
+
+def _key_with_trailing_nul():
+    """해시 마지막 바이트가 0 인 키 (S16 처럼 끝의 NUL 을 잘라내는 형식이면 적중하지 않음)"""
+    for i in itertools.count():
+        key = f"account-{i}"
+        if hashlib.blake2b(key.encode(), digest_size=16).digest().endswith(b"\0"):
+            return key
+
+
+@pytest.mark.parametrize("key", ["account-a", _key_with_trailing_nul()])
+def test_shared_store_round_trip(tmp_path, key):
+    store = SharedModelStore(str(tmp_path / "models.npy"), max_entries=16)
+    model = _model(1)
+    store.set(key, model)
+    restored = store.get(key)
+    assert restored is not None
+    np.testing.assert_array_equal(restored.predict_future_weight(7, as_array=True),
+                                  model.predict_future_weight(7, as_array=True))
+
+    # 다른 프로세스처럼 같은 파일을 새로 열어도 보임
+    assert SharedModelStore(str(tmp_path / "models.npy"), max_entries=16).get(key) is not None
+
+
+def test_shared_store_overwrites_same_key(tmp_path):
+    store = SharedModelStore(str(tmp_path / "models.npy"), max_entries=16)
+    key = _key_with_trailing_nul()
+    store.set(key, _model(1))
+    store.set(key, _model(2))
+    assert len(store) == 1
+    assert store.get(key).last_date == _model(2).last_date
+
+
+def test_disk_store_evicts_least_recently_used(tmp_path):
+    store = DiskModelStore(str(tmp_path / "models"), max_entries=2)
+    for name in ("a", "b"):
+        store.set(name, _model(1))
+    assert store.get("a") is not None
+    store.set("c", _model(1))
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+    assert len(store) == 2
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_cached_prediction_matches_uncached_model_with_duplicate_dates(seed):
+    data = weight_series(80, seed=seed, duplicate_prob=0.2)
+    cache = WeightModelCache(MemoryModelStore())
+    expected = WeightPredictionModel(backend="sklearn").train(data).predict_future_weight(data, 14, as_array=True)
+    for _ in range(2):  # 미적중(학습) 후 적중
+        np.testing.assert_allclose(cache.get_or_train(data).predict_future_weight(14, as_array=True),
+                                   expected, rtol=1e-9, atol=1e-9)
+    assert cache.hits == 1
+
+
+def test_same_date_order_changes_cache_key():
+    data = [{"date": f"2024-01-{day:02d}", "weight": 70.0 + day % 3} for day in range(1, 11)]
+    data += [{"date": "2024-01-10", "weight": 75.0}]
+    swapped = data[:-2] + [data[-1], data[-2]]
+    assert weight_data_key(normalize_weight_data(data)) != weight_data_key(normalize_weight_data(swapped))
+    assert normalize_weight_data(list(reversed(data[:-2])) + data[-2:]) == normalize_weight_data(data)
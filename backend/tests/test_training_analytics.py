@@ -0,0 +1,79 @@
+# 칼로리 / 훈련 부하 일별 집계 (기간 상한, 집계 저장소 엔드포인트)
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from benchmarks.synthetic import weight_series
+from models.training_analytics import MAX_SPAN_DAYS, DailyRollup
+from services.analytics_store import AnalyticsStore, analytics_store
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def _workout(day):
+    return {"workout_date": day, "total_duration": 60, "total_calories_burned": 400, "perceived_exertion": 6}
+
+
+def test_rollup_rejects_span_over_limit():
+    rollup = DailyRollup().materialize([_workout("2024-01-01")])
+    with pytest.raises(ValueError):
+        rollup.materialize([_workout("9999-12-31")])
+    with pytest.raises(ValueError):
+        rollup.materialize([_workout("0001-01-01")])
+    assert len(rollup) == 1
+
+    with pytest.raises(ValueError):
+        DailyRollup().materialize([_workout("2000-01-01"), _workout("2030-01-01")])
+    last = str(date(2000, 1, 1) + timedelta(days=MAX_SPAN_DAYS - 1))
+    assert len(DailyRollup().materialize([_workout("2000-01-01"), _workout(last)])) == MAX_SPAN_DAYS
+
+
+def test_materialize_out_of_range_dates_returns_400_without_keeping_account(client):
+    account = str(uuid.uuid4())
+    response = client.post(f"/api/analytics/{account}/records",
+                           json={"workouts": [_workout("1900-01-01"), _workout("2024-01-01")]})
+    assert response.status_code == 400
+    assert client.get(f"/api/analytics/{account}/summary").status_code == 404
+    assert analytics_store.clear(account) is False
+
+
+def test_predict_weight_with_training_regressors(client):
+    account = str(uuid.uuid4())
+    data = sorted(weight_series(60, seed=3, duplicate_prob=0), key=lambda record: record["date"])
+    workouts = [_workout(record["date"]) for record in data[::2]]
+    nutrition = [{"meal_date": record["date"], "total_calories": 2200} for record in data]
+    assert client.post(f"/api/analytics/{account}/records",
+                       json={"workouts": workouts, "nutrition": nutrition}).status_code == 200
+
+    response = client.post(f"/api/analytics/{account}/predict-weight",
+                           json={"weight_data": data, "days_ahead": 7, "resting_calories": 1800})
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["predictions"]) == 7
+    assert set(body["regressor_coefficients"]) == {"energy_balance_7d", "acute_load"}
+
+
+def test_disk_store_is_shared_between_processes(tmp_path):
+    # 워커 프로세스 두 개처럼 같은 디렉터리를 쓰는 저장소 두 개
+    first, second = (AnalyticsStore(max_accounts=1, directory=str(tmp_path)) for _ in range(2))
+    first.materialize("a", [_workout("2024-01-01")])
+    assert second.summary("a")["totals"]["sessions"] == 1
+
+    second.materialize("a", [_workout("2024-01-02")])
+    assert first.summary("a")["totals"]["sessions"] == 2
+    assert first.regressors("a") is not None
+
+    first.materialize("b", [_workout("1969-12-01")])  # 메모리에서 a 가 빠져도 파일에서 다시 읽음
+    assert first.summary("a")["totals"]["sessions"] == 2
+    assert first.summary("b")["rows"][0]["date"] == "1969-12-01"
+    assert first.stats()["stored_accounts"] == 2
+
+    assert second.clear("a") is True
+    assert first.summary("a") is None
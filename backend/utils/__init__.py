@@ -0,0 +1 @@
+# 유틸리티 패키지
\ No newline at end of file
@@ -0,0 +1,257 @@
+# 핫패스 계측과 Prometheus 텍스트 형식 메트릭
+# 모델 코드의 단계별 시간(timed), 요청 수 / 오류 / 지연, 진행 중 요청 수 등을
+# 가벼운 카운터와 히스토그램에 기록하고 /metrics 에서 Prometheus 텍스트 형식으로 내보냅니다.
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SERIES_LENGTH_BUCKETS = (5, 10, 30, 90, 180, 365, 730, 1825, 3650, 10000)
+
+# 현재 요청의 단계별 시간 목록 (Server-Timing 헤더용, 요청 밖에서는 None)
+request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+
+def _format_labels(labelnames: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """현재 값 게이지 (callback 을 주면 수집 시점에 값을 읽음)"""
+
+    def __init__(self, name: str, help_text: str, callback: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.help_text = help_text
+        self.callback = callback
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+    @property
+    def value(self) -> float:
+        return self.callback() if self.callback is not None else self._value
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge",
+                f"{self.name} {_format_value(self.value)}"]
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS,
+                 labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], list] = {}  # key -> [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(str(labels[name]) for name in self.labelnames))
+        return series[-1] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = _format_labels(self.labelnames, key, f'le="{_format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, callback: Optional[Callable[[], float]] = None) -> Gauge:
+        return self.register(Gauge(name, help_text, callback))
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS,
+                  labelnames: Sequence[str] = ()) -> Histogram:
+        return self.register(Histogram(name, help_text, buckets, labelnames))
+
+    def render(self) -> str:
+        """Prometheus 텍스트 형식 (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_DURATION = registry.histogram(
+    "model_stage_duration_seconds", "모델 연산 단계별 소요 시간", labelnames=("stage",))
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP 요청 처리 시간", labelnames=("method", "route"))
+REQUESTS_TOTAL = registry.counter(
+    "http_requests_total", "HTTP 요청 수", labelnames=("method", "route", "status"))
+ERRORS_TOTAL = registry.counter(
+    "http_errors_total", "HTTP 오류 응답 수 (HTTPException 상태 코드별)", labelnames=("route", "status"))
+IN_FLIGHT = registry.gauge("http_requests_in_flight", "처리 중인 HTTP 요청 수")
+SERIES_LENGTH = registry.histogram(
+    "weight_series_length", "체중 예측 요청의 기록 수 분포", buckets=SERIES_LENGTH_BUCKETS)
+
+
+@contextmanager
+def timed(stage: str):
+    """코드 블록 시간을 단계 히스토그램과 현재 요청의 Server-Timing 목록에 기록"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_DURATION.observe(elapsed, stage=stage)
+        timings = request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def record_timings(timings: List[Tuple[str, float]]):
+    """다른 프로세스(프로세스 풀 워커)에서 잰 단계별 시간을 이 프로세스의 히스토그램과 현재 요청에 기록"""
+    current = request_timings.get()
+    for stage, elapsed in timings:
+        STAGE_DURATION.observe(elapsed, stage=stage)
+        if current is not None:
+            current.append((stage, elapsed))
+
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> str:
+    """Server-Timing 헤더 값 (같은 단계는 합산, 단위 ms)"""
+    merged: Dict[str, float] = {}
+    for stage, elapsed in timings:
+        merged[stage] = merged.get(stage, 0.0) + elapsed
+    merged["total"] = total
+    return ", ".join(f"{stage};dur={elapsed * 1000:.3f}" for stage, elapsed in merged.items())
+
+
+class SamplingProfiler:
+    """모든 스레드의 스택을 주기적으로 샘플링해 느린 요청 구간을 flamegraph 용 접힌 스택으로 저장"""
+
+    def __init__(self, interval: float = 0.005, max_samples: int = 20000):
+        self.interval = interval
+        self._samples = deque(maxlen=max_samples)  # (시각, 접힌 스택)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self._samples.append((now, ";".join(reversed(stack))))
+
+    def collapsed(self, since: float, until: float) -> Dict[str, int]:
+        """구간 내 샘플을 '스택 개수' 형식으로 집계"""
+        counts: Dict[str, int] = {}
+        for timestamp, stack in list(self._samples):
+            if since <= timestamp <= until:
+                counts[stack] = counts.get(stack, 0) + 1
+        return counts
+
+    def dump(self, path: str, since: float, until: float) -> int:
+        """구간 샘플을 flamegraph.pl / speedscope 가 읽는 접힌 스택 파일로 저장"""
+        counts = self.collapsed(since, until)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(counts.items()):
+                f.write(f"{stack} {count}\n")
+        return len(counts)
+
+
+profiler = SamplingProfiler()